@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+lovechinese 异步爬虫 - StorySpider的异步版本
+在同一个 CrawlEngine 会话中并发获取：
+- aiohttp连接池复用连接
+- 有界并发：同时进行的请求数不超过max_concurrent
+- 按主机令牌桶限速，代替每个故事之后固定的sleep
+
+故事并发获取、完成即写入，每个故事的输出与同步版本逐字节相同（jsonl/sqlite中的顺序为完成顺序）。
+
+用法:
+    python async_spider.py https://www.lovechinese.org/reading/site/series/6 --concurrency 8
+"""
+
+import argparse
+import asyncio
+import logging
+
+from story_spider import StorySpider
+
+
+class AsyncStorySpider(StorySpider):
+    def __init__(self, *args, max_concurrent=8, requests_per_second=None, burst=None, **kwargs):
+        """max_concurrent为同时进行的请求数；requests_per_second为每个主机每秒的请求数，
+        未指定时按 max_concurrent / request_delay 换算，request_delay为0时不限速"""
+        self.max_concurrent = max_concurrent
+        self.requests_per_second = requests_per_second
+        self.burst = burst
+        super().__init__(*args, **kwargs)
+
+    async def __aenter__(self):
+        await self.engine.__aenter__()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.engine.__aexit__(exc_type, exc_val, exc_tb)
+
+    async def get_page(self, url, max_retries=None):
+        """获取页面内容，失败时返回None"""
+        return await self.engine.fetch(url, self.adapter, max_retries)
+
+    async def parse_story_list(self, url):
+        """解析故事列表页面"""
+        print(f"正在解析故事列表: {url}")
+        stories = await self._story_list(url)
+        print(f"找到 {len(stories)} 个故事")
+        return stories
+
+    async def parse_story_content(self, story_url):
+        """解析单个故事内容"""
+        return await self._story_content(story_url)
+
+    async def crawl_stories(self, list_url, output_dir="stories", max_stories=None):
+        """爬取所有故事"""
+        return await self._crawl_stories(list_url, output_dir, max_stories)
+
+
+async def main(args):
+    async with AsyncStorySpider(parser=args.parser, state_path=args.state, resume=args.state is not None,
+                                output_format=args.format, archive_path=args.archive,
+                                request_delay=args.request_delay, max_concurrent=args.concurrency,
+                                requests_per_second=args.rps) as spider:
+        await spider.crawl_stories(args.url, args.output, args.max_stories)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    arg_parser = argparse.ArgumentParser(description="lovechinese 异步爬虫")
+    arg_parser.add_argument("url", nargs="?", default="https://www.lovechinese.org/reading/site/series/6",
+                            help="故事列表页URL")
+    arg_parser.add_argument("--output", default="stories", help="输出目录")
+    arg_parser.add_argument("--max-stories", type=int, help="最多爬取的故事数")
+    arg_parser.add_argument("--concurrency", type=int, default=8, help="同时进行的请求数")
+    arg_parser.add_argument("--rps", type=float, help="每秒请求数，默认按 并发数/请求间隔 换算")
+    arg_parser.add_argument("--request-delay", type=float, default=1, help="每个并发名额的请求间隔（秒）")
+    arg_parser.add_argument("--parser", default="html.parser", help="提取后端: html.parser / lxml")
+    arg_parser.add_argument("--format", default="text", help="输出格式: text / jsonl / sqlite")
+    arg_parser.add_argument("--state", help="爬取状态库，指定后中断可继续")
+    arg_parser.add_argument("--archive", help="原始页面归档目录")
+    asyncio.run(main(arg_parser.parse_args()))
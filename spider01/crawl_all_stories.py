@@ -3,17 +3,23 @@
 """
 365夜童话故事爬虫 - 完整版
 用于爬取 https://www.lovechinese.org/reading/site/series/6 的所有故事
+使用方法：python crawl_all_stories.py [--state 路径 [--resume]] [--archive 目录]
 """
 
+import argparse
+import logging
+
 from story_spider import StorySpider
 
-def main():
+def main(args):
     print("=" * 60)
     print("365夜童话故事爬虫 - 完整版")
     print("=" * 60)
     
     # 创建爬虫实例
-    spider = StorySpider()
+    # 指定 --state 时记录爬取进度，加 --resume 后中断再运行从上次停下的位置继续；--archive 保存原始页面
+    spider = StorySpider(parser="lxml", state_path=args.state, resume=args.resume,
+                         archive_path=args.archive)
     
     # 目标URL
     target_url = "https://www.lovechinese.org/reading/site/series/6"
@@ -45,4 +51,12 @@ def main():
         print(f"\n爬取过程中出现错误: {e}")
 
 if __name__ == "__main__":
-    main()
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    arg_parser = argparse.ArgumentParser(description="365夜童话故事爬虫")
+    arg_parser.add_argument("--state", help="爬取状态库路径，如 crawl_state.sqlite3")
+    arg_parser.add_argument("--resume", action="store_true", help="从上次中断处继续（需要 --state）")
+    arg_parser.add_argument("--archive", help="原始页面归档目录，如 page_archive")
+    args = arg_parser.parse_args()
+    if args.resume and not args.state:
+        arg_parser.error("--resume 需要同时指定 --state")
+    main(args)
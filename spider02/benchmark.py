@@ -0,0 +1,289 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+端到端爬取性能测试 - 在本地模拟站点上运行各个爬虫
+每个爬虫在独立子进程中运行，分别统计：
+- 故事/秒（只计爬取阶段，不含会话预热）
+- 页面获取延迟 p50/p99（从发起到取得内容，含重试和排队等待）
+- 进程内存峰值（RSS）
+
+用法:
+    python benchmark.py --pages 10 --per-page 20 --latency lognormal:0.05,0.5
+    python benchmark.py --spiders async --concurrency 16 --error-rate 0.02
+"""
+
+import argparse
+import asyncio
+import importlib
+import json
+import math
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from typing import Dict, List
+
+from mock_site import MockSite, add_arguments, config_from_args, serve
+
+SPIDER01_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'spider01')
+SPIDERS = ('async', 'sync', 'spider01', 'spider01-async')
+
+# 子进程输出结果行的前缀，其余输出是爬虫自身的日志
+RESULT_PREFIX = "BENCHMARK_RESULT "
+
+
+def percentile(values: List[float], q: float) -> float:
+    """最近秩百分位数"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, math.ceil(q / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def peak_rss_mb() -> float:
+    """当前进程的内存峰值（MB）"""
+    import resource
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux以KB为单位，macOS以字节为单位
+    return peak / 1024 / 1024 if sys.platform == 'darwin' else peak / 1024
+
+
+# 子进程：运行单个爬虫
+
+def _timed(fetch, latencies: List[float]):
+    """记录每次页面获取的耗时；各爬虫都在引擎上运行，包装 spider.engine._fetch"""
+    if asyncio.iscoroutinefunction(fetch):
+        async def timed(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return await fetch(*args, **kwargs)
+            finally:
+                latencies.append(time.perf_counter() - started)
+    else:
+        def timed(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return fetch(*args, **kwargs)
+            finally:
+                latencies.append(time.perf_counter() - started)
+    return timed
+
+
+async def _run_async(args, latencies: List[float]):
+    from main_spider import OptimizedGushi365Spider
+    spider = OptimizedGushi365Spider(
+        max_concurrent=args.concurrency,
+        request_delay=args.request_delay,
+        parser=args.parser,
+        parse_mode=args.parse_mode,
+        adaptive_concurrency=args.adaptive,
+        stream_parse=args.stream_parse,
+        stop_after_content=args.stop_after_content,
+        profile=args.profile,
+        profile_dir=args.profile_dir,
+        run_id=f"benchmark-async-{os.getpid()}",
+    )
+    spider.base_url = args.base_url
+    spider.engine._fetch = _timed(spider.engine._fetch, latencies)
+    async with spider:
+        started = time.perf_counter()
+        count = await spider.crawl_category(f"{args.base_url}/shuiqiangushi/", stories_dir=args.output)
+        return count, time.perf_counter() - started
+
+
+def _run_sync(args, latencies: List[float]):
+    from story_spider import Gushi365Spider
+    spider = Gushi365Spider(parser=args.parser, request_delay=args.request_delay, workers=args.workers,
+                            profile=args.profile,
+                            profile_dir=args.profile_dir, run_id=f"benchmark-sync-{os.getpid()}")
+    spider.base_url = args.base_url
+    spider.engine._fetch = _timed(spider.engine._fetch, latencies)
+    started = time.perf_counter()
+    try:
+        count = spider.crawl_category(f"{args.base_url}/shuiqiangushi/", stories_dir=args.output)
+    finally:
+        spider.close()
+    return count, time.perf_counter() - started
+
+
+def _run_spider01(args, latencies: List[float]):
+    # spider01与本目录有同名模块，子进程中优先从spider01导入
+    sys.path.insert(0, os.path.abspath(SPIDER01_DIR))
+    story_spider = importlib.import_module('story_spider')
+    spider = story_spider.StorySpider(base_url=args.base_url, parser=args.parser, request_delay=args.request_delay,
+                                      profile=args.profile, profile_dir=args.profile_dir,
+                                      run_id=f"benchmark-spider01-{os.getpid()}")
+    spider.engine._fetch = _timed(spider.engine._fetch, latencies)
+    started = time.perf_counter()
+    stories = spider.crawl_stories(f"{args.base_url}/reading/site/series/1", args.output)
+    return len(stories), time.perf_counter() - started
+
+
+async def _run_spider01_async(args, latencies: List[float]):
+    sys.path.insert(0, os.path.abspath(SPIDER01_DIR))
+    async_spider = importlib.import_module('async_spider')
+    spider = async_spider.AsyncStorySpider(base_url=args.base_url, parser=args.parser,
+                                           request_delay=args.request_delay, max_concurrent=args.concurrency,
+                                           profile=args.profile, profile_dir=args.profile_dir,
+                                           run_id=f"benchmark-spider01-async-{os.getpid()}")
+    spider.engine._fetch = _timed(spider.engine._fetch, latencies)
+    async with spider:
+        started = time.perf_counter()
+        stories = await spider.crawl_stories(f"{args.base_url}/reading/site/series/1", args.output)
+        return len(stories), time.perf_counter() - started
+
+
+def run_worker(args):
+    latencies: List[float] = []
+    if args.worker == 'async':
+        count, elapsed = asyncio.run(_run_async(args, latencies))
+    elif args.worker == 'sync':
+        count, elapsed = _run_sync(args, latencies)
+    elif args.worker == 'spider01-async':
+        count, elapsed = asyncio.run(_run_spider01_async(args, latencies))
+    else:
+        count, elapsed = _run_spider01(args, latencies)
+
+    result = {
+        'spider': args.worker,
+        'stories': count,
+        'requests': len(latencies),
+        'elapsed': elapsed,
+        'stories_per_sec': count / elapsed if elapsed else 0.0,
+        'p50_ms': percentile(latencies, 50) * 1000,
+        'p99_ms': percentile(latencies, 99) * 1000,
+        'peak_rss_mb': peak_rss_mb(),
+    }
+    print(RESULT_PREFIX + json.dumps(result), flush=True)
+
+
+# 主进程：启动模拟站点并依次运行各爬虫
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+class SiteThread(threading.Thread):
+    """在后台线程的事件循环中运行模拟站点"""
+
+    def __init__(self, site: MockSite, port: int):
+        super().__init__(daemon=True)
+        self.site = site
+        self.port = port
+        self.loop = asyncio.new_event_loop()
+        self.ready = threading.Event()
+
+    def run(self):
+        asyncio.set_event_loop(self.loop)
+        self.runner = self.loop.run_until_complete(serve(self.site, '127.0.0.1', self.port))
+        self.ready.set()
+        self.loop.run_forever()
+
+    def stop(self):
+        asyncio.run_coroutine_threadsafe(self.runner.cleanup(), self.loop).result()
+        self.loop.call_soon_threadsafe(self.loop.stop)
+
+
+def run_benchmark(args) -> List[Dict]:
+    site = MockSite(config_from_args(args))
+    port = args.port or _free_port()
+    server = SiteThread(site, port)
+    server.start()
+    server.ready.wait()
+    base_url = f"http://127.0.0.1:{port}"
+    print(f"模拟站点: {base_url}  每个分类 {site.total_stories} 个故事，延迟 {args.latency}，"
+          f"403比例 {args.error_rate}，超时比例 {args.timeout_rate}")
+
+    results = []
+    try:
+        for name in args.spiders.split(','):
+            if name not in SPIDERS:
+                raise ValueError(f"不支持的爬虫: {name}，可选: {', '.join(SPIDERS)}")
+            output = tempfile.mkdtemp(prefix=f"benchmark_{name}_")
+            command = [
+                sys.executable, os.path.abspath(__file__), '--worker', name,
+                '--base-url', base_url, '--output', output,
+                '--concurrency', str(args.concurrency), '--request-delay', str(args.request_delay),
+                '--parser', args.parser, '--parse-mode', args.parse_mode, '--workers', str(args.workers),
+            ]
+            if args.adaptive:
+                command.append('--adaptive')
+            if args.stream_parse:
+                command.append('--stream-parse')
+            if args.stop_after_content:
+                command.append('--stop-after-content')
+            if args.profile:
+                command += ['--profile', args.profile, '--profile-dir', os.path.abspath(args.profile_dir)]
+            print(f"\n运行 {name} ...")
+            completed = subprocess.run(command, capture_output=True, text=True)
+            if args.verbose or completed.returncode != 0:
+                sys.stdout.write(completed.stdout)
+                sys.stderr.write(completed.stderr)
+            lines = [line for line in completed.stdout.splitlines() if line.startswith(RESULT_PREFIX)]
+            if lines:
+                result = json.loads(lines[-1][len(RESULT_PREFIX):])
+                results.append(result)
+                print(f"{name}: {result['stories']} 个故事，{result['stories_per_sec']:.1f} 故事/秒")
+            else:
+                print(f"{name} 运行失败 (退出码 {completed.returncode})")
+            if args.keep_output:
+                print(f"输出目录: {output}")
+            else:
+                shutil.rmtree(output, ignore_errors=True)
+    finally:
+        server.stop()
+
+    print(f"\n{'爬虫':<16}{'故事':>8}{'请求':>8}{'耗时(秒)':>10}{'故事/秒':>10}{'p50(ms)':>10}{'p99(ms)':>10}{'RSS(MB)':>10}")
+    for result in results:
+        print(f"{result['spider']:<16}{result['stories']:>8}{result['requests']:>8}{result['elapsed']:>10.2f}"
+              f"{result['stories_per_sec']:>10.1f}{result['p50_ms']:>10.1f}{result['p99_ms']:>10.1f}"
+              f"{result['peak_rss_mb']:>10.1f}")
+    print(f"服务器响应统计: {site.counts}")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({'config': vars(args), 'results': results, 'server': site.counts}, f,
+                      ensure_ascii=False, indent=2)
+    return results
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="在本地模拟站点上测试爬虫性能")
+    arg_parser.add_argument("--spiders", default=','.join(SPIDERS), help="要测试的爬虫，逗号分隔: async,sync,spider01,spider01-async")
+    arg_parser.add_argument("--concurrency", type=int, default=8, help="异步爬虫（async、spider01-async）并发数")
+    arg_parser.add_argument("--workers", type=int, default=1, help="同步爬虫线程数，1表示逐个处理")
+    arg_parser.add_argument("--request-delay", type=float, default=0.0, help="爬虫请求间隔（秒），0表示不限速")
+    arg_parser.add_argument("--adaptive", action="store_true", help="异步爬虫启用自适应并发")
+    arg_parser.add_argument("--parser", default="html.parser", help="提取后端: html.parser / lxml")
+    arg_parser.add_argument("--parse-mode", default="inline", help="异步爬虫解析模式: inline / thread / process")
+    arg_parser.add_argument("--stream-parse", action="store_true", help="异步爬虫边接收边增量解析详情页（需要 --parser lxml）")
+    arg_parser.add_argument("--stop-after-content", action="store_true",
+                            help="异步爬虫流式解析时在正文容器结束后停止读取（需要 --parser lxml）")
+    arg_parser.add_argument("--profile", help="按阶段性能剖析，逗号分隔: cpu,stack,memory（开启后吞吐量数据不可比）")
+    arg_parser.add_argument("--profile-dir", default="profiles", help="性能剖析结果目录")
+    arg_parser.add_argument("--port", type=int, default=0, help="模拟站点端口，默认随机")
+    arg_parser.add_argument("--json", help="把结果写入JSON文件")
+    arg_parser.add_argument("--keep-output", action="store_true", help="保留爬取结果目录")
+    arg_parser.add_argument("--verbose", action="store_true", help="显示爬虫输出")
+    add_arguments(arg_parser)
+    # 子进程参数
+    arg_parser.add_argument("--worker", choices=SPIDERS, help=argparse.SUPPRESS)
+    arg_parser.add_argument("--base-url", help=argparse.SUPPRESS)
+    arg_parser.add_argument("--output", help=argparse.SUPPRESS)
+    args = arg_parser.parse_args()
+
+    if args.worker:
+        run_worker(args)
+    else:
+        run_benchmark(args)
+
+
+if __name__ == "__main__":
+    main()
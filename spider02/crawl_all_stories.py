@@ -3,16 +3,17 @@
 """
 故事365网站异步爬虫 - 高性能版本
 专门爬取睡前故事和寓言故事
-使用方法：python crawl_all_stories.py
+使用方法：python crawl_all_stories.py [--cache 路径] [--state 路径 [--resume]] [--archive 目录] [--metrics 目录]
 """
 
+import argparse
 import asyncio
 import sys
 import os
 import time
 from main_spider import OptimizedGushi365Spider
 
-async def main():
+async def main(args):
     print("故事365网站异步爬虫 - 高性能版本")
     print("=" * 60)
     
@@ -20,6 +21,17 @@ async def main():
     spider_config = {
         'max_concurrent': 4,     # 降低并发数
         'request_delay': 1.2,    # 增加请求间隔
+        'parse_mode': 'process',  # 在进程池中解析HTML，不阻塞事件循环
+        'parser': 'lxml',        # lxml提取后端，比html.parser快数倍
+        'adaptive_concurrency': True,   # 以max_concurrent为起点，按403/超时/延迟自动调整并发
+        'adaptive_max_concurrent': 12,  # 自适应并发上限
+        'output_format': 'text',  # 输出格式：text（每个故事一个txt）/ jsonl / sqlite
+        # 以下默认关闭，由命令行参数开启
+        'cache_path': args.cache,  # 持久化缓存，重复爬取时发送条件请求
+        'state_path': args.state,  # 记录每个故事的爬取进度
+        'resume': args.resume,     # 中断后再次运行时从上次停下的位置继续
+        'archive_path': args.archive,  # 保存原始页面，之后可离线重新提取
+        'metrics_dir': args.metrics,   # 各阶段耗时和计数，每30秒及结束时导出JSON/Prometheus文件
     }
     
     # 定义要爬取的分类
@@ -83,8 +95,17 @@ async def main():
     print(f"{'='*60}")
 
 if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="故事365网站异步爬虫")
+    arg_parser.add_argument("--cache", help="HTTP缓存库路径，如 http_cache.sqlite3")
+    arg_parser.add_argument("--state", help="爬取状态库路径，如 crawl_state.sqlite3")
+    arg_parser.add_argument("--resume", action="store_true", help="从上次中断处继续（需要 --state）")
+    arg_parser.add_argument("--archive", help="原始页面归档目录，如 page_archive")
+    arg_parser.add_argument("--metrics", help="运行指标导出目录，如 metrics")
+    args = arg_parser.parse_args()
+    if args.resume and not args.state:
+        arg_parser.error("--resume 需要同时指定 --state")
     try:
-        asyncio.run(main())
+        asyncio.run(main(args))
     except KeyboardInterrupt:
         print("\n程序被用户中断")
         sys.exit(0)
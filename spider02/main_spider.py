@@ -1,567 +1,178 @@
 import asyncio
-import aiohttp
-import aiofiles
-from bs4 import BeautifulSoup
 import time
 import os
-from urllib.parse import urljoin
-import re
-from typing import List, Dict, Optional
+from typing import AsyncIterator, List, Dict, Optional
 import logging
-from dataclasses import dataclass
-import hashlib
+import sys
+
+# 共用模块在仓库根目录的 storycrawl 包中
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from storycrawl.metrics import Metrics
+from storycrawl.retry_policy import RetryPolicy
+from storycrawl.story_manifest import StoryManifest
+from storycrawl.output_sink import OutputSink
+from storycrawl.gushi365.story_parser import StoryInfo, StoryData, ListPage
+from storycrawl.gushi365.extract_backend import get_backend
+from storycrawl.response_stream import DEFAULT_MAX_PAGE_BYTES
+from storycrawl.crawl_engine import CrawlEngine, CrawlJob
+from storycrawl.site_adapter import Gushi365Adapter
 
 # 配置日志
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
-@dataclass
-class StoryInfo:
-    id: str
-    title: str
-    url: str
 
-@dataclass
-class StoryData:
-    title: str
-    content: str
-    author: str = ""
-    category: str = ""
-    url: str = ""
+def to_story_data(record: Optional[dict]) -> Optional[StoryData]:
+    """引擎的故事记录转换为StoryData"""
+    if record is None:
+        return None
+    return StoryData(title=record['title'], content=record['content'], author=record['author'],
+                     category=record['category'], url=record['url'])
+
 
 class OptimizedGushi365Spider:
-    def __init__(self, max_concurrent=8, request_delay=0.8):
-        self.base_url = "https://www.gushi365.com"
+    """故事365异步爬虫：在 CrawlEngine 上运行 Gushi365Adapter 的任务
+
+    获取、限速、缓存、重试、自适应并发、流式解析、爬取状态和写入都由引擎完成，
+    这里保留原有的构造参数和公开方法。进入上下文时预热会话。
+    """
+
+    def __init__(self, max_concurrent=8, request_delay=0.8, requests_per_second: Optional[float] = None,
+                 burst: Optional[int] = None, cache_path: Optional[str] = None,
+                 cache_max_bytes: int = 512 * 1024 * 1024, parse_mode: str = 'inline',
+                 parse_workers: Optional[int] = None, parser: str = 'html.parser',
+                 save_concurrency: int = 4, adaptive_concurrency: bool = False,
+                 adaptive_max_concurrent: Optional[int] = None, state_path: Optional[str] = None,
+                 resume: bool = False, output_format: str = 'text',
+                 output_options: Optional[dict] = None, archive_path: Optional[str] = None,
+                 metrics_dir: Optional[str] = None, metrics_interval: float = 30.0,
+                 run_id: Optional[str] = None, profile=None, profile_dir: str = 'profiles',
+                 retry_policy: Optional[RetryPolicy] = None, circuit_breaker=True,
+                 max_page_bytes: Optional[int] = DEFAULT_MAX_PAGE_BYTES, stream_parse: bool = False,
+                 stop_after_content: bool = False):
+        """max_concurrent为每个主机同时进行的请求数；save_concurrency为保存协程数"""
         self.max_concurrent = max_concurrent
         self.request_delay = request_delay
-        self.semaphore = None
-        self.session = None
-        self.cache = {}  # 简单的内存缓存
-        
-        # 增强的请求头 - 模拟真实浏览器
-        self.headers = {
-            'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8,application/signed-exchange;v=b3;q=0.7',
-            'Accept-Language': 'zh-CN,zh;q=0.9,en;q=0.8,en-GB;q=0.7,en-US;q=0.6',
-            'Accept-Encoding': 'gzip, deflate, br',
-            'DNT': '1',
-            'Connection': 'keep-alive',
-            'Upgrade-Insecure-Requests': '1',
-            'Sec-Fetch-Dest': 'document',
-            'Sec-Fetch-Mode': 'navigate',
-            'Sec-Fetch-Site': 'none',
-            'Sec-Fetch-User': '?1',
-            'Cache-Control': 'max-age=0',
-            'sec-ch-ua': '"Not_A Brand";v="8", "Chromium";v="120", "Google Chrome";v="120"',
-            'sec-ch-ua-mobile': '?0',
-            'sec-ch-ua-platform': '"macOS"'
-        }
+        self.save_concurrency = save_concurrency
+        self.parser = get_backend(parser).name  # 提取后端：html.parser 或 lxml
+        # 流式解析：详情页边接收边由lxml增量解析；stop_after_content时看到正文容器结束即停止读取
+        if (stream_parse or stop_after_content) and self.parser != 'lxml':
+            raise ValueError("流式解析需要使用lxml提取后端: parser='lxml'")
+        self.adapter = Gushi365Adapter(parser=self.parser)
+        self.engine = CrawlEngine(
+            per_host_concurrency=max_concurrent, request_delay=request_delay,
+            requests_per_second=requests_per_second, burst=burst, cache_path=cache_path,
+            cache_max_bytes=cache_max_bytes, parse_mode=parse_mode, parse_workers=parse_workers,
+            save_concurrency=save_concurrency,
+            output_format=output_format, output_options=output_options, archive_path=archive_path,
+            metrics_dir=metrics_dir, metrics_interval=metrics_interval, run_id=run_id,
+            retry_policy=retry_policy, circuit_breaker=circuit_breaker, max_page_bytes=max_page_bytes,
+            adaptive_concurrency=adaptive_concurrency, adaptive_max_concurrent=adaptive_max_concurrent,
+            state_path=state_path, resume=resume, profile=profile, profile_dir=profile_dir,
+            stream_parse=stream_parse, stop_after_content=stop_after_content
+        )
+    
+    @property
+    def base_url(self) -> str:
+        return self.adapter.base_url
+    
+    @base_url.setter
+    def base_url(self, base_url: str):
+        self.adapter.base_url = base_url.rstrip('/')
+    
+    @property
+    def metrics(self) -> Metrics:
+        return self.engine.metrics
+    
+    @property
+    def coalesced_count(self) -> int:
+        """被合并的重复请求数"""
+        return self.engine.coalesced_count
     
     async def __aenter__(self):
         """异步上下文管理器入口"""
-        self.semaphore = asyncio.Semaphore(self.max_concurrent)
-        
-        # 配置连接池和超时 - 更保守的设置
-        connector = aiohttp.TCPConnector(
-            limit=30,   # 降低总连接池大小
-            limit_per_host=8,  # 降低每个主机的连接数
-            ttl_dns_cache=300,  # DNS缓存时间
-            use_dns_cache=True,
-            keepalive_timeout=30,  # 保持连接时间
-            enable_cleanup_closed=True
-        )
-        
-        timeout = aiohttp.ClientTimeout(
-            total=15,   # 增加总超时时间
-            connect=8,  # 增加连接超时
-            sock_read=8  # 增加读取超时
-        )
-        
-        self.session = aiohttp.ClientSession(
-            connector=connector,
-            timeout=timeout,
-            headers=self.headers
-        )
-        
+        await self.engine.__aenter__()
         # 预热：先访问主页，建立会话
-        await self._warmup_session()
-        
+        await self.engine.warmup(self.adapter)
         return self
     
-    async def _warmup_session(self):
-        """预热会话，模拟真实用户访问"""
-        try:
-            logger.info("预热会话，访问主页...")
-            await self.get_page(self.base_url)
-            await asyncio.sleep(2.0)  # 停留2秒
-            logger.info("会话预热完成")
-        except Exception as e:
-            logger.warning(f"会话预热失败，但继续执行: {e}")
-    
     async def __aexit__(self, exc_type, exc_val, exc_tb):
         """异步上下文管理器退出"""
-        if self.session:
-            await self.session.close()
+        await self.engine.__aexit__(exc_type, exc_val, exc_tb)
     
-    def _get_cache_key(self, url: str) -> str:
-        """生成缓存键"""
-        return hashlib.md5(url.encode()).hexdigest()
+    def profile_stage(self, stage: str):
+        """启用性能剖析时剖析代码块，否则什么也不做"""
+        return self.engine.profile_stage(stage)
     
-    async def get_page(self, url: str, max_retries: int = 3) -> Optional[str]:
-        """异步获取页面内容，带缓存和增强的反反爬虫策略"""
-        cache_key = self._get_cache_key(url)
-        
-        # 检查缓存
-        if cache_key in self.cache:
-            logger.debug(f"从缓存获取: {url}")
-            return self.cache[cache_key]
-        
-        async with self.semaphore:  # 限制并发数
-            for attempt in range(max_retries):
-                try:
-                    logger.debug(f"获取页面: {url} (尝试 {attempt + 1}/{max_retries})")
-                    
-                    # 随机延迟，模拟人类行为
-                    if attempt > 0:
-                        import random
-                        delay = random.uniform(1.0, 3.0)
-                        await asyncio.sleep(delay)
-                    
-                    # 动态更新Referer头
-                    headers = self.headers.copy()
-                    if '/info/' in url:
-                        # 详情页请求时添加分类页面作为Referer
-                        if 'tonghuagushi' in url:
-                            headers['Referer'] = 'https://www.gushi365.com/tonghuagushi/'
-                        elif 'yuyangushi' in url:
-                            headers['Referer'] = 'https://www.gushi365.com/yuyangushi/'
-                    
-                    async with self.session.get(url, headers=headers) as response:
-                        if response.status == 200:
-                            content = await response.text(encoding='utf-8', errors='ignore')
-                            
-                            # 缓存结果
-                            self.cache[cache_key] = content
-                            
-                            # 添加请求延时，随机化延迟时间
-                            if self.request_delay > 0:
-                                import random
-                                actual_delay = random.uniform(self.request_delay * 0.8, self.request_delay * 1.2)
-                                await asyncio.sleep(actual_delay)
-                            
-                            return content
-                        elif response.status == 403:
-                            logger.warning(f"HTTP 403 (被拒绝访问): {url}")
-                            # 403错误时增加更长的延迟
-                            await asyncio.sleep(3.0 * (attempt + 1))
-                        else:
-                            logger.warning(f"HTTP {response.status}: {url}")
-                            
-                except asyncio.TimeoutError:
-                    logger.warning(f"请求超时: {url} (尝试 {attempt + 1})")
-                    # 超时后增加延迟
-                    await asyncio.sleep(2.0 * (attempt + 1))
-                except Exception as e:
-                    logger.warning(f"请求失败: {url} - {e} (尝试 {attempt + 1})")
-                    # 其他错误也增加延迟
-                    await asyncio.sleep(1.5 * (attempt + 1))
-                
-                if attempt < max_retries - 1:
-                    # 递增延迟，给服务器更多时间
-                    await asyncio.sleep(2.0 * (attempt + 1))
-            
-            logger.error(f"获取页面最终失败: {url}")
-            return None
+    def _job(self, category_url: str, max_pages: Optional[int] = None, max_stories: Optional[int] = None,
+             stories_dir: Optional[str] = None) -> CrawlJob:
+        # 进入上下文时已预热
+        return CrawlJob(self.adapter, category_url, stories_dir or "stories", max_pages, max_stories, warmup=False)
+    
+    async def get_page(self, url: str, max_retries: Optional[int] = None) -> Optional[str]:
+        """异步获取页面内容，同一URL的并发请求只发起一次网络请求"""
+        return await self.engine.fetch(url, self.adapter, max_retries)
     
     async def parse_story_list(self, category_url: str, max_pages: Optional[int] = None) -> List[StoryInfo]:
         """异步解析故事分类列表页面"""
         logger.info(f"正在解析分类: {category_url}")
         
-        all_stories = []
-        page = 1
-        
-        # 并发获取多个页面
-        page_tasks = []
-        
-        while True:
-            # 构建页面URL
-            if page == 1:
-                page_url = category_url
-            else:
-                base_path = category_url.rstrip('/')
-                page_url = f"{base_path}/index_{page}.html"
-            
-            page_tasks.append(self.parse_single_page(page_url, page))
-            
-            if max_pages and page >= max_pages:
-                break
-            
-            # 每次批量处理5页，避免过度并发
-            if len(page_tasks) >= 5:
-                break
-                
-            page += 1
-        
-        # 并发执行页面解析
-        page_results = await asyncio.gather(*page_tasks, return_exceptions=True)
-        
-        for result in page_results:
-            if isinstance(result, Exception):
-                logger.error(f"页面解析失败: {result}")
-                continue
-            
-            if result:  # result 是 (page_num, stories) 元组
-                page_num, stories = result
-                logger.info(f"第{page_num}页找到 {len(stories)} 个故事")
-                
-                for story in stories:
-                    # 避免重复
-                    if not any(s.id == story.id for s in all_stories):
-                        all_stories.append(story)
+        all_stories: Dict[str, StoryInfo] = {}  # 按发现顺序去重
+        async for list_page in self.iter_list_pages(category_url, max_pages):
+            for story in list_page.stories:
+                all_stories.setdefault(story.id, story)
         
         logger.info(f"总共找到 {len(all_stories)} 个故事")
-        return all_stories
+        return list(all_stories.values())
     
-    async def parse_single_page(self, page_url: str, page_num: int) -> Optional[tuple]:
+    def iter_list_pages(self, category_url: str, max_pages: Optional[int] = None) -> AsyncIterator[ListPage]:
+        """按页码顺序产出列表页"""
+        return self.engine.iter_list_pages(self._job(category_url, max_pages))
+    
+    async def parse_single_page(self, page_url: str, page_num: int) -> Optional[ListPage]:
         """解析单个列表页面"""
-        try:
-            html = await self.get_page(page_url)
-            if not html:
-                return None
-            
-            soup = BeautifulSoup(html, 'html.parser')
-            
-            # 查找故事链接
-            story_links = soup.find_all('a', href=re.compile(r'/info/\d+\.html'))
-            
-            if not story_links:
-                logger.debug(f"第{page_num}页没有找到故事链接")
-                return None
-            
-            stories = []
-            for link in story_links:
-                story_url = urljoin(self.base_url, link['href'])
-                story_title = link.get_text(strip=True)
-                
-                # 提取故事ID
-                story_id = re.search(r'/info/(\d+)\.html', link['href'])
-                story_id = story_id.group(1) if story_id else None
-                
-                if story_title and story_url and story_id:
-                    stories.append(StoryInfo(
-                        id=story_id,
-                        title=story_title,
-                        url=story_url
-                    ))
-            
-            return (page_num, stories)
-            
-        except Exception as e:
-            logger.error(f"解析第{page_num}页失败: {e}")
-            return None
+        return await self.engine.list_page(self.adapter, page_url, page_num)
     
     async def parse_story_content(self, story_url: str) -> Optional[StoryData]:
         """异步解析单个故事内容"""
-        try:
-            html = await self.get_page(story_url)
-            if not html:
-                return None
-            
-            soup = BeautifulSoup(html, 'html.parser')
-            
-            # 提取故事标题
-            title_element = soup.find('h1')
-            if not title_element:
-                title_links = soup.find_all('a', href=re.compile(r'/info/\d+\.html'))
-                for link in title_links:
-                    if story_url.endswith(link['href']):
-                        title_element = link
-                        break
-            
-            title = title_element.get_text(strip=True) if title_element else "无标题"
-            
-            # 清理标题
-            title = re.sub(r'\s*-\s*故事365.*$', '', title)
-            title = re.sub(r'\s*【.*?】.*$', '', title)
-            
-            # 提取故事内容
-            content = self._extract_story_content(soup)
-            
-            # 提取作者和分类信息
-            author = self._extract_author(soup)
-            category = self._extract_category(soup)
-            
-            return StoryData(
-                title=title,
-                content=content,
-                author=author,
-                category=category,
-                url=story_url
-            )
-            
-        except Exception as e:
-            logger.error(f"解析故事内容失败 {story_url}: {e}")
-            return None
-    
-    def _extract_story_content(self, soup):
-        """提取故事内容的主要逻辑"""
-        # 移除不需要的元素
-        for element in soup(["script", "style", "nav", "header", "footer", "aside"]):
-            element.decompose()
-        
-        # 查找故事内容
-        paragraphs = soup.find_all('p')
-        story_paragraphs = []
-        long_paragraph = None
-        max_length = 0
-        
-        for p in paragraphs:
-            text = p.get_text(strip=True)
-            
-            if len(text) < 10:
-                continue
-                
-            # 过滤网站信息
-            skip_keywords = [
-                '故事365', '收藏', '分享', '评论', '阅读', '次数', 
-                '版权', '标签', '作者', '日期', '分类', '发表评论',
-                '用户名', '密码', '验证码', '注册', '登录',
-                '相关故事', '推荐', '热门', '最新', '随机',
-                '博客浏览', '在线投稿', '微信关注', '建站服务',
-                '赞', '订阅', '继续阅读', '全文', '搜索', '导航',
-                '首页', '幼儿', '童话', '发现', '少儿', '感人',
-                'TAG', '影音', '图片', '儿童', '睡前', '益智',
-                '排行榜', '上一篇', '下一篇'
-            ]
-            
-            if any(keyword in text for keyword in skip_keywords):
-                continue
-            
-            # 检查中文标点符号
-            if any(punct in text for punct in ['。', '，', '！', '？', '：', '；', '"', '"']):
-                story_paragraphs.append(text)
-                
-                if len(text) > max_length:
-                    max_length = len(text)
-                    long_paragraph = text
-        
-        # 选择最佳内容
-        content = ""
-        if long_paragraph and len(long_paragraph) > 500:
-            content = long_paragraph
-        elif story_paragraphs:
-            filtered_paragraphs = []
-            
-            for para in story_paragraphs:
-                if long_paragraph and para in long_paragraph:
-                    continue
-                if para == long_paragraph:
-                    continue
-                filtered_paragraphs.append(para)
-            
-            if filtered_paragraphs:
-                if content:
-                    content += '\n\n' + '\n\n'.join(filtered_paragraphs)
-                else:
-                    content = '\n\n'.join(filtered_paragraphs)
-        
-        # 清理内容
-        if content:
-            content = self._clean_content(content)
-        
-        return content
+        story = StoryInfo(id=self.adapter.story_id(story_url), title=story_url, url=story_url)
+        return to_story_data(await self.engine.story(self.adapter, story))
     
-    def _clean_content(self, content):
-        """清理故事内容"""
-        lines = content.split('\n')
-        cleaned_lines = []
-        seen_lines = set()
-        
-        for line in lines:
-            line = line.strip()
-            if not line or len(line) < 5 or line.isdigit():
-                continue
-                
-            skip_keywords = [
-                '故事365', '收藏', '分享', '评论', '阅读', '次数', 
-                '版权', '标签', '作者', '日期', '分类', '发表评论',
-                '用户名', '密码', '验证码', '注册', '登录',
-                '相关故事', '推荐', '热门', '最新', '随机',
-                '博客浏览', '在线投稿', '微信关注', '建站服务',
-                '赞', '订阅', '继续阅读', '全文', '搜索', '导航',
-                '首页', '幼儿', '童话', '发现', '少儿', '感人',
-                'TAG', '影音', '图片', '儿童', '睡前', '益智',
-                '排行榜', '上一篇', '下一篇', '鸟类中的骗子',
-                '｜', '——'
-            ]
-            
-            if any(keyword in line for keyword in skip_keywords):
-                continue
-                
-            if line.startswith('http') or '点击' in line:
-                continue
-            
-            if line in seen_lines:
-                continue
-            seen_lines.add(line)
-                
-            cleaned_lines.append(line)
-        
-        content = '\n\n'.join(cleaned_lines)
-        content = re.sub(r'\n{3,}', '\n\n', content)
-        content = re.sub(r'([。！？])\n([^\"\'])', r'\1\n\n\2', content)
-        
-        return content.strip()
+    def manifest(self, stories_dir: str = "stories") -> StoryManifest:
+        """保存目录对应的已保存故事清单，首次使用时加载"""
+        return self.engine.output(self.adapter, stories_dir).manifest
     
-    def _extract_author(self, soup):
-        """提取作者信息"""
-        author = ""
-        
-        author_patterns = [
-            soup.find(text=re.compile(r'作者[：:]')),
-            soup.find('span', text=re.compile(r'作者')),
-            soup.find('div', class_=re.compile(r'author')),
-        ]
-        
-        for pattern in author_patterns:
-            if pattern:
-                if hasattr(pattern, 'parent'):
-                    author_text = pattern.parent.get_text(strip=True)
-                else:
-                    author_text = str(pattern).strip()
-                
-                author_match = re.search(r'作者[：:]\s*([^\s]+)', author_text)
-                if author_match:
-                    author = author_match.group(1)
-                    break
-        
-        return author
+    def sink(self, stories_dir: str = "stories") -> OutputSink:
+        """保存目录对应的输出后端，首次使用时创建"""
+        return self.engine.output(self.adapter, stories_dir).sink
     
-    def _extract_category(self, soup):
-        """提取分类信息"""
-        category = ""
-        
-        category_patterns = [
-            soup.find('a', href=re.compile(r'/(shuiqiangushi|yuyangushi)/')),
-            soup.find(text=re.compile(r'分类[：:]')),
-            soup.find('span', text=re.compile(r'分类')),
-        ]
-        
-        for pattern in category_patterns:
-            if pattern:
-                if hasattr(pattern, 'get_text'):
-                    category = pattern.get_text(strip=True)
-                elif hasattr(pattern, 'parent'):
-                    category = pattern.parent.get_text(strip=True)
-                else:
-                    category = str(pattern).strip()
-                break
-        
-        return category
+    async def flush_stories(self, stories_dir: str = "stories"):
+        """把缓冲的故事成批落盘，写入在线程中执行"""
+        await self.engine.flush_output(stories_dir)
     
     async def save_story(self, story_data: StoryData, stories_dir: str = "stories") -> bool:
-        """异步保存故事到文件"""
-        if not story_data or not story_data.content:
+        """保存故事并立即落盘，写入成功（或已保存）时返回True"""
+        record = Gushi365Adapter.record(story_data, self.adapter.story_id(story_data.url)) if story_data else None
+        if record is None:
             logger.debug("故事内容为空，跳过保存")
             return False
-            
-        if not os.path.exists(stories_dir):
-            os.makedirs(stories_dir)
-        
-        # 清理文件名
-        safe_title = re.sub(r'[<>:"/\\|?*]', '', story_data.title)
-        safe_title = safe_title.replace(' ', '_')
-        
-        # 从URL提取ID
-        story_id = story_data.url.split('/')[-1].replace('.html', '')
-        filename = f"{story_id}_{safe_title}.txt"
-        filepath = os.path.join(stories_dir, filename)
-        
-        # 避免重复保存
-        if os.path.exists(filepath):
-            logger.debug(f"文件已存在，跳过: {filename}")
-            return True
-        
-        try:
-            # 使用异步文件操作
-            async with aiofiles.open(filepath, 'w', encoding='utf-8') as f:
-                await f.write(f"标题: {story_data.title}\n")
-                if story_data.author:
-                    await f.write(f"作者: {story_data.author}\n")
-                if story_data.category:
-                    await f.write(f"分类: {story_data.category}\n")
-                await f.write(f"来源: {story_data.url}\n")
-                await f.write("-" * 50 + "\n\n")
-                await f.write(story_data.content)
-            
-            logger.info(f"保存成功: {filename}")
-            return True
-            
-        except Exception as e:
-            logger.error(f"保存失败 {filename}: {e}")
-            return False
+        return await self.engine.save(self.adapter, record, stories_dir)
     
     async def crawl_category(self, category_url: str, max_pages: Optional[int] = None, 
                            max_stories: Optional[int] = None, stories_dir: Optional[str] = None) -> int:
-        """异步爬取指定分类的所有故事"""
-        logger.info(f"开始爬取分类: {category_url}")
+        """异步爬取指定分类的所有故事，返回保存的故事数
         
-        # 解析故事列表
-        stories = await self.parse_story_list(category_url, max_pages)
-        
-        if max_stories:
-            stories = stories[:max_stories]
-        
-        logger.info(f"准备爬取 {len(stories)} 个故事")
-        
-        if not stories:
-            return 0
-        
-        # 并发爬取故事内容
-        save_dir = stories_dir or "stories"
-        
-        # 创建任务列表，每次处理的并发数
-        batch_size = min(self.max_concurrent, len(stories))
-        success_count = 0
-        
-        for i in range(0, len(stories), batch_size):
-            batch = stories[i:i + batch_size]
-            logger.info(f"处理批次 {i//batch_size + 1}: {len(batch)} 个故事")
-            
-            # 并发处理一批故事
-            tasks = [self.process_single_story(story, save_dir) for story in batch]
-            results = await asyncio.gather(*tasks, return_exceptions=True)
-            
-            # 统计成功数量
-            for result in results:
-                if isinstance(result, Exception):
-                    logger.error(f"处理故事失败: {result}")
-                elif result:
-                    success_count += 1
-            
-            logger.info(f"批次完成，当前成功: {success_count}")
-        
-        logger.info(f"完成！成功保存 {success_count}/{len(stories)} 个故事")
-        return success_count
+        发现 -> 获取 -> 解析 -> 保存，各阶段由有界队列连接、独立并发，故事按完成顺序写入（CrawlEngine.run_job）
+        """
+        return await self.engine.crawl_job(self._job(category_url, max_pages, max_stories, stories_dir))
     
     async def process_single_story(self, story_info: StoryInfo, save_dir: str) -> bool:
         """处理单个故事"""
-        try:
-            logger.debug(f"处理故事: {story_info.title}")
-            
-            # 解析故事内容
-            story_data = await self.parse_story_content(story_info.url)
-            
-            if story_data:
-                # 保存故事
-                return await self.save_story(story_data, save_dir)
-            else:
-                logger.warning(f"解析故事内容失败: {story_info.title}")
-                return False
-                
-        except Exception as e:
-            logger.error(f"处理故事失败 {story_info.title}: {e}")
+        record = await self.engine.story(self.adapter, story_info)
+        if record is None:
             return False
+        return await self.engine.save(self.adapter, record, save_dir)
 
 # 使用示例
 async def main():
@@ -569,6 +180,8 @@ async def main():
     spider_config = {
         'max_concurrent': 15,  # 并发数
         'request_delay': 0.3,  # 请求间隔（秒）
+        'parse_mode': 'process',  # 在进程池中解析HTML
+        'parser': 'lxml',  # 使用lxml提取后端
     }
     
     # 定义要爬取的分类
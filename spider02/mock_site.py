@@ -0,0 +1,269 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+本地模拟站点 - 代替真实网站进行离线测试和可复现的性能测试
+按真实页面结构生成内容：
+- 故事365: /{分类}/ 与 /{分类}/index_N.html 列表页，/info/N.html 故事页
+- lovechinese: /reading/site/series/N 列表页，/reading/site/story/N 故事页
+
+可配置页数、每页故事数、响应延迟分布，以及按比例注入403和超时。
+内容由故事ID确定，多次运行结果相同。
+
+用法:
+    python mock_site.py --port 8365 --pages 20 --latency lognormal:0.05,0.5 --error-rate 0.02
+"""
+
+import argparse
+import asyncio
+import math
+import random
+import logging
+from dataclasses import dataclass, field
+from typing import Dict, Tuple
+
+from aiohttp import web
+
+logger = logging.getLogger(__name__)
+
+GUSHI_CATEGORIES = {
+    'shuiqiangushi': '睡前故事',
+    'yuyangushi': '寓言故事',
+    'tonghuagushi': '童话故事',
+}
+
+# 正文用词，避开正文过滤使用的网站关键词
+_SUBJECTS = ['小兔子', '老山羊', '小松鼠', '狐狸', '大象', '小刺猬', '老爷爷', '小姑娘', '青蛙', '小熊']
+_PLACES = ['森林里', '小河边', '山坡上', '田野中', '村子口', '大树下', '池塘旁', '草地上']
+_ACTIONS = ['找到了一颗红红的果子', '遇见了一位迷路的朋友', '盖起了一座小木屋', '种下了一排向日葵',
+            '听见了远处的歌声', '捡到了一只旧口袋', '帮助了受伤的小鸟', '看见了天边的彩虹']
+_ENDINGS = ['心里高兴极了。', '大家都笑了起来。', '从此再也不害怕了。', '觉得这一天过得真快。',
+            '决定明天再来看看。', '明白了互相帮助的道理。']
+
+
+@dataclass
+class LatencyModel:
+    """响应延迟分布
+
+    规格字符串:
+        fixed:0.05            固定延迟
+        uniform:0.02,0.2      均匀分布 [下限, 上限]
+        lognormal:0.05,0.5    对数正态分布，中位数和sigma
+        exp:0.05              指数分布，均值
+    """
+    kind: str = 'fixed'
+    params: Tuple[float, ...] = (0.0,)
+
+    @classmethod
+    def parse(cls, spec: str) -> 'LatencyModel':
+        kind, _, args = spec.partition(':')
+        params = tuple(float(value) for value in args.split(',')) if args else (0.0,)
+        model = cls(kind, params)
+        model.sample(random.Random(0))  # 尽早检查规格
+        return model
+
+    def sample(self, rng: random.Random) -> float:
+        if self.kind == 'fixed':
+            return self.params[0]
+        if self.kind == 'uniform':
+            return rng.uniform(self.params[0], self.params[1])
+        if self.kind == 'lognormal':
+            return rng.lognormvariate(math.log(self.params[0]), self.params[1])
+        if self.kind == 'exp':
+            return rng.expovariate(1 / self.params[0]) if self.params[0] > 0 else 0.0
+        raise ValueError(f"不支持的延迟分布: {self.kind}，可选: fixed, uniform, lognormal, exp")
+
+
+@dataclass
+class MockSiteConfig:
+    pages: int = 10  # 每个分类的列表页数
+    per_page: int = 20  # 每页故事数
+    paragraphs: int = 12  # 每个故事的段落数
+    latency: LatencyModel = field(default_factory=LatencyModel)
+    error_rate: float = 0.0  # 返回403的比例
+    timeout_rate: float = 0.0  # 挂起不响应的比例
+    hang_seconds: float = 30.0  # 模拟超时时挂起的时间，应大于客户端超时
+    seed: int = 0
+
+
+class MockSite:
+    def __init__(self, config: MockSiteConfig = None):
+        self.config = config or MockSiteConfig()
+        self.rng = random.Random(self.config.seed)
+        self.counts: Dict[str, int] = {}  # 响应类型 -> 次数
+
+    @property
+    def total_stories(self) -> int:
+        """每个分类的故事数"""
+        return self.config.pages * self.config.per_page
+
+    def _count(self, kind: str):
+        self.counts[kind] = self.counts.get(kind, 0) + 1
+
+    @web.middleware
+    async def _inject(self, request: web.Request, handler):
+        """按配置添加延迟、注入403和超时"""
+        await asyncio.sleep(self.config.latency.sample(self.rng))
+        roll = self.rng.random()
+        if roll < self.config.error_rate:
+            self._count('403')
+            return web.Response(status=403, text="Forbidden")
+        if roll < self.config.error_rate + self.config.timeout_rate:
+            self._count('timeout')
+            await asyncio.sleep(self.config.hang_seconds)
+        try:
+            response = await handler(request)
+        except web.HTTPException as e:
+            self._count(str(e.status))
+            raise
+        self._count(str(response.status))
+        return response
+
+    def app(self) -> web.Application:
+        app = web.Application(middlewares=[self._inject])
+        app.router.add_get('/', self.home)
+        app.router.add_get('/info/{id:\\d+}.html', self.gushi_story)
+        app.router.add_get('/reading/site/series/{n:\\d+}', self.love_list)
+        app.router.add_get('/reading/site/story/{id:\\d+}', self.love_story)
+        app.router.add_get('/{category}/', self.gushi_list)
+        app.router.add_get('/{category}/index_{n:\\d+}.html', self.gushi_list)
+        return app
+
+    # 页面内容
+
+    def _paragraphs(self, story_id: int):
+        rng = random.Random(story_id)
+        for _ in range(self.config.paragraphs):
+            sentences = [f"{rng.choice(_SUBJECTS)}在{rng.choice(_PLACES)}{rng.choice(_ACTIONS)}，{rng.choice(_ENDINGS)}"
+                         for _ in range(rng.randint(2, 4))]
+            yield ''.join(sentences)
+
+    def _title(self, story_id: int) -> str:
+        rng = random.Random(-story_id)
+        return f"{rng.choice(_SUBJECTS)}和{rng.choice(_SUBJECTS)}的第{story_id}个约定"
+
+    @staticmethod
+    def _page(title: str, body: str) -> web.Response:
+        html = f"""<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>{title}</title>
+<script>var _hmt = _hmt || [];</script><style>body{{margin:0}}</style></head>
+<body><header><div class="nav"><a href="/">首页</a> <a href="/shuiqiangushi/">睡前故事</a> <a href="/yuyangushi/">寓言故事</a></div></header>
+{body}
+<footer><p>Copyright 故事365 版权所有</p></footer></body></html>"""
+        return web.Response(text=html, content_type='text/html', charset='utf-8')
+
+    def _category_id(self, category: str) -> int:
+        return list(GUSHI_CATEGORIES).index(category) + 1
+
+    async def home(self, request: web.Request) -> web.Response:
+        links = ''.join(f'<li><a href="/{slug}/">{name}</a></li>' for slug, name in GUSHI_CATEGORIES.items())
+        return self._page("故事365", f'<div class="main"><ul>{links}</ul></div>')
+
+    async def gushi_list(self, request: web.Request) -> web.Response:
+        category = request.match_info['category']
+        page = int(request.match_info.get('n', 1))
+        if category not in GUSHI_CATEGORIES or page > self.config.pages:
+            raise web.HTTPNotFound()
+
+        first_id = self._category_id(category) * 1_000_000 + (page - 1) * self.config.per_page
+        items = ''.join(
+            f'<li><a href="/info/{story_id}.html" title="{self._title(story_id)}">{self._title(story_id)}</a></li>'
+            for story_id in range(first_id, first_id + self.config.per_page)
+        )
+
+        # 分页栏：当前页附近的页码、下一页和尾页
+        links = [f'<a href="index_{n}.html">{n}</a>'
+                 for n in range(max(2, page - 4), min(self.config.pages, page + 4) + 1)]
+        if page < self.config.pages:
+            links.append(f'<a href="index_{page + 1}.html">下一页</a>')
+            links.append(f'<a href="index_{self.config.pages}.html">尾页</a>')
+        pager = f'<div class="pages">{"".join(links)}</div>'
+        name = GUSHI_CATEGORIES[category]
+        return self._page(f"{name}_第{page}页", f'<div class="list"><h2>{name}</h2><ul>{items}</ul>{pager}</div>')
+
+    async def gushi_story(self, request: web.Request) -> web.Response:
+        story_id = int(request.match_info['id'])
+        category = list(GUSHI_CATEGORIES)[(story_id // 1_000_000 - 1) % len(GUSHI_CATEGORIES)]
+        title = self._title(story_id)
+        paragraphs = ''.join(f'<p>{text}</p>' for text in self._paragraphs(story_id))
+        body = f"""<div class="article">
+<h1>{title}</h1>
+<div class="info"><span>作者：佚名{story_id % 7}</span> <a href="/{category}/">{GUSHI_CATEGORIES[category]}</a> <span>阅读次数：{story_id % 997}</span></div>
+<div class="content">{paragraphs}</div>
+<p>故事365 收藏 分享</p>
+</div>"""
+        return self._page(f"{title} - 故事365", body)
+
+    async def love_list(self, request: web.Request) -> web.Response:
+        series = int(request.match_info['n'])
+        total = self.config.pages * self.config.per_page
+        first_id = series * 1_000_000
+        items = ''.join(
+            f'<li><a href="/reading/site/story/{story_id}">{self._title(story_id)}</a></li>'
+            for story_id in range(first_id, first_id + total)
+        )
+        return self._page(f"Series {series}", f'<div class="series"><ul>{items}</ul></div>')
+
+    async def love_story(self, request: web.Request) -> web.Response:
+        story_id = int(request.match_info['id'])
+        # 短句分行，与原站的排版相同，由爬虫合并成段落
+        lines = '<br>\n'.join(sentence + '。' for text in self._paragraphs(story_id)
+                              for sentence in text.split('。') if sentence)
+        body = f'<h1>{self._title(story_id)}</h1>\n<div class="story-content"><p>{lines}</p></div>'
+        return self._page(self._title(story_id), body)
+
+
+async def serve(site: MockSite, host: str = '127.0.0.1', port: int = 8365) -> web.AppRunner:
+    """在当前事件循环中启动模拟站点，返回runner，调用 runner.cleanup() 停止"""
+    runner = web.AppRunner(site.app(), access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, host, port).start()
+    logger.info(f"模拟站点已启动: http://{host}:{port}/")
+    return runner
+
+
+def add_arguments(arg_parser: argparse.ArgumentParser):
+    """模拟站点的命令行参数，性能测试脚本共用"""
+    arg_parser.add_argument("--pages", type=int, default=10, help="每个分类的列表页数")
+    arg_parser.add_argument("--per-page", type=int, default=20, help="每页故事数")
+    arg_parser.add_argument("--paragraphs", type=int, default=12, help="每个故事的段落数")
+    arg_parser.add_argument("--latency", default="fixed:0.02",
+                            help="延迟分布: fixed:秒 / uniform:下限,上限 / lognormal:中位数,sigma / exp:均值")
+    arg_parser.add_argument("--error-rate", type=float, default=0.0, help="返回403的比例")
+    arg_parser.add_argument("--timeout-rate", type=float, default=0.0, help="挂起不响应的比例")
+    arg_parser.add_argument("--hang-seconds", type=float, default=30.0, help="模拟超时时挂起的秒数")
+    arg_parser.add_argument("--seed", type=int, default=0, help="随机种子")
+
+
+def config_from_args(args) -> MockSiteConfig:
+    return MockSiteConfig(
+        pages=args.pages,
+        per_page=args.per_page,
+        paragraphs=args.paragraphs,
+        latency=LatencyModel.parse(args.latency),
+        error_rate=args.error_rate,
+        timeout_rate=args.timeout_rate,
+        hang_seconds=args.hang_seconds,
+        seed=args.seed,
+    )
+
+
+async def _main(args):
+    site = MockSite(config_from_args(args))
+    runner = await serve(site, args.host, args.port)
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await runner.cleanup()
+        print(f"响应统计: {site.counts}")
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="本地模拟站点")
+    arg_parser.add_argument("--host", default="127.0.0.1")
+    arg_parser.add_argument("--port", type=int, default=8365)
+    add_arguments(arg_parser)
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    try:
+        asyncio.run(_main(arg_parser.parse_args()))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,19 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+离线重新提取 - 实现在 storycrawl.reextract，这里默认按故事365站点提取
+
+用法:
+    python reextract.py page_archive stories_new --compare stories --parser lxml
+"""
+
+import os
+import sys
+
+# 共用模块在仓库根目录的 storycrawl 包中
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from storycrawl.reextract import main
+
+if __name__ == "__main__":
+    main(default_site="gushi365")
@@ -2,13 +2,16 @@
 # -*- coding: utf-8 -*-
 """
 测试异步爬虫功能 - 只爬取少量故事进行测试
+加 --local 参数时在本地模拟站点上测试，不访问真实网站
 """
 
 import asyncio
+import sys
 import time
 from main_spider import OptimizedGushi365Spider
+from mock_site import MockSite, serve
 
-async def test_spider():
+async def test_spider(base_url="https://www.gushi365.com"):
     print("开始测试故事365异步爬虫...")
     
     spider_config = {
@@ -19,13 +22,15 @@ async def test_spider():
     total_count = 0
     start_time = time.time()
     
-    async with OptimizedGushi365Spider(**spider_config) as spider:
+    spider = OptimizedGushi365Spider(**spider_config)
+    spider.base_url = base_url
+    async with spider:
         
         # 测试睡前故事（只爬取1页，最多3个故事）
         print("\n测试睡前故事...")
         try:
             count1 = await spider.crawl_category(
-                "https://www.gushi365.com/shuiqiangushi/", 
+                f"{base_url}/shuiqiangushi/", 
                 max_pages=1, 
                 max_stories=3,
                 stories_dir="test_stories_睡前故事"
@@ -40,7 +45,7 @@ async def test_spider():
         print("\n测试寓言故事...")
         try:
             count2 = await spider.crawl_category(
-                "https://www.gushi365.com/yuyangushi/", 
+                f"{base_url}/yuyangushi/", 
                 max_pages=1, 
                 max_stories=3,
                 stories_dir="test_stories_寓言故事"
@@ -72,9 +77,17 @@ async def test_spider():
             if len(files) > 3:
                 print(f"  - ... 还有 {len(files)-3} 个文件")
 
+async def test_spider_local():
+    """在本地模拟站点上测试"""
+    runner = await serve(MockSite(), port=8365)
+    try:
+        await test_spider("http://127.0.0.1:8365")
+    finally:
+        await runner.cleanup()
+
 if __name__ == "__main__":
     try:
-        asyncio.run(test_spider())
+        asyncio.run(test_spider_local() if "--local" in sys.argv else test_spider())
     except KeyboardInterrupt:
         print("\n测试被用户中断")
     except Exception as e:
@@ -0,0 +1,10 @@
+# -*- coding: utf-8 -*-
+"""
+两个爬虫目录（spider01、spider02）共用的模块
+- 获取和调度：crawl_engine、site_adapter、rate_limiter、retry_policy、adaptive_concurrency、response_stream
+- 存储：output_sink、story_manifest、crawl_state、page_archive、http_cache
+- 观测：metrics、profiling
+- 站点相关的提取：gushi365、lovechinese 子包
+
+爬虫目录中的脚本把仓库根目录加入 sys.path 后导入本包。
+"""
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+AIMD自适应并发控制
+响应正常时并发上限加性增加，遇到403、超时或p95延迟明显上升时乘性减少。
+可直接替代asyncio.Semaphore使用（async with）。
+"""
+
+import asyncio
+import logging
+from collections import deque
+from typing import Callable, Deque, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class AdaptiveConcurrency:
+    def __init__(self, initial: int, min_limit: int = 1, max_limit: int = 64,
+                 increase: int = 1, decrease: float = 0.5, window: int = 20,
+                 latency_tolerance: float = 2.0,
+                 on_change: Optional[Callable[[int], None]] = None):
+        """
+        initial: 初始并发上限
+        increase: 每轮正常响应后增加的并发数
+        decrease: 出现拥塞信号时的缩减系数
+        window: 计算p95延迟的样本数
+        latency_tolerance: p95超过基线的倍数时视为拥塞
+        on_change: 并发上限变化时的回调，参数为新的上限
+        """
+        if not 0 < decrease < 1:
+            raise ValueError("decrease必须在0和1之间")
+
+        self.min_limit = max(1, min_limit)
+        self.max_limit = max(self.min_limit, max_limit)
+        self.limit = min(max(initial, self.min_limit), self.max_limit)
+        self.increase = increase
+        self.decrease = decrease
+        self.latency_tolerance = latency_tolerance
+        self.on_change = on_change
+
+        self.in_flight = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+        self.latencies: Deque[float] = deque(maxlen=window)
+        self.baseline_p95: Optional[float] = None
+        self._healthy = 0  # 上次调整后的正常响应数
+        self._stale = 0  # 缩减前已发出、尚未完成的请求数
+
+    async def __aenter__(self):
+        await self.acquire()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        self.release()
+
+    async def acquire(self):
+        """占用一个并发名额，达到上限时等待"""
+        if self.in_flight < self.limit and not self._waiters:
+            self.in_flight += 1
+            return
+
+        future = asyncio.get_running_loop().create_future()
+        self._waiters.append(future)
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # 已分到名额但被取消，转交给下一个等待者
+                self.release()
+            else:
+                self._waiters.remove(future)
+            raise
+
+    def release(self):
+        """释放一个并发名额"""
+        self.in_flight -= 1
+        self._wake()
+
+    def _wake(self):
+        while self._waiters and self.in_flight < self.limit:
+            future = self._waiters.popleft()
+            if not future.done():
+                self.in_flight += 1
+                future.set_result(None)
+
+    def p95(self) -> Optional[float]:
+        """最近窗口内的p95延迟"""
+        if not self.latencies:
+            return None
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+
+    def record_success(self, latency: float):
+        """记录一次正常响应及其延迟（在释放并发名额之后调用）"""
+        if self._stale:
+            self._stale -= 1
+        self.latencies.append(latency)
+        self._healthy += 1
+        # 每完成一轮（约等于当前并发上限个请求）调整一次
+        if self._healthy < self.limit or len(self.latencies) < self.latencies.maxlen:
+            return
+
+        p95 = self.p95()
+        if self.baseline_p95 is None:
+            self.baseline_p95 = p95
+        elif p95 > self.baseline_p95 * self.latency_tolerance:
+            self._decrease(f"p95延迟上升 {p95:.2f}s (基线 {self.baseline_p95:.2f}s)")
+            # 基线向新延迟靠拢：缩减后延迟仍高时视为站点整体变慢，避免一直缩到最小值
+            self.baseline_p95 = (self.baseline_p95 * p95) ** 0.5
+            return
+        else:
+            # 基线缓慢跟随，适应站点在不同时段的正常延迟
+            self.baseline_p95 = 0.9 * self.baseline_p95 + 0.1 * p95
+
+        self._set_limit(self.limit + self.increase, f"响应正常，p95 {p95:.2f}s")
+
+    def record_failure(self, cause: str):
+        """记录一次拥塞信号（403、超时等，在释放并发名额之后调用）"""
+        if self._stale:
+            # 缩减前发出的请求，属于同一波拥塞，不再重复缩减
+            self._stale -= 1
+            logger.debug(f"忽略缩减前请求的拥塞信号: {cause}")
+            return
+        self._decrease(cause)
+
+    def _decrease(self, reason: str):
+        self._stale = self.in_flight
+        self.latencies.clear()
+        self._set_limit(int(self.limit * self.decrease), reason)
+
+    def _set_limit(self, limit: int, reason: str):
+        limit = min(max(limit, self.min_limit), self.max_limit)
+        self._healthy = 0
+        if limit == self.limit:
+            logger.debug(f"并发保持 {limit}: {reason}")
+            return
+
+        logger.info(f"并发调整 {self.limit} -> {limit}: {reason}")
+        self.limit = limit
+        self._wake()
+        if self.on_change:
+            self.on_change(limit)
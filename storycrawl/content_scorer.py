@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+正文区域打分 - 一次后序遍历
+按文档顺序接收 start / text / end 事件，元素结束时把它的统计合并到父元素，
+每个元素的文本长度、标点数、链接文字长度和是否包含关键词都在同一次遍历中得到，
+不再对每个div分别get_text（嵌套很深的页面上是 深度 × 文本长度）。
+统计按 get_text(strip=True) 的文本计算：每个文本节点去掉首尾空白后直接拼接。
+"""
+
+from typing import List, Optional, Sequence
+
+# 故事正文的特征标点
+CONTENT_PUNCT = ('。', '，', '！', '？')
+
+
+class NodeScore:
+    """单个元素的文本统计"""
+    __slots__ = ('node', 'length', 'punct', 'link_length', 'keyword', 'head', 'tail')
+
+    def __init__(self, node):
+        self.node = node
+        self.length = 0  # 文本长度
+        self.punct = 0  # 正文标点个数
+        self.link_length = 0  # 链接文字长度
+        self.keyword = False  # 文本是否包含关键词
+        # 文本开头和结尾的若干字符，用于发现跨越文本节点的关键词
+        self.head = ''
+        self.tail = ''
+
+    @property
+    def link_density(self) -> float:
+        """链接文字占全部文本的比例"""
+        return self.link_length / self.length if self.length else 0.0
+
+    @property
+    def score(self) -> float:
+        """正文得分：标点数按非链接文字的比例折算，链接列表的得分低于同样标点数的正文"""
+        return self.punct * (1.0 - self.link_density)
+
+
+class TextScorer:
+    """按文档顺序接收事件，后序合并各元素的统计
+
+    tags: 需要返回统计的元素；keywords: 判断文本是否包含其中任一关键词
+    """
+
+    def __init__(self, tags: Sequence[str] = ('div',), keywords: Sequence[str] = ()):
+        self.tags = frozenset(tags)
+        self.keywords = tuple(keywords)
+        # 跨越拼接点的关键词一定落在两侧各 (最长关键词 - 1) 个字符之内
+        self.edge = max(map(len, self.keywords), default=1) - 1
+        self.scores: List[NodeScore] = []
+        self._stack: List[NodeScore] = [NodeScore(None)]
+        self._tags: List[str] = []
+
+    def _has_keyword(self, text: str) -> bool:
+        return any(keyword in text for keyword in self.keywords)
+
+    def _append(self, score: NodeScore, length: int, keyword: bool, head: str, tail: str):
+        """在score的文本之后拼接一段文本（文本节点或子元素）"""
+        if self.keywords:
+            if not score.keyword:
+                score.keyword = keyword or self._has_keyword(score.tail + head)
+            edge = self.edge
+            if edge:
+                if score.length < edge:
+                    score.head = (score.head + head)[:edge]
+                score.tail = tail if length >= edge else (score.tail + tail)[-edge:]
+        score.length += length
+
+    def start(self, node, tag: str):
+        """元素开始"""
+        score = NodeScore(node)
+        if tag in self.tags:
+            self.scores.append(score)
+        self._stack.append(score)
+        self._tags.append(tag)
+
+    def text(self, text: str):
+        """文本节点"""
+        text = text.strip()
+        if not text:
+            return
+        score = self._stack[-1]
+        score.punct += sum(text.count(punct) for punct in CONTENT_PUNCT)
+        if self.keywords:
+            edge = self.edge
+            self._append(score, len(text), self._has_keyword(text), text[:edge], text[-edge:] if edge else '')
+        else:
+            score.length += len(text)
+
+    def end(self):
+        """元素结束，统计合并到父元素"""
+        child = self._stack.pop()
+        if self._tags.pop() == 'a':
+            child.link_length = child.length
+        parent = self._stack[-1]
+        parent.punct += child.punct
+        parent.link_length += child.link_length
+        if child.length:
+            self._append(parent, child.length, child.keyword, child.head, child.tail)
+
+
+def best_node(scores: Sequence[NodeScore], min_length: int = 0,
+              skip_keyword: bool = False) -> Optional[NodeScore]:
+    """得分最高的元素（同分取文档中靠前的），没有得分大于0的元素时返回None"""
+    best = None
+    best_score = 0.0
+    for score in scores:
+        if score.length < min_length or (skip_keyword and score.keyword):
+            continue
+        if score.score > best_score:
+            best_score = score.score
+            best = score
+    return best
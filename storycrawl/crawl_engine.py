@@ -0,0 +1,975 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+爬取引擎 - 所有站点共用的获取、调度、缓存和写入
+网站相关的部分由站点适配器（site_adapter）提供，引擎负责：
+- 一个aiohttp连接池，按主机分别限制并发和速率，一个站点变慢或被拒绝不影响其他站点
+- 持久化HTTP缓存、原始页面归档和运行指标（带host标签）
+- 列表页发现、故事去重，获取、解析、写入输出后端的流水线，可选爬取状态和流式解析
+- 多个站点的任务并发执行，单个任务失败不影响其他任务
+
+OptimizedGushi365Spider、Gushi365Spider、StorySpider 和 AsyncStorySpider 都是在引擎上
+运行一个 CrawlJob 的薄封装。
+
+用法:
+    python -m storycrawl.crawl_engine gushi365=https://www.gushi365.com/shuiqiangushi/ \
+        lovechinese=https://www.lovechinese.org/reading/site/series/6 --max-pages 3
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import time
+from contextlib import nullcontext
+from dataclasses import dataclass, field
+from functools import partial
+from typing import AsyncIterator, Callable, Dict, List, Optional, Set, Tuple
+from urllib.parse import urlparse
+
+import aiohttp
+
+from .adaptive_concurrency import AdaptiveConcurrency
+from .crawl_state import CrawlState, FETCHED, PARSED, SAVED, FAILED, DUPLICATE, JOB_DISCOVERED, JOB_FINISHED
+from .http_cache import HttpCache
+from .metrics import Metrics, MetricsExporter
+from .output_sink import SINKS
+from .page_archive import PageArchive
+from .parse_executor import ParseExecutor
+from .profiling import create_profiler
+from .rate_limiter import HostRateLimiter
+from .response_stream import (ResponseRejected, IncrementalHtmlParser, DEFAULT_MAX_PAGE_BYTES,
+                              check_response, iter_body)
+from .retry_policy import RetryPolicy, HostCircuitBreakers, parse_retry_after
+from .site_adapter import SiteAdapter, ADAPTERS, get_adapter, adapter_for_url
+from .gushi365.story_parser import StoryInfo, ListPage
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()  # 流水线阶段的结束标记
+
+# 增强的请求头 - 模拟真实浏览器
+BROWSER_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8,application/signed-exchange;v=b3;q=0.7',
+    'Accept-Language': 'zh-CN,zh;q=0.9,en;q=0.8,en-GB;q=0.7,en-US;q=0.6',
+    'Accept-Encoding': 'gzip, deflate, br',
+    'DNT': '1',
+    'Connection': 'keep-alive',
+    'Upgrade-Insecure-Requests': '1',
+    'Sec-Fetch-Dest': 'document',
+    'Sec-Fetch-Mode': 'navigate',
+    'Sec-Fetch-Site': 'none',
+    'Sec-Fetch-User': '?1',
+    'Cache-Control': 'max-age=0',
+    'sec-ch-ua': '"Not_A Brand";v="8", "Chromium";v="120", "Google Chrome";v="120"',
+    'sec-ch-ua-mobile': '?0',
+    'sec-ch-ua-platform': '"macOS"'
+}
+
+
+@dataclass
+class CrawlJob:
+    """一个站点的一次爬取：从start_url开始的列表页及其中的故事"""
+    adapter: SiteAdapter
+    start_url: str
+    output_dir: str = "stories"
+    max_pages: Optional[int] = None
+    max_stories: Optional[int] = None
+    warmup: bool = True  # 开始前访问适配器的预热页面
+
+    @property
+    def host(self) -> str:
+        return urlparse(self.start_url).netloc
+
+
+@dataclass
+class JobResult:
+    """一个任务的结果"""
+    saved: int = 0  # 本次保存的故事数
+    discovered: int = 0  # 本次需要处理的故事数
+    skipped: int = 0  # 之前已保存，或正文与已保存的故事相同而跳过的故事数
+    already_saved: int = 0  # 其中获取后才发现已保存或正文重复的故事数
+    # 适配器有summary_name时的汇总信息：text格式为全部已保存故事（含之前保存的），其他格式为本次保存的故事
+    stories: List[dict] = field(default_factory=list)
+
+
+class StoryOutput:
+    """一个保存目录的输出：输出后端和已保存故事清单"""
+
+    def __init__(self, adapter: SiteAdapter, stories_dir: str, output_format: str,
+                 output_options: Optional[dict] = None):
+        self.stories_dir = stories_dir
+        self.manifest = adapter.create_manifest(stories_dir)
+        self.sink = adapter.create_sink(output_format, stories_dir, output_options)
+        # 落盘后回调 listener(已落盘的 (记录, 文件名))，任务据此统计保存结果
+        self.listeners: List[Callable[[list], None]] = []
+
+    def saved_as(self, record: dict) -> Optional[str]:
+        """故事已保存时返回已保存的故事ID（正文相同的其他故事），否则返回None"""
+        if record['id'] in self.manifest or self.sink.exists(record):
+            return record['id']
+        return self.manifest.find_content(record['content'])
+
+    def register(self, committed) -> list:
+        """已落盘的故事登记到清单"""
+        for record, filename in committed:
+            self.manifest.add(record['id'], filename, record['content'], record['url'])
+            logger.info(f"保存成功: {record['id']} -> {filename}")
+        for listener in self.listeners:
+            listener(committed)
+        return committed
+
+    def close(self) -> list:
+        committed = self.register(self.sink.close())
+        self.manifest.close()
+        return committed
+
+
+class CrawlEngine:
+    def __init__(self, per_host_concurrency: int = 8, request_delay: float = 0.8,
+                 requests_per_second: Optional[float] = None, burst: Optional[int] = None,
+                 max_connections: int = 30, cache_path: Optional[str] = None,
+                 cache_max_bytes: int = 512 * 1024 * 1024, parse_mode: str = 'inline',
+                 parse_workers: Optional[int] = None, save_concurrency: int = 4, output_format: str = 'text',
+                 output_options: Optional[dict] = None, archive_path: Optional[str] = None,
+                 metrics_dir: Optional[str] = None, metrics_interval: float = 30.0,
+                 run_id: Optional[str] = None, retry_policy: Optional[RetryPolicy] = None,
+                 circuit_breaker=True, max_page_bytes: Optional[int] = DEFAULT_MAX_PAGE_BYTES,
+                 adaptive_concurrency: bool = False, adaptive_max_concurrent: Optional[int] = None,
+                 state_path: Optional[str] = None, resume: bool = False, profile=None,
+                 profile_dir: str = 'profiles', stream_parse: bool = False, stop_after_content: bool = False):
+        """per_host_concurrency和requests_per_second都按主机计算；未指定速率时
+        按 per_host_concurrency / request_delay 换算，request_delay为0时不限速
+
+        会话、缓存、归档、爬取状态、指标导出和性能剖析在进入上下文时打开、退出时关闭，
+        同一个引擎可以多次进入
+        """
+        self.per_host_concurrency = per_host_concurrency
+        self.max_connections = max_connections
+        self.max_page_bytes = max_page_bytes  # 不是HTML或超过该大小的响应直接放弃
+        # 速率由并发数换算而来时，自适应并发调整上限的同时调整该主机的速率
+        self.derived_rate = requests_per_second is None and request_delay > 0
+        self.request_delay = request_delay
+        if self.derived_rate:
+            requests_per_second = per_host_concurrency / request_delay
+        self.rate_limiter = HostRateLimiter(requests_per_second, burst or per_host_concurrency)
+        # 自适应并发：每个主机以per_host_concurrency为起点，按403/超时/延迟在[1, 上限]内调整
+        self.adaptive_max_concurrent = None
+        if adaptive_concurrency:
+            self.adaptive_max_concurrent = adaptive_max_concurrent or per_host_concurrency * 4
+
+        if output_format not in SINKS:
+            raise ValueError(f"不支持的输出格式: {output_format}，可选: {', '.join(SINKS)}")
+        self.output_format = output_format
+        self.output_options = output_options
+
+        self.cache_path = cache_path
+        self.cache_max_bytes = cache_max_bytes
+        self.archive_path = archive_path
+        self.state_path = state_path
+        self.resume = resume
+        self.metrics = Metrics(run_id)
+        self.metrics_dir = metrics_dir
+        self.metrics_interval = metrics_interval
+        self.retry_policy = retry_policy or RetryPolicy()
+        # 按主机熔断，一个站点被封锁时只暂停该站点；circuit_breaker可以是熔断器参数的dict，False关闭
+        self.breakers = None
+        if circuit_breaker:
+            options = circuit_breaker if isinstance(circuit_breaker, dict) else {}
+            self.breakers = HostCircuitBreakers(
+                on_change=lambda host, state: self.metrics.inc('circuit_breaker', host=host, state=state),
+                **options
+            )
+        self.parse_executor = ParseExecutor(parse_mode, parse_workers)
+        self.save_concurrency = save_concurrency  # 每个任务的保存协程数，落盘期间其他协程继续写入缓冲
+        self.profile = profile
+        self.profile_dir = profile_dir
+        # 流式解析：支持的站点（streamable且使用lxml）详情页边接收边增量解析；
+        # stop_after_content时看到正文容器结束即停止读取
+        self.stream_parse = stream_parse or stop_after_content
+        self.stop_after_content = stop_after_content
+        self.headers = dict(BROWSER_HEADERS)
+        self.coalesced_count = 0  # 被合并的重复请求数
+        self.missing_field_hosts: Set[str] = set()  # 已警告过提前结束解析缺少字段的主机
+
+        # 以下在进入上下文时创建
+        self.session = None
+        self.semaphores: Dict[str, object] = {}  # 主机 -> 同时进行的请求数
+        # 正在进行中的请求，相同URL共享结果：
+        # (页面内容, 流式获取没有保留页面时已解析的数据, 该数据是否为完整页面)
+        self.inflight: Dict[str, asyncio.Future] = {}
+        self.warmed: Set[str] = set()  # 已预热的主机
+        self.outputs: Dict[str, StoryOutput] = {}  # 保存目录 -> 输出
+        self.http_cache = None
+        self.archive = None
+        self.state = None
+        self.metrics_exporter = None
+        self.profiler = None
+        self.run_started = time.time()
+
+    async def __aenter__(self):
+        self.parse_executor.start()
+        self.semaphores = {}
+        self.inflight = {}
+        self.warmed = set()
+        self.outputs = {}
+        self.run_started = time.time()
+        self.http_cache = HttpCache(self.cache_path, self.cache_max_bytes) if self.cache_path else None
+        self.archive = PageArchive(self.archive_path) if self.archive_path else None
+        # 爬取状态：指定state_path时记录每个故事的进度，resume=True时从上次中断处继续
+        self.state = CrawlState(self.state_path) if self.state_path else None
+        connector = aiohttp.TCPConnector(
+            limit=self.max_connections,
+            # 自适应并发时不低于并发上限
+            limit_per_host=max(self.per_host_concurrency, self.adaptive_max_concurrent or 0),
+            ttl_dns_cache=300,
+            keepalive_timeout=30,
+            enable_cleanup_closed=True
+        )
+        self.session = aiohttp.ClientSession(
+            connector=connector,
+            timeout=aiohttp.ClientTimeout(total=15, connect=8, sock_read=8),
+            headers=self.headers,
+            trace_configs=[self._trace_config()]
+        )
+        if self.metrics_dir:
+            self.metrics_exporter = MetricsExporter(self.metrics, self.metrics_dir, self.metrics_interval)
+            self.metrics_exporter.start()
+        # 性能剖析：profile为True或 'cpu,stack,memory' 中的若干项时按阶段剖析，结果写入profile_dir
+        self.profiler = create_profiler(self.profile, self.profile_dir, self.metrics.run_id)
+        if self.profiler and self.parse_executor.mode == 'process':
+            logger.warning("进程池模式下HTML解析在子进程中执行，不在CPU/内存剖析范围内；"
+                           "剖析解析阶段请使用 parse_mode='inline' 或 'thread'")
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        for output in self.outputs.values():
+            output.close()
+        self.outputs = {}
+        if self.session:
+            await self.session.close()
+            self.session = None
+        if self.http_cache:
+            self.http_cache.close()
+            self.http_cache = None
+        if self.archive is not None:
+            self.archive.close()
+            self.archive = None
+        if self.state:
+            self.state.close()
+            self.state = None
+        self.parse_executor.shutdown()
+        logger.info(f"运行指标 ({self.metrics.run_id}):\n{self.metrics.summary()}")
+        if self.metrics_exporter:
+            self.metrics_exporter.stop()
+            self.metrics_exporter = None
+        if self.profiler:
+            self.profiler.stop()
+            self.profiler = None
+
+    def _trace_config(self) -> aiohttp.TraceConfig:
+        """统计DNS解析和建立连接的耗时，以及连接复用次数"""
+        trace_config = aiohttp.TraceConfig()
+
+        async def on_dns_start(session, context, params):
+            context.dns_started = time.perf_counter()
+
+        async def on_dns_end(session, context, params):
+            self.metrics.stage('dns', time.perf_counter() - context.dns_started)
+
+        async def on_connect_start(session, context, params):
+            context.connect_started = time.perf_counter()
+
+        async def on_connect_end(session, context, params):
+            self.metrics.stage('connect', time.perf_counter() - context.connect_started)
+            self.metrics.inc('connections', result='new')
+
+        async def on_connection_reuse(session, context, params):
+            self.metrics.inc('connections', result='reused')
+
+        trace_config.on_dns_resolvehost_start.append(on_dns_start)
+        trace_config.on_dns_resolvehost_end.append(on_dns_end)
+        trace_config.on_connection_create_start.append(on_connect_start)
+        trace_config.on_connection_create_end.append(on_connect_end)
+        trace_config.on_connection_reuseconn.append(on_connection_reuse)
+        return trace_config
+
+    def _semaphore(self, url: str):
+        """URL所属主机的并发限制：固定的信号量，或自适应并发控制器"""
+        host = urlparse(url).netloc
+        semaphore = self.semaphores.get(host)
+        if semaphore is None:
+            if self.adaptive_max_concurrent:
+                on_change = None
+                if self.derived_rate:
+                    on_change = lambda limit: self.rate_limiter.set_rate(limit / self.request_delay, url)
+                semaphore = AdaptiveConcurrency(self.per_host_concurrency, max_limit=self.adaptive_max_concurrent,
+                                                on_change=on_change)
+            else:
+                semaphore = asyncio.Semaphore(self.per_host_concurrency)
+            self.semaphores[host] = semaphore
+        return semaphore
+
+    def profile_stage(self, stage: str):
+        """启用性能剖析时剖析代码块，否则什么也不做"""
+        return self.profiler.stage(stage) if self.profiler else nullcontext()
+
+    async def warmup(self, adapter: SiteAdapter):
+        """访问适配器的预热页面建立会话，每个主机在一次会话中只预热一次"""
+        if adapter.host in self.warmed:
+            return
+        self.warmed.add(adapter.host)
+        urls = adapter.warmup_urls()
+        if not urls:
+            return
+        logger.info(f"[{adapter.name}] 预热会话，访问主页...")
+        for url in urls:
+            if await self.fetch(url, adapter) is None:
+                logger.warning(f"[{adapter.name}] 会话预热失败，但继续执行: {url}")
+        if adapter.warmup_delay:
+            await asyncio.sleep(adapter.warmup_delay)
+        logger.info(f"[{adapter.name}] 会话预热完成")
+
+    async def fetch(self, url: str, adapter: SiteAdapter, max_attempts: Optional[int] = None,
+                    stream: Optional[IncrementalHtmlParser] = None) -> Optional[str]:
+        """获取页面，同一URL的并发请求只发起一次网络请求；失败时返回None
+
+        指定stream时正文到达即交给增量解析器，解析器提前结束且不需要缓存和归档时
+        不再读取剩余正文，返回空字符串。合并到这种请求的流式获取把同样的数据交给自己的
+        解析器，得到相同的树；需要完整页面而请求提前结束时重新获取
+        """
+        # 已有相同URL的请求在进行中，等待其结果
+        inflight = self.inflight.get(url)
+        if inflight is not None:
+            content, data, complete = await asyncio.shield(inflight)
+            if data is not None:
+                if stream is not None:
+                    stream.feed(data)
+                elif complete:
+                    content = adapter.decode(data)
+                else:
+                    logger.debug(f"进行中的流式请求提前结束，重新获取: {url}")
+                    return await self.fetch(url, adapter, max_attempts)
+            self.coalesced_count += 1
+            self.metrics.inc('coalesced_requests', host=urlparse(url).netloc)
+            logger.debug(f"合并重复请求: {url}")
+            return content
+
+        future = asyncio.get_running_loop().create_future()
+        self.inflight[url] = future
+        content = data = None
+        try:
+            content = await self._fetch(url, adapter, max_attempts, stream)
+            if content == "" and stream is not None and stream.fed:
+                data = b''.join(stream.chunks)
+            return content
+        finally:
+            del self.inflight[url]
+            future.set_result((content, data, stream is not None and stream.stopped_at is None))
+
+    async def _fetch(self, url: str, adapter: SiteAdapter, max_attempts: Optional[int] = None,
+                     stream: Optional[IncrementalHtmlParser] = None) -> Optional[str]:
+        """获取页面，按重试策略重试；404等不可重试的状态码直接失败"""
+        host = urlparse(url).netloc
+        cached = self.http_cache.get(url) if self.http_cache else None
+        if cached and cached.validated_at >= self.run_started:
+            # 本次运行中已验证过的页面直接使用
+            self.metrics.inc('cache_requests', result='hit', host=host)
+            return cached.body
+
+        headers = adapter.headers(url)
+        if cached:
+            # 有旧缓存时发送条件请求
+            headers.update(cached.conditional_headers())
+
+        max_attempts = max_attempts or self.retry_policy.max_attempts
+        delay = 0.0
+        cause = ""
+        blocked = []  # 本次请求被拒绝的结果，重试后成功时不计入熔断
+        for attempt in range(max_attempts):
+            # 主机被熔断时等待冷却结束，只影响该主机的任务
+            breaker = await self.breakers.wait(url) if self.breakers else None
+            await self.rate_limiter.acquire(url)
+            if stream is not None:
+                # 丢弃上一次尝试中已解析的部分
+                stream.reset()
+            semaphore = self._semaphore(url)
+            status = body = retry_after = None
+            content = None
+            try:
+                async with semaphore:
+                    started = time.monotonic()
+                    async with self.session.get(url, headers=headers) as response:
+                        status = response.status
+                        self.metrics.inc('http_responses', status=status, host=host)
+                        if status == 304 and cached:
+                            # 页面未修改，沿用缓存内容
+                            self.metrics.stage('fetch', time.monotonic() - started)
+                            self.metrics.inc('cache_requests', result='revalidated', host=host)
+                            self.http_cache.mark_validated(url)
+                            content = cached.body
+                            if self.archive is not None and url not in self.archive:
+                                self.archive.write(url, 200, content.encode('utf-8'), dict(response.headers))
+                        elif status == 200:
+                            body = await self._read_body(response, host, stream)
+                            self.metrics.stage('fetch', time.monotonic() - started - (stream.seconds if stream else 0))
+                            self.metrics.inc('cache_requests', result='miss', host=host)
+                            response_headers = response.headers.copy()  # 保持大小写不敏感，服务器可能返回 Etag
+                            # 正文在释放并发名额后解码；增量解析已完成、剩余正文不再读取时为空
+                            content = ""
+                        else:
+                            cause = f"http_{status}"
+                            retry_after = parse_retry_after(response.headers.get('Retry-After'))
+            except ResponseRejected as e:
+                # 不是HTML或页面过大，重试也不会成功
+                logger.warning(f"放弃响应: {url} - {e}")
+                self.metrics.inc('rejected_responses', cause=e.cause, host=host)
+                if breaker:
+                    breaker.record(status)
+                cause = e.cause
+                break
+            except asyncio.TimeoutError:
+                cause = "timeout"
+                if isinstance(semaphore, AdaptiveConcurrency):
+                    semaphore.record_failure("请求超时")
+            except aiohttp.ClientError as e:
+                logger.debug(f"请求失败: {url} - {e!r}")
+                cause = "error"
+            if breaker:
+                blocked.append(breaker.record(status, retry_after))
+            if isinstance(semaphore, AdaptiveConcurrency):
+                # 释放并发名额后再反馈给控制器
+                if content is not None:
+                    semaphore.record_success(time.monotonic() - started)
+                elif status == 403:
+                    semaphore.record_failure("HTTP 403")
+
+            if body is not None:
+                with self.metrics.time('decode'):
+                    content = adapter.decode(body)
+                if self.archive is not None:
+                    self.archive.write(url, 200, body, response_headers)
+                if self.http_cache:
+                    self.http_cache.put(url, content, etag=response_headers.get('ETag'),
+                                        last_modified=response_headers.get('Last-Modified'))
+            if content is not None:
+                if breaker:
+                    breaker.forgive(blocked)
+                return content
+
+            if status is not None and not self.retry_policy.is_retryable(status):
+                logger.warning(f"HTTP {status}，不再重试: {url}")
+                break
+            logger.warning(f"获取页面失败 ({cause}, 尝试 {attempt + 1}/{max_attempts}): {url}")
+            if attempt < max_attempts - 1:
+                self.metrics.inc('retries', cause=cause, host=host)
+                # 去相关抖动退避，服务器给出Retry-After时至少等待该时长；等待期间不占用并发名额
+                delay = self.retry_policy.next_delay(delay, retry_after)
+                await asyncio.sleep(delay)
+
+        self.metrics.inc('fetch_failures', cause=cause, host=host)
+        return None
+
+    async def _read_body(self, response: aiohttp.ClientResponse, host: str,
+                         stream: Optional[IncrementalHtmlParser] = None) -> Optional[bytes]:
+        """分块读取正文，超过max_page_bytes时放弃；指定stream时同时增量解析，
+        解析器提前结束且不需要缓存和归档时返回None"""
+        check_response(response, self.max_page_bytes)
+        keep_body = stream is None or self.archive is not None or self.http_cache is not None
+        if stream is not None:
+            # 正文只保留一份：需要缓存或归档时由这里保留，否则由增量解析器保留到停止处
+            stream.keep_chunks = not keep_body
+        chunks = []
+        received = 0
+        async for chunk in iter_body(response, self.max_page_bytes):
+            received += len(chunk)
+            if keep_body:
+                chunks.append(chunk)
+            if stream is not None and stream.feed(chunk) and not keep_body:
+                self.metrics.inc('bytes_received', received, host=host)
+                self.metrics.inc('stream_stopped_early', host=host)
+                return None
+        self.metrics.inc('bytes_received', received, host=host)
+        return b''.join(chunks) if keep_body else None
+
+    async def _parse(self, stage: str, adapter: SiteAdapter, func, *args):
+        """在解析执行器中运行适配器的解析方法；启用性能剖析时在执行的线程内剖析该阶段，
+        不能在子进程中运行的适配器直接解析"""
+        if self.parse_executor.mode == 'process':
+            if not adapter.process_safe:
+                return func(*args)
+            return await self.parse_executor.run(func, *args)
+        if self.profiler:
+            return await self.parse_executor.run(self.profiler.run, stage, func, *args)
+        return await self.parse_executor.run(func, *args)
+
+    async def list_page(self, adapter: SiteAdapter, url: str, page: int) -> Optional[ListPage]:
+        """获取并解析一个列表页，没有故事时返回None"""
+        try:
+            html = await self.fetch(url, adapter)
+            if not html:
+                return None
+            with self.metrics.time('list_parse'):
+                list_page = await self._parse('list_parse', adapter, adapter.parse_list,
+                                              html.encode('utf-8'), url, page)
+        except Exception as e:
+            logger.error(f"[{adapter.name}] 解析第{page}页失败: {e!r}")
+            return None
+        return list_page if list_page.stories else None
+
+    async def _list_page(self, job: CrawlJob, page: int) -> Optional[ListPage]:
+        url = job.adapter.page_url(job.start_url, page)
+        if url is None:
+            return None
+        return await self.list_page(job.adapter, url, page)
+
+    async def iter_list_pages(self, job: CrawlJob) -> AsyncIterator[ListPage]:
+        """按页码顺序产出列表页
+
+        先获取第1页并从分页栏读取总页数，其余页面并发获取；
+        分页栏没有页码时，按并发数为窗口逐批探测，遇到第一个空页停止。
+        每页获取完成后立即产出，不必等待同批次的后续页面。
+        """
+        name = job.adapter.name
+        first_page = await self._list_page(job, 1)
+        if not first_page:
+            logger.info(f"[{name}] 第1页没有找到故事")
+            return
+        logger.info(f"[{name}] 第1页找到 {len(first_page.stories)} 个故事")
+        yield first_page
+
+        fetched = 1
+        last_page = first_page.last_page
+        probing = last_page == 0
+        if last_page > 1:
+            logger.info(f"[{name}] 分页栏显示共 {last_page} 页")
+        while True:
+            end = fetched + max(1, self.per_host_concurrency) if probing else last_page
+            if job.max_pages:
+                end = min(end, job.max_pages)
+            if end <= fetched or job.adapter.page_url(job.start_url, fetched + 1) is None:
+                return
+
+            pages = range(fetched + 1, end + 1)
+            tasks = [asyncio.ensure_future(self._list_page(job, page)) for page in pages]
+            try:
+                for page, task in zip(pages, tasks):
+                    list_page = await task
+                    if not list_page:
+                        if probing:
+                            logger.info(f"[{name}] 第{page}页为空，分页结束")
+                            return
+                        logger.warning(f"[{name}] 第{page}页没有获取到故事")
+                        continue
+                    logger.info(f"[{name}] 第{page}页找到 {len(list_page.stories)} 个故事")
+                    # 分页栏只显示部分页码时，随着翻页更新总页数
+                    if not probing:
+                        last_page = max(last_page, list_page.last_page)
+                    yield list_page
+            finally:
+                # 提前结束时取消尚未完成的页面请求
+                for task in tasks:
+                    task.cancel()
+            fetched = end
+
+    def _stream(self, adapter: SiteAdapter) -> Optional[IncrementalHtmlParser]:
+        """该站点详情页使用流式解析时的增量解析器"""
+        if not (self.stream_parse and adapter.streamable and adapter.parser == 'lxml'):
+            return None
+        return IncrementalHtmlParser(adapter.content_end if self.stop_after_content else None)
+
+    async def story(self, adapter: SiteAdapter, story: StoryInfo,
+                    mark: Optional[Callable[..., None]] = None) -> Optional[dict]:
+        """获取并提取一个故事，失败时返回None；mark(状态, 错误) 记录获取和解析的进度"""
+        page = await self.fetch_story(adapter, story, mark)
+        if page is None:
+            return None
+        return await self.parse_story(adapter, story, *page, mark=mark)
+
+    async def fetch_story(self, adapter: SiteAdapter, story: StoryInfo,
+                          mark: Optional[Callable[..., None]] = None):
+        """获取一个故事的详情页，返回 (页面内容, 增量解析器)，失败时返回None"""
+        mark = mark or (lambda state, error=None: None)
+        try:
+            stream = self._stream(adapter)
+            html = await self.fetch(story.url, adapter, stream=stream)
+        except Exception as e:
+            logger.error(f"[{adapter.name}] 获取故事页面失败 {story.url}: {e!r}")
+            html = None
+        if html is None:
+            logger.warning(f"[{adapter.name}] 获取故事页面失败: {story.title}")
+            mark(FAILED, "获取失败")
+            return None
+        mark(FETCHED)
+        return html, stream
+
+    async def parse_story(self, adapter: SiteAdapter, story: StoryInfo, html: str,
+                          stream: Optional[IncrementalHtmlParser] = None,
+                          mark: Optional[Callable[..., None]] = None) -> Optional[dict]:
+        """从获取到的详情页提取故事记录，失败时返回None"""
+        mark = mark or (lambda state, error=None: None)
+        try:
+            if stream is not None and stream.fed:
+                # 提取在事件循环中进行，不使用解析执行器（解析树不能传给工作进程）
+                with self.profile_stage('parse'):
+                    record, timings = adapter.parse_story_tree(stream.close(), story)
+                self.metrics.stage('parse', stream.seconds)
+                if stream.stopped_at is not None and record is not None:
+                    self._check_after_content(adapter, story, record)
+            else:
+                # HTML以字节形式传给工作进程；来自缓存的页面也按这种方式解析
+                record, timings = await self._parse('parse', adapter, adapter.parse_story_timed,
+                                                    html.encode('utf-8'), story)
+            for stage, seconds in timings.items():
+                self.metrics.stage(stage, seconds)
+        except Exception as e:
+            logger.error(f"[{adapter.name}] 解析故事内容失败 {story.url}: {e!r}")
+            record = None
+        if record is None:
+            logger.warning(f"[{adapter.name}] 解析故事内容失败: {story.title}")
+            mark(FAILED, "解析失败")
+            return None
+        mark(PARSED)
+        return record
+
+    def _check_after_content(self, adapter: SiteAdapter, story: StoryInfo, record: dict):
+        """提前结束解析时检查正文之后的字段：为空时可能是页面把它们放到了正文之后"""
+        missing = [name for name in adapter.after_content_fields if not record.get(name)]
+        if not missing:
+            return
+        host = urlparse(story.url).netloc
+        self.metrics.inc('stream_missing_fields', host=host)
+        message = f"[{adapter.name}] 读到正文结尾即停止解析后 {'/'.join(missing)} 为空: {story.url}"
+        if host in self.missing_field_hosts:
+            logger.debug(message)
+        else:
+            # 每个主机只警告一次，之后只计数
+            self.missing_field_hosts.add(host)
+            logger.warning(f"{message}（这些字段可能位于正文之后，可关闭stop_after_content）")
+
+    def output(self, adapter: SiteAdapter, stories_dir: str = "stories") -> StoryOutput:
+        """保存目录对应的输出，首次使用时创建，退出上下文时关闭"""
+        output = self.outputs.get(stories_dir)
+        if output is None:
+            output = self.outputs[stories_dir] = StoryOutput(adapter, stories_dir, self.output_format,
+                                                             self.output_options)
+        return output
+
+    async def flush_output(self, stories_dir: str = "stories") -> list:
+        """把保存目录缓冲的故事成批落盘并登记到清单，写入在线程中执行；返回落盘的 (记录, 文件名)"""
+        output = self.outputs.get(stories_dir)
+        if output is None:
+            return []
+        return output.register(await asyncio.to_thread(self._flush, output.sink))
+
+    def _flush(self, sink):
+        with self.metrics.time('save'), self.profile_stage('save'):
+            return sink.flush()
+
+    def _already_saved(self, adapter: SiteAdapter, output: StoryOutput, record: dict) -> Optional[str]:
+        """故事已保存时返回已保存的故事ID；正文与另一个已保存的故事相同时在清单中登记为它的别名"""
+        saved_as = output.saved_as(record)
+        if saved_as == record['id']:
+            logger.debug(f"[{adapter.name}] 故事已保存，跳过: {record['id']}")
+        elif saved_as:
+            output.manifest.add_alias(record['id'], saved_as, record['url'])
+            logger.info(f"[{adapter.name}] 正文与已保存的故事 {saved_as} 相同，登记为别名并跳过: {record['id']}")
+        return saved_as
+
+    async def save(self, adapter: SiteAdapter, record: dict, stories_dir: str = "stories") -> bool:
+        """保存一个故事，落盘成功后返回True；已保存（或正文相同）的故事跳过，同样返回True
+
+        记录进入缓冲后立即落盘，同时调用的其他故事在同一批写入；批量爬取由run_job成批落盘
+        """
+        output = self.output(adapter, stories_dir)
+        if self._already_saved(adapter, output, record):
+            return True
+        committed = False
+
+        def listener(pairs: list):
+            nonlocal committed
+            committed = committed or any(saved['id'] == record['id'] for saved, _ in pairs)
+
+        output.listeners.append(listener)
+        try:
+            output.sink.write(record)
+            await self.flush_output(stories_dir)
+        except Exception as e:
+            logger.error(f"[{adapter.name}] 保存失败 {record['id']}: {e!r}")
+        finally:
+            output.listeners.remove(listener)
+        return committed
+
+    def _previous_stories(self, job: CrawlJob, resumed: bool) -> Dict[str, dict]:
+        """之前已保存的故事的汇总信息：汇总文件中的，以及继续时爬取状态中记录的"""
+        previous = {}
+        summary_file = os.path.join(job.output_dir, job.adapter.summary_name)
+        if os.path.exists(summary_file):
+            try:
+                with open(summary_file, encoding='utf-8') as f:
+                    previous.update((entry['id'], entry) for entry in json.load(f))
+            except (ValueError, KeyError, TypeError) as e:
+                logger.warning(f"[{job.adapter.name}] 读取汇总信息失败，重新生成: {summary_file} - {e!r}")
+        if resumed:
+            previous.update((entry['id'], entry) for entry in self.state.saved_data(job.start_url))
+        return previous
+
+    async def _discover(self, job: CrawlJob, output: StoryOutput, resumed: bool,
+                        result: JobResult) -> AsyncIterator[StoryInfo]:
+        """产出需要处理的故事：继续上次已完成发现的任务时取自爬取状态，否则来自列表页"""
+        name = job.adapter.name
+        key = job.start_url
+        if resumed and self.state.job_status(key) == JOB_DISCOVERED:
+            # 上次已完成列表页发现，直接处理尚未保存的故事
+            stories = []
+            for story_id, url, title in self.state.pending(key):
+                if story_id in output.manifest:
+                    self.state.mark(key, story_id, DUPLICATE if output.manifest.alias_of(story_id) else SAVED)
+                    result.skipped += 1
+                    continue
+                stories.append(StoryInfo(id=story_id, title=title, url=url))
+            logger.info(f"[{name}] 继续上次的进度，待处理 {len(stories)} 个故事")
+            for story in stories:
+                yield story
+            return
+
+        known_states = self.state.states(key) if resumed else {}
+        seen = set()
+        async for list_page in self.iter_list_pages(job):
+            for story in list_page.stories:
+                if story.id in seen:
+                    continue
+                if job.max_stories and len(seen) >= job.max_stories:
+                    break
+                seen.add(story.id)
+                # 已保存的故事不再下载和解析
+                if known_states.get(story.id) == SAVED or story.id in output.manifest:
+                    result.skipped += 1
+                    continue
+                if self.state:
+                    self.state.discover(key, story.id, story.url, story.title)
+                yield story
+            if job.max_stories and len(seen) >= job.max_stories:
+                break
+        logger.info(f"[{name}] 列表页发现完成，共 {len(seen)} 个故事，其中 {result.skipped} 个已保存")
+        if self.state:
+            self.state.set_job_status(key, JOB_DISCOVERED)
+
+    async def run_job(self, job: CrawlJob) -> JobResult:
+        """爬取一个任务
+
+        流水线：列表页发现 -> 故事队列 -> 获取 -> 解析 -> 保存。各阶段有独立的并发数，队列有界，
+        下游处理不过来时上游自动等待；单个慢请求只占用一个获取协程，不会阻塞其他故事的写入。
+        指定state_path时以start_url为任务标识记录进度，任务完整跑完才标记完成。
+        """
+        adapter = job.adapter
+        name = adapter.name
+        key = job.start_url
+        logger.info(f"[{name}] 开始爬取: {job.start_url}")
+        if job.warmup:
+            await self.warmup(adapter)
+
+        output = self.output(adapter, job.output_dir)
+        resumed = self.state.start_job(key, self.resume) if self.state else False
+        result = JobResult()
+        # 汇总JSON只属于text格式；其他格式的输出本身就是汇总，不在内存中保留正文
+        summarize = bool(adapter.summary_name) and self.output_format == 'text'
+        summary = self._previous_stories(job, resumed) if summarize else {}
+
+        def mark(story_id: str, state: str, error: Optional[str] = None, data: Optional[dict] = None):
+            self.metrics.inc('stories', state=state, host=job.host)
+            if self.state:
+                self.state.mark(key, story_id, state, error, data)
+
+        fetch_workers = self.adaptive_max_concurrent or self.per_host_concurrency
+        parse_workers = self.parse_executor.concurrency
+        save_workers = self.save_concurrency
+        story_queue = asyncio.Queue(maxsize=fetch_workers * 2)
+        parse_queue = asyncio.Queue(maxsize=parse_workers * 2)
+        save_queue = asyncio.Queue(maxsize=save_workers * 2)
+        # 故事按完成顺序写入，汇总信息按发现顺序排列：故事ID -> 发现序号
+        positions: Dict[str, int] = {}
+        saved_entries: List[Tuple[int, str, dict]] = []
+        # 已写入缓冲、尚未落盘的故事：记录ID -> (故事ID, 汇总信息)；落盘后才算保存成功
+        unflushed: Dict[str, Tuple[str, Optional[dict]]] = {}
+
+        def committed(pairs: list):
+            for record, _ in pairs:
+                if record['id'] not in unflushed:
+                    continue  # 同一目录中其他任务的故事
+                story_id, entry = unflushed.pop(record['id'])
+                result.saved += 1
+                mark(story_id, SAVED, data=entry if summarize else None)
+                if entry is not None:
+                    saved_entries.append((positions[story_id], record['id'], entry))
+                if result.saved % 10 == 0:
+                    logger.info(f"[{name}] 已保存 {result.saved} 个故事")
+
+        async def discover():
+            stories = self._discover(job, output, resumed, result)
+            try:
+                async for story in stories:
+                    positions[story.id] = result.discovered
+                    result.discovered += 1
+                    await story_queue.put(story)
+            finally:
+                await stories.aclose()
+            for _ in range(fetch_workers):
+                await story_queue.put(_STOP)
+
+        async def fetch(story: StoryInfo):
+            page = await self.fetch_story(adapter, story, partial(mark, story.id))
+            return None if page is None else (story, page)
+
+        async def parse(item):
+            story, (html, stream) = item
+            record = await self.parse_story(adapter, story, html, stream, partial(mark, story.id))
+            return None if record is None else (story, record)
+
+        async def save(item):
+            story, record = item
+            saved_as = self._already_saved(adapter, output, record)
+            if saved_as:
+                # 已保存或正文重复的故事算作跳过，不计入本次保存
+                result.skipped += 1
+                result.already_saved += 1
+                mark(story.id, SAVED if saved_as == story.id else DUPLICATE)
+                return
+            entry = adapter.summary_entry(record, summarize) if adapter.summary_name else None
+            unflushed[record['id']] = (story.id, entry)
+            output.sink.write(record)
+            if output.sink.full:
+                await self.flush_output(job.output_dir)
+
+        output.listeners.append(committed)
+        stages = [asyncio.ensure_future(stage) for stage in (
+            discover(),
+            self._run_stage("获取", fetch_workers, story_queue, fetch, parse_queue, parse_workers),
+            self._run_stage("解析", parse_workers, parse_queue, parse, save_queue, save_workers),
+            self._run_stage("保存", save_workers, save_queue, save),
+        )]
+        try:
+            await asyncio.gather(*stages)
+        finally:
+            # 中断时取消各阶段，队列中尚未处理的故事保持未保存；已写入的故事照常落盘
+            for stage in stages:
+                stage.cancel()
+            await asyncio.gather(*stages, return_exceptions=True)
+            try:
+                await self.flush_output(job.output_dir)
+            finally:
+                output.listeners.remove(committed)
+                # 写入失败的故事保持未保存，继续时重新获取
+                for story_id, _ in unflushed.values():
+                    mark(story_id, FAILED, "保存失败")
+                if self.state:
+                    self.state.flush()
+
+        saved_entries.sort(key=lambda item: item[0])
+        if summarize:
+            summary.update((record_id, entry) for _, record_id, entry in saved_entries)
+        else:
+            result.stories = [entry for _, _, entry in saved_entries]
+        if summarize:
+            result.stories = list(summary.values())
+            summary_file = os.path.join(job.output_dir, adapter.summary_name)
+            with open(summary_file, 'w', encoding='utf-8') as f:
+                json.dump(result.stories, f, ensure_ascii=False, indent=2)
+            logger.info(f"[{name}] 汇总信息保存在: {summary_file}")
+        if self.state:
+            counts = self.state.counts(key)
+            self.state.set_job_status(key, JOB_FINISHED)
+            logger.info(f"[{name}] 爬取状态: {counts}")
+
+        logger.info(f"[{name}] 完成！成功保存 {result.saved}/{result.discovered} 个故事"
+                    f" ({result.skipped} 个已保存或正文重复)")
+        if self.coalesced_count:
+            logger.info(f"合并重复请求: {self.coalesced_count} 次")
+        return result
+
+    async def _run_stage(self, name: str, workers: int, in_queue: asyncio.Queue, handle,
+                         out_queue: Optional[asyncio.Queue] = None, downstream_workers: int = 0):
+        """运行流水线的一个阶段
+
+        workers个协程从输入队列取任务交给handle处理，非None的结果放入输出队列；
+        收到结束标记后退出，全部退出后向下游发送结束标记。
+        """
+        async def worker():
+            while True:
+                item = await in_queue.get()
+                if item is _STOP:
+                    return
+                try:
+                    result = await handle(item)
+                except Exception as e:
+                    logger.error(f"{name}阶段处理失败: {e!r}")
+                    continue
+                if result is not None and out_queue is not None:
+                    await out_queue.put(result)
+
+        await asyncio.gather(*(worker() for _ in range(workers)))
+        if out_queue is not None:
+            for _ in range(downstream_workers):
+                await out_queue.put(_STOP)
+
+    async def crawl_job(self, job: CrawlJob) -> int:
+        """爬取一个任务，返回保存的故事数"""
+        return (await self.run_job(job)).saved
+
+    async def crawl(self, *jobs: CrawlJob) -> List[Optional[int]]:
+        """并发执行多个任务，返回各任务保存的故事数，失败的任务为None"""
+        results = await asyncio.gather(*(self.crawl_job(job) for job in jobs), return_exceptions=True)
+        counts = []
+        for job, result in zip(jobs, results):
+            if isinstance(result, BaseException):
+                logger.error(f"[{job.adapter.name}] 爬取失败 {job.start_url}: {result!r}")
+                counts.append(None)
+            else:
+                counts.append(result)
+        return counts
+
+
+def parse_target(target: str, parser: str) -> Tuple[SiteAdapter, str]:
+    """站点=URL 使用指定的适配器，只有URL时按主机名选择"""
+    if '=' in target:
+        name, url = target.split('=', 1)
+        parsed = urlparse(url)
+        return get_adapter(name, base_url=f"{parsed.scheme}://{parsed.netloc}", parser=parser), url
+    return adapter_for_url(target, parser=parser), target
+
+
+async def main(args):
+    jobs = []
+    for i, target in enumerate(args.targets, 1):
+        adapter, url = parse_target(target, args.parser)
+        output_dir = os.path.join(args.output, f"{adapter.name}_{i}")
+        jobs.append(CrawlJob(adapter, url, output_dir, args.max_pages, args.max_stories))
+
+    async with CrawlEngine(per_host_concurrency=args.concurrency, requests_per_second=args.rps,
+                           cache_path=args.cache, parse_mode=args.parse_mode,
+                           output_format=args.format, archive_path=args.archive,
+                           metrics_dir=args.metrics_dir) as engine:
+        counts = await engine.crawl(*jobs)
+    for job, count in zip(jobs, counts):
+        logger.info(f"{job.adapter.name} {job.start_url}: {'失败' if count is None else count} -> {job.output_dir}")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    arg_parser = argparse.ArgumentParser(description="多站点爬取引擎")
+    arg_parser.add_argument("targets", nargs="+",
+                            help=f"站点=列表页URL，或只写URL按主机名选择站点；站点: {', '.join(ADAPTERS)}")
+    arg_parser.add_argument("--output", default="stories", help="输出目录，每个任务一个子目录")
+    arg_parser.add_argument("--max-pages", type=int, help="每个任务最多的列表页数")
+    arg_parser.add_argument("--max-stories", type=int, help="每个任务最多的故事数")
+    arg_parser.add_argument("--concurrency", type=int, default=8, help="每个主机同时进行的请求数")
+    arg_parser.add_argument("--rps", type=float, help="每个主机每秒请求数")
+    arg_parser.add_argument("--parser", default="html.parser", help="提取后端: html.parser / lxml")
+    arg_parser.add_argument("--parse-mode", default="inline", help="解析模式: inline / thread / process")
+    arg_parser.add_argument("--format", default="text", help="输出格式: text / jsonl / sqlite")
+    arg_parser.add_argument("--cache", help="持久化HTTP缓存路径")
+    arg_parser.add_argument("--archive", help="原始页面归档目录")
+    arg_parser.add_argument("--metrics-dir", help="运行指标导出目录")
+    asyncio.run(main(arg_parser.parse_args()))
@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+爬取状态存储 - 基于SQLite
+记录每个故事的状态（discovered/fetched/parsed/saved/failed），
+写入先缓冲再批量提交，中断后可以从上次停下的位置继续爬取
+"""
+
+import json
+import os
+import sqlite3
+import time
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+DISCOVERED = 'discovered'
+FETCHED = 'fetched'
+PARSED = 'parsed'
+SAVED = 'saved'
+FAILED = 'failed'
+DUPLICATE = 'duplicate'  # 正文与另一个已保存的故事相同，在清单中登记为别名
+STATES = (DISCOVERED, FETCHED, PARSED, SAVED, FAILED, DUPLICATE)
+
+# 任务状态：列表页发现中 / 发现完成 / 全部完成
+JOB_DISCOVERING = 'discovering'
+JOB_DISCOVERED = 'discovered'
+JOB_FINISHED = 'finished'
+
+
+class CrawlState:
+    def __init__(self, path: str = "crawl_state.sqlite3", batch_size: int = 100,
+                 flush_interval: float = 5.0):
+        """
+        batch_size: 缓冲的状态更新达到该数量时提交
+        flush_interval: 距上次提交超过该秒数时提交
+        """
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+
+        state_dir = os.path.dirname(path)
+        if state_dir and not os.path.exists(state_dir):
+            os.makedirs(state_dir)
+
+        self.conn = sqlite3.connect(path)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                job TEXT PRIMARY KEY,
+                status TEXT NOT NULL,
+                started_at REAL NOT NULL,
+                updated_at REAL NOT NULL
+            )
+        """)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS stories (
+                job TEXT NOT NULL,
+                story_id TEXT NOT NULL,
+                url TEXT NOT NULL,
+                title TEXT,
+                state TEXT NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                error TEXT,
+                data TEXT,
+                updated_at REAL NOT NULL,
+                PRIMARY KEY (job, story_id)
+            )
+        """)
+        self.conn.execute('CREATE INDEX IF NOT EXISTS idx_stories_state ON stories (job, state)')
+        self.conn.commit()
+
+        self._discovered: List[Tuple] = []  # 待写入的新发现故事
+        self._updates: List[Tuple] = []  # 待写入的状态更新
+        self._last_flush = time.monotonic()
+
+    def job_status(self, job: str) -> Optional[str]:
+        """任务状态，没有记录时返回None"""
+        row = self.conn.execute('SELECT status FROM jobs WHERE job = ?', (job,)).fetchone()
+        return row[0] if row else None
+
+    def start_job(self, job: str, resume: bool = False) -> bool:
+        """开始任务，返回是否从上次的进度继续
+
+        resume为True且上次任务未完成时保留已有状态，否则清空重新开始
+        """
+        status = self.job_status(job)
+        if resume and status in (JOB_DISCOVERING, JOB_DISCOVERED):
+            counts = self.counts(job)
+            logger.info(f"继续上次未完成的任务: {job} {counts}")
+            return True
+
+        now = time.time()
+        with self.conn:
+            self.conn.execute('DELETE FROM stories WHERE job = ?', (job,))
+            self.conn.execute(
+                'INSERT OR REPLACE INTO jobs (job, status, started_at, updated_at) VALUES (?, ?, ?, ?)',
+                (job, JOB_DISCOVERING, now, now)
+            )
+        return False
+
+    def set_job_status(self, job: str, status: str):
+        """更新任务状态，同时提交缓冲的状态更新"""
+        self.flush()
+        with self.conn:
+            self.conn.execute('UPDATE jobs SET status = ?, updated_at = ? WHERE job = ?',
+                              (status, time.time(), job))
+
+    def discover(self, job: str, story_id: str, url: str, title: str = ""):
+        """记录新发现的故事，已存在的故事保持原状态"""
+        self._discovered.append((job, story_id, url, title, DISCOVERED, time.time()))
+        self._maybe_flush()
+
+    def mark(self, job: str, story_id: str, state: str, error: Optional[str] = None,
+             data: Optional[Dict[str, Any]] = None):
+        """更新故事状态；data为保存成功时需要保留的故事信息"""
+        if state not in STATES:
+            raise ValueError(f"未知的状态: {state}")
+        payload = json.dumps(data, ensure_ascii=False) if data is not None else None
+        self._updates.append((state, error, payload, int(state == FAILED), time.time(), job, story_id))
+        self._maybe_flush()
+
+    def _maybe_flush(self):
+        pending = len(self._discovered) + len(self._updates)
+        if pending >= self.batch_size or time.monotonic() - self._last_flush >= self.flush_interval:
+            self.flush()
+
+    def flush(self):
+        """提交缓冲的写入"""
+        if self._discovered or self._updates:
+            with self.conn:
+                if self._discovered:
+                    # rowid保持发现顺序，继续时按原顺序处理
+                    self.conn.executemany("""
+                        INSERT OR IGNORE INTO stories (job, story_id, url, title, state, updated_at)
+                        VALUES (?, ?, ?, ?, ?, ?)
+                    """, self._discovered)
+                if self._updates:
+                    self.conn.executemany("""
+                        UPDATE stories
+                        SET state = ?, error = ?, data = COALESCE(?, data), attempts = attempts + ?, updated_at = ?
+                        WHERE job = ? AND story_id = ?
+                    """, self._updates)
+            self._discovered.clear()
+            self._updates.clear()
+        self._last_flush = time.monotonic()
+
+    def states(self, job: str) -> Dict[str, str]:
+        """任务中每个故事的状态"""
+        self.flush()
+        return dict(self.conn.execute('SELECT story_id, state FROM stories WHERE job = ?', (job,)))
+
+    def pending(self, job: str) -> List[Tuple[str, str, str]]:
+        """尚未保存的故事 (story_id, url, title)，按发现顺序；失败的故事也会重试"""
+        self.flush()
+        return self.conn.execute(
+            'SELECT story_id, url, title FROM stories WHERE job = ? AND state NOT IN (?, ?) ORDER BY rowid',
+            (job, SAVED, DUPLICATE)
+        ).fetchall()
+
+    def saved_data(self, job: str) -> List[Dict[str, Any]]:
+        """已保存故事记录的data，按发现顺序"""
+        self.flush()
+        rows = self.conn.execute(
+            'SELECT data FROM stories WHERE job = ? AND state = ? AND data IS NOT NULL ORDER BY rowid',
+            (job, SAVED)
+        )
+        return [json.loads(row[0]) for row in rows]
+
+    def counts(self, job: str) -> Dict[str, int]:
+        """各状态的故事数"""
+        self.flush()
+        return dict(self.conn.execute(
+            'SELECT state, COUNT(*) FROM stories WHERE job = ? GROUP BY state', (job,)
+        ))
+
+    def close(self):
+        """提交缓冲的写入并关闭数据库"""
+        self.flush()
+        self.conn.close()
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+HTML提取后端 - 两个站点共用的部分
+- html.parser: BeautifulSoup + 纯Python解析器（原有实现）
+- lxml: lxml + XPath，C实现，解析和查找速度快数倍
+
+这里只有解析、元素文本和正文打分（content_scorer）；列表页和详情页的查找规则
+在各站点的子包中（gushi365.extract_backend、lovechinese.extract_backend），
+站点后端继承这里的 SoupBackend / LxmlBackend。
+"""
+
+from typing import Dict, List, Sequence
+
+from bs4 import BeautifulSoup, CData, NavigableString
+from lxml import etree
+
+from .content_scorer import NodeScore, TextScorer
+
+# 提取正文前需要移除的元素
+NOISE_TAGS = ("script", "style", "nav", "header", "footer", "aside")
+
+# get_text计入的文本节点类型
+_TEXT_TYPES = (NavigableString, CData)
+
+
+class ExtractBackend:
+    """提取后端接口"""
+    name = ""
+
+    def parse(self, html: str):
+        """解析HTML，返回文档对象"""
+        raise NotImplementedError
+
+    def text(self, doc, node, separator: str = "") -> str:
+        """元素文本，等同于 get_text(separator, strip=True)"""
+        raise NotImplementedError
+
+    def score_nodes(self, doc, tags: Sequence[str] = ('div',), keywords: Sequence[str] = ()) -> List[NodeScore]:
+        """tags元素的文本统计（一次遍历），按文档顺序；文本与text(doc, node)一致"""
+        raise NotImplementedError
+
+
+class SoupBackend(ExtractBackend):
+    name = "html.parser"
+
+    def parse(self, html: str):
+        return BeautifulSoup(html, 'html.parser')
+
+    def text(self, doc, node, separator: str = "") -> str:
+        return node.get_text(separator=separator, strip=True)
+
+    def score_nodes(self, doc, tags: Sequence[str] = ('div',), keywords: Sequence[str] = ()) -> List[NodeScore]:
+        scorer = TextScorer(tags, keywords)
+        # None表示元素结束
+        stack = list(reversed(doc.contents))
+        while stack:
+            node = stack.pop()
+            if node is None:
+                scorer.end()
+            elif isinstance(node, NavigableString):
+                # get_text只取普通文本和CDATA，不含注释和脚本、样式中的文本
+                if type(node) in _TEXT_TYPES:
+                    scorer.text(node)
+            else:
+                scorer.start(node, node.name)
+                stack.append(None)
+                stack.extend(reversed(node.contents))
+        return scorer.scores
+
+
+class LxmlDoc:
+    """lxml文档及其噪声移除状态
+
+    lxml不会真正删除噪声元素，clean为True时在后续查找中排除它们，
+    以保证文本节点的切分与BeautifulSoup的decompose一致。
+    """
+    __slots__ = ('root', 'clean')
+
+    def __init__(self, root):
+        self.root = root
+        self.clean = False
+
+
+NOT_NOISE = 'not(' + ' or '.join(f'ancestor-or-self::{tag}' for tag in NOISE_TAGS) + ')'
+
+_XP_TEXT = etree.XPath('.//text()[not(parent::script or parent::style)]')
+_XP_TEXT_CLEAN = etree.XPath(f'.//text()[{NOT_NOISE}]')
+
+# 使用etree的HTMLParser，避免lxml.html自定义元素类的查找开销
+_HTML_PARSER = etree.HTMLParser(encoding='utf-8')
+
+
+class LxmlBackend(ExtractBackend):
+    name = "lxml"
+
+    def parse(self, html: str):
+        root = etree.fromstring(html.encode('utf-8'), _HTML_PARSER)
+        if root is None:
+            # 空文档
+            root = etree.fromstring(b'<html></html>', _HTML_PARSER)
+        return LxmlDoc(root)
+
+    def from_tree(self, root):
+        """包装已解析的根元素（如增量解析的结果）"""
+        return LxmlDoc(root)
+
+    def _node_text(self, node, clean: bool, separator: str = "") -> str:
+        texts = (_XP_TEXT_CLEAN if clean else _XP_TEXT)(node)
+        return separator.join(stripped for stripped in (t.strip() for t in texts) if stripped)
+
+    def text(self, doc, node, separator: str = "") -> str:
+        return self._node_text(node, doc.clean, separator)
+
+    def score_nodes(self, doc, tags: Sequence[str] = ('div',), keywords: Sequence[str] = ()) -> List[NodeScore]:
+        scorer = TextScorer(tags, keywords)
+        # 已移除噪声时跳过噪声元素，否则只跳过脚本和样式中的文本；skipped为位于跳过的元素内的深度
+        skipped = 0
+        for event, node in etree.iterwalk(doc.root, events=('start', 'end', 'comment', 'pi')):
+            if event == 'start':
+                tag = node.tag
+                if skipped or (doc.clean and tag in NOISE_TAGS):
+                    skipped += 1
+                    continue
+                scorer.start(node, tag)
+                if node.text and tag not in ('script', 'style'):
+                    scorer.text(node.text)
+                continue
+            if event == 'end':
+                if skipped:
+                    skipped -= 1
+                else:
+                    scorer.end()
+            if node.tail and not skipped:
+                scorer.text(node.tail)
+        return scorer.scores
+
+
+def lookup_backend(backends: Dict[str, ExtractBackend], name: str) -> ExtractBackend:
+    """按名称在站点的后端中查找"""
+    try:
+        return backends[name]
+    except KeyError:
+        raise ValueError(f"不支持的解析后端: {name}，可选: {', '.join(backends)}") from None
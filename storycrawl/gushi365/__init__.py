@@ -0,0 +1,2 @@
+# -*- coding: utf-8 -*-
+"""故事365（www.gushi365.com）的页面提取"""
@@ -0,0 +1,435 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+故事365的HTML提取后端，解析、元素文本和正文打分继承自 storycrawl.extract_backend
+- html.parser: BeautifulSoup + 纯Python解析器（原有实现）
+- lxml: lxml + XPath，C实现，解析和查找速度快数倍
+
+两个后端对同一页面的提取结果保持一致（对格式规范的页面）。
+
+scan_story 一次遍历详情页得到标题、候选段落、作者和分类，
+结果与依次调用 title / remove_noise / paragraphs / author_texts / category 相同。
+score_nodes 一次遍历得到每个元素的文本统计（content_scorer），代替逐个div调用text。
+"""
+
+import itertools
+import re
+from dataclasses import dataclass
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from bs4 import NavigableString
+from lxml import etree
+
+from .. import extract_backend
+from ..extract_backend import NOISE_TAGS, NOT_NOISE
+
+STORY_LINK_RE = re.compile(r'/info/\d+\.html')
+PAGE_LINK_RE = re.compile(r'index_(\d+)\.html')
+CATEGORY_LINK_RE = re.compile(r'/(shuiqiangushi|yuyangushi)/')
+AUTHOR_TEXT_RE = re.compile(r'作者[：:]')
+AUTHOR_SPAN_RE = re.compile(r'作者')
+AUTHOR_CLASS_RE = re.compile(r'author')
+CATEGORY_TEXT_RE = re.compile(r'分类[：:]')
+CATEGORY_SPAN_RE = re.compile(r'分类')
+
+
+@dataclass
+class StoryScan:
+    """一次遍历详情页的结果"""
+    title: Optional[str]
+    paragraphs: List[str]  # 噪声元素之外所有p标签的文本
+    author_texts: Iterator[str]  # 按优先级产出，需要时才计算
+    category: str
+
+
+class ExtractBackend(extract_backend.ExtractBackend):
+    """故事365提取后端接口"""
+
+    def story_links(self, doc) -> List[Tuple[str, str]]:
+        """列表页中的故事链接，返回 (href, 链接文字)"""
+        raise NotImplementedError
+
+    def last_page(self, doc) -> int:
+        """分页栏中出现的最大页码，没有分页链接时返回0"""
+        raise NotImplementedError
+
+    def title(self, doc, story_url: str) -> Optional[str]:
+        """详情页标题：h1，或指向当前故事的链接文字"""
+        raise NotImplementedError
+
+    def remove_noise(self, doc):
+        """移除脚本、样式、导航等元素"""
+        raise NotImplementedError
+
+    def paragraphs(self, doc) -> List[str]:
+        """所有p标签的文本"""
+        raise NotImplementedError
+
+    def author_texts(self, doc) -> Iterator[str]:
+        """可能包含作者信息的文本，按优先级依次产出"""
+        raise NotImplementedError
+
+    def category(self, doc) -> str:
+        """分类信息"""
+        raise NotImplementedError
+
+    def scan_story(self, doc, story_url: str) -> StoryScan:
+        """一次遍历详情页，之后文档处于移除噪声后的状态"""
+        raise NotImplementedError
+
+
+class SoupBackend(ExtractBackend, extract_backend.SoupBackend):
+    def story_links(self, doc) -> List[Tuple[str, str]]:
+        return [(link['href'], link.get_text(strip=True))
+                for link in doc.find_all('a', href=STORY_LINK_RE)]
+
+    def last_page(self, doc) -> int:
+        pages = [int(PAGE_LINK_RE.search(link['href']).group(1))
+                 for link in doc.find_all('a', href=PAGE_LINK_RE)]
+        return max(pages, default=0)
+
+    def title(self, doc, story_url: str) -> Optional[str]:
+        title_element = doc.find('h1')
+        if not title_element:
+            for link in doc.find_all('a', href=STORY_LINK_RE):
+                if story_url.endswith(link['href']):
+                    title_element = link
+                    break
+
+        return title_element.get_text(strip=True) if title_element else None
+
+    def remove_noise(self, doc):
+        for element in doc(list(NOISE_TAGS)):
+            element.decompose()
+
+    def paragraphs(self, doc) -> List[str]:
+        return [p.get_text(strip=True) for p in doc.find_all('p')]
+
+    def author_texts(self, doc) -> Iterator[str]:
+        author_patterns = (
+            lambda: doc.find(string=AUTHOR_TEXT_RE),
+            lambda: doc.find('span', string=AUTHOR_SPAN_RE),
+            lambda: doc.find('div', class_=AUTHOR_CLASS_RE),
+        )
+        for find in author_patterns:
+            pattern = find()
+            if pattern:
+                yield pattern.parent.get_text(strip=True)
+
+    def category(self, doc) -> str:
+        category_patterns = (
+            lambda: doc.find('a', href=CATEGORY_LINK_RE),
+            lambda: doc.find(string=CATEGORY_TEXT_RE),
+            lambda: doc.find('span', string=CATEGORY_SPAN_RE),
+        )
+        for find in category_patterns:
+            pattern = find()
+            if pattern:
+                return pattern.get_text(strip=True)
+        return ""
+
+    def scan_story(self, doc, story_url: str) -> StoryScan:
+        h1 = story_link = category_link = None
+        author_string = category_string = author_div = None
+        noise, paragraphs, spans = [], [], []
+
+        # 按文档顺序遍历，in_noise表示位于噪声元素内；每种查找在首次命中后不再检查
+        stack = [(child, False) for child in reversed(doc.contents)]
+        while stack:
+            node, in_noise = stack.pop()
+            if isinstance(node, NavigableString):
+                if not in_noise:
+                    if author_string is None and AUTHOR_TEXT_RE.search(node):
+                        author_string = node
+                    if category_string is None and CATEGORY_TEXT_RE.search(node):
+                        category_string = node
+                continue
+
+            name = node.name
+            if name in NOISE_TAGS:
+                if not in_noise:
+                    noise.append(node)
+                    in_noise = True
+            elif name == 'h1':
+                if h1 is None:
+                    h1 = node
+            elif name == 'a':
+                href = node.get('href')
+                if href is not None:
+                    # 标题在移除噪声前查找，不排除噪声元素
+                    if h1 is None and story_link is None and STORY_LINK_RE.search(href) and story_url.endswith(href):
+                        story_link = node
+                    if category_link is None and not in_noise and CATEGORY_LINK_RE.search(href):
+                        category_link = node
+            elif not in_noise:
+                if name == 'p':
+                    paragraphs.append(node)
+                elif name == 'span':
+                    spans.append(node)
+                elif name == 'div' and author_div is None:
+                    classes = node.get('class')
+                    if classes and AUTHOR_CLASS_RE.search(classes if isinstance(classes, str) else ' '.join(classes)):
+                        author_div = node
+            stack.extend((child, in_noise) for child in reversed(node.contents))
+
+        title_element = h1 if h1 is not None else story_link
+        title = title_element.get_text(strip=True) if title_element is not None else None
+
+        for element in noise:
+            element.decompose()
+
+        def span_with(pattern):
+            # span.string取决于噪声子元素是否已移除，所以在decompose之后检查
+            for span in spans:
+                if span.string is not None and pattern.search(span.string):
+                    return span
+            return None
+
+        def author_texts():
+            if author_string is not None:
+                yield author_string.parent.get_text(strip=True)
+            span = span_with(AUTHOR_SPAN_RE)
+            if span is not None:
+                yield span.parent.get_text(strip=True)
+            if author_div is not None:
+                yield author_div.parent.get_text(strip=True)
+
+        category = category_link or category_string or span_with(CATEGORY_SPAN_RE)
+        return StoryScan(
+            title=title,
+            paragraphs=[p.get_text(strip=True) for p in paragraphs],
+            author_texts=author_texts(),
+            category=category.get_text(strip=True) if category is not None else "",
+        )
+
+
+_XP_STRINGS = etree.XPath('//text() | //comment()')
+_XP_STRINGS_CLEAN = etree.XPath(f'(//text() | //comment())[{NOT_NOISE}]')
+_XP_LINKS = etree.XPath('//a[@href]')
+_XP_LINKS_CLEAN = etree.XPath(f'//a[@href][{NOT_NOISE}]')
+_XP_SPANS = etree.XPath('//span')
+_XP_SPANS_CLEAN = etree.XPath(f'//span[{NOT_NOISE}]')
+_XP_AUTHOR_DIVS = etree.XPath('//div[@class]')
+_XP_AUTHOR_DIVS_CLEAN = etree.XPath(f'//div[@class][{NOT_NOISE}]')
+_XP_P = etree.XPath('//p')
+_XP_P_CLEAN = etree.XPath(f'//p[{NOT_NOISE}]')
+_XP_H1 = etree.XPath('//h1')
+
+
+class LxmlBackend(ExtractBackend, extract_backend.LxmlBackend):
+    def _is_noise(self, node) -> bool:
+        return any(ancestor.tag in NOISE_TAGS for ancestor in node.iterancestors())
+
+    def _string(self, node, clean: bool) -> Optional[str]:
+        """等同于BeautifulSoup的Tag.string：只有唯一子节点时返回其文本"""
+        children = []
+        if node.text:
+            children.append(node.text)
+        for child in node:
+            if not (clean and child.tag in NOISE_TAGS):
+                children.append(child)
+            if child.tail:
+                children.append(child.tail)
+
+        if len(children) != 1:
+            return None
+        child = children[0]
+        if isinstance(child, str):
+            return child
+        if child.tag is etree.Comment:
+            return child.text or ""
+        if isinstance(child.tag, str):
+            return self._string(child, clean)
+        return None
+
+    def _string_parent(self, node):
+        """文本节点所在的元素"""
+        if isinstance(node, str):
+            parent = node.getparent()
+            return parent.getparent() if node.is_tail else parent
+        return node.getparent()
+
+    def _find_string(self, doc, pattern):
+        strings = (_XP_STRINGS_CLEAN if doc.clean else _XP_STRINGS)(doc.root)
+        for node in strings:
+            text = node if isinstance(node, str) else node.text
+            if text and pattern.search(text):
+                return node
+        return None
+
+    def _find_with_string(self, doc, xpath, xpath_clean, pattern):
+        for element in (xpath_clean if doc.clean else xpath)(doc.root):
+            string = self._string(element, doc.clean)
+            if string is not None and pattern.search(string):
+                return element
+        return None
+
+    def story_links(self, doc) -> List[Tuple[str, str]]:
+        return [(link.get('href'), self._node_text(link, doc.clean))
+                for link in (_XP_LINKS_CLEAN if doc.clean else _XP_LINKS)(doc.root)
+                if STORY_LINK_RE.search(link.get('href'))]
+
+    def last_page(self, doc) -> int:
+        pages = [int(match.group(1))
+                 for match in (PAGE_LINK_RE.search(link.get('href'))
+                               for link in (_XP_LINKS_CLEAN if doc.clean else _XP_LINKS)(doc.root))
+                 if match]
+        return max(pages, default=0)
+
+    def title(self, doc, story_url: str) -> Optional[str]:
+        for h1 in _XP_H1(doc.root):
+            if not (doc.clean and self._is_noise(h1)):
+                return self._node_text(h1, doc.clean)
+
+        for href, text in self.story_links(doc):
+            if story_url.endswith(href):
+                return text
+        return None
+
+    def remove_noise(self, doc):
+        doc.clean = True
+
+    def paragraphs(self, doc) -> List[str]:
+        return [self._node_text(p, doc.clean) for p in (_XP_P_CLEAN if doc.clean else _XP_P)(doc.root)]
+
+    def author_texts(self, doc) -> Iterator[str]:
+        node = self._find_string(doc, AUTHOR_TEXT_RE)
+        if node is not None:
+            yield self._node_text(self._string_parent(node), doc.clean)
+
+        span = self._find_with_string(doc, _XP_SPANS, _XP_SPANS_CLEAN, AUTHOR_SPAN_RE)
+        if span is not None:
+            yield self._node_text(span.getparent(), doc.clean)
+
+        for div in (_XP_AUTHOR_DIVS_CLEAN if doc.clean else _XP_AUTHOR_DIVS)(doc.root):
+            if AUTHOR_CLASS_RE.search(div.get('class')):
+                yield self._node_text(div.getparent(), doc.clean)
+                break
+
+    def category(self, doc) -> str:
+        for link in (_XP_LINKS_CLEAN if doc.clean else _XP_LINKS)(doc.root):
+            if CATEGORY_LINK_RE.search(link.get('href')):
+                return self._node_text(link, doc.clean)
+
+        node = self._find_string(doc, CATEGORY_TEXT_RE)
+        if node is not None:
+            # 注释节点的文本不计入get_text
+            return node.strip() if isinstance(node, str) else ""
+
+        span = self._find_with_string(doc, _XP_SPANS, _XP_SPANS_CLEAN, CATEGORY_SPAN_RE)
+        if span is not None:
+            return self._node_text(span, doc.clean)
+        return ""
+
+    def scan_story(self, doc, story_url: str) -> StoryScan:
+        # 文档已移除噪声时，标题也不考虑噪声元素
+        clean = doc.clean
+        h1 = story_link = category_link = None
+        author_parent = author_div = None
+        category_string = None
+        paragraphs, spans = [], []
+        noise_depth = 0
+
+        # 按文档顺序遍历：元素的text在start时、tail在end时出现，注释在comment时出现；
+        # 根元素之外的注释也计入
+        root = doc.root
+        siblings = lambda nodes: ((('comment' if node.tag is etree.Comment else 'pi'), node) for node in nodes)
+        events = itertools.chain(
+            siblings(reversed(list(root.itersiblings(preceding=True)))),
+            etree.iterwalk(root, events=('start', 'end', 'comment', 'pi')),
+            siblings(root.itersiblings()),
+        )
+        for event, node in events:
+            if event == 'start':
+                tag = node.tag
+                if tag in NOISE_TAGS:
+                    noise_depth += 1
+                elif tag == 'h1':
+                    if h1 is None and not (clean and noise_depth):
+                        h1 = node
+                elif tag == 'a':
+                    href = node.get('href')
+                    if href is not None:
+                        if (h1 is None and story_link is None and not (clean and noise_depth)
+                                and STORY_LINK_RE.search(href) and story_url.endswith(href)):
+                            story_link = node
+                        if category_link is None and not noise_depth and CATEGORY_LINK_RE.search(href):
+                            category_link = node
+                elif not noise_depth:
+                    if tag == 'p':
+                        paragraphs.append(node)
+                    elif tag == 'span':
+                        spans.append(node)
+                    elif tag == 'div' and author_div is None:
+                        classes = node.get('class')
+                        if classes is not None and AUTHOR_CLASS_RE.search(classes):
+                            author_div = node
+                text, parent = node.text, node
+            elif event == 'end':
+                if node.tag in NOISE_TAGS:
+                    noise_depth -= 1
+                text, parent = node.tail, node.getparent()
+            else:
+                if event == 'comment' and not noise_depth:
+                    if (author_parent is None and node.text and AUTHOR_TEXT_RE.search(node.text)
+                            and node.getparent() is not None):
+                        author_parent = node.getparent()
+                    if category_string is None and node.text and CATEGORY_TEXT_RE.search(node.text):
+                        # 注释节点的文本不计入get_text
+                        category_string = ""
+                text, parent = node.tail, node.getparent()
+
+            if text and not noise_depth:
+                if author_parent is None and AUTHOR_TEXT_RE.search(text):
+                    author_parent = parent
+                if category_string is None and CATEGORY_TEXT_RE.search(text):
+                    category_string = text.strip()
+        doc.clean = True
+
+        title = None
+        if h1 is not None:
+            title = self._node_text(h1, clean)
+        elif story_link is not None:
+            title = self._node_text(story_link, clean)
+
+        def span_with(pattern):
+            for span in spans:
+                string = self._string(span, True)
+                if string is not None and pattern.search(string):
+                    return span
+            return None
+
+        def author_texts():
+            if author_parent is not None:
+                yield self._node_text(author_parent, True)
+            span = span_with(AUTHOR_SPAN_RE)
+            if span is not None:
+                yield self._node_text(span.getparent(), True)
+            if author_div is not None:
+                yield self._node_text(author_div.getparent(), True)
+
+        if category_link is not None:
+            category = self._node_text(category_link, True)
+        elif category_string is not None:
+            category = category_string
+        else:
+            span = span_with(CATEGORY_SPAN_RE)
+            category = self._node_text(span, True) if span is not None else ""
+
+        return StoryScan(
+            title=title,
+            paragraphs=[self._node_text(p, True) for p in paragraphs],
+            author_texts=author_texts(),
+            category=category,
+        )
+
+
+BACKENDS: Dict[str, ExtractBackend] = {
+    SoupBackend.name: SoupBackend(),
+    LxmlBackend.name: LxmlBackend(),
+}
+
+
+def get_backend(name: str = "html.parser") -> ExtractBackend:
+    """按名称获取提取后端"""
+    return extract_backend.lookup_backend(BACKENDS, name)
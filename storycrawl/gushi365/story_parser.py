@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+故事页面解析 - 纯函数实现
+不依赖爬虫实例和事件循环，可在进程池/线程池中执行
+"""
+
+from urllib.parse import urljoin
+import re
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+from dataclasses import dataclass
+from ..content_scorer import best_node
+from .extract_backend import ExtractBackend, get_backend
+from .text_filter import PARAGRAPH_FILTER, LINE_FILTER, NAV_FILTER, STORY_PUNCT_RE
+
+@dataclass
+class StoryInfo:
+    id: str
+    title: str
+    url: str
+
+@dataclass
+class StoryData:
+    title: str
+    content: str
+    author: str = ""
+    category: str = ""
+    url: str = ""
+
+@dataclass
+class ListPage:
+    page_num: int
+    stories: List[StoryInfo]
+    last_page: int = 0  # 分页栏中的最大页码，0表示未知
+
+def parse_list_html(html: bytes, base_url: str, parser: str = 'html.parser', page_num: int = 1) -> ListPage:
+    """解析列表页面，返回故事链接和分页信息"""
+    backend = get_backend(parser)
+    doc = backend.parse(html.decode('utf-8', errors='ignore'))
+
+    stories = []
+    for href, story_title in backend.story_links(doc):
+        story_url = urljoin(base_url, href)
+
+        # 提取故事ID
+        story_id = re.search(r'/info/(\d+)\.html', href)
+        story_id = story_id.group(1) if story_id else None
+
+        if story_title and story_url and story_id:
+            stories.append(StoryInfo(
+                id=story_id,
+                title=story_title,
+                url=story_url
+            ))
+
+    return ListPage(page_num=page_num, stories=stories, last_page=backend.last_page(doc))
+
+def parse_story_html(html: bytes, story_url: str, parser: str = 'html.parser',
+                     div_fallback: bool = False) -> StoryData:
+    """解析故事详情页面；div_fallback为True时没有故事段落的页面改用得分最高的div"""
+    return _parse_story_html(html, story_url, parser, None, div_fallback)
+
+def parse_story_html_timed(html: bytes, story_url: str, parser: str = 'html.parser',
+                           div_fallback: bool = False) -> Tuple[StoryData, Dict[str, float]]:
+    """解析故事详情页面，同时返回 decode/parse/extract/clean 各阶段耗时（秒）
+
+    耗时随结果一起返回，在进程池中执行时也能由主进程汇总
+    """
+    timings: Dict[str, float] = {}
+    return _parse_story_html(html, story_url, parser, timings, div_fallback), timings
+
+def _lap(timings: Optional[Dict[str, float]], stage: str, started: float) -> float:
+    """把从started到现在的耗时计入阶段，返回当前时间"""
+    now = time.perf_counter()
+    if timings is not None:
+        timings[stage] = timings.get(stage, 0.0) + now - started
+    return now
+
+def parse_story_tree(root, story_url: str, div_fallback: bool = False) -> Tuple[StoryData, Dict[str, float]]:
+    """从lxml增量解析得到的树中提取故事，同时返回 extract/clean 耗时"""
+    backend = get_backend('lxml')
+    timings: Dict[str, float] = {}
+    doc = backend.from_tree(root)
+    return _extract_story(backend, doc, story_url, timings, time.perf_counter(), div_fallback), timings
+
+def is_content_end(element) -> bool:
+    """正文容器（class含content的div）结束，流式读取详情页时可以在此停止"""
+    return element.tag == 'div' and 'content' in (element.get('class') or '').split()
+
+def _parse_story_html(html: bytes, story_url: str, parser: str,
+                      timings: Optional[Dict[str, float]], div_fallback: bool = False) -> StoryData:
+    backend = get_backend(parser)
+    started = time.perf_counter()
+    text = html.decode('utf-8', errors='ignore')
+    started = _lap(timings, 'decode', started)
+    doc = backend.parse(text)
+    started = _lap(timings, 'parse', started)
+    return _extract_story(backend, doc, story_url, timings, started, div_fallback)
+
+def _extract_story(backend: ExtractBackend, doc, story_url: str,
+                   timings: Optional[Dict[str, float]], started: float, div_fallback: bool = False) -> StoryData:
+    # 一次遍历得到标题、段落、作者和分类
+    scan = backend.scan_story(doc, story_url)
+    title = scan.title
+    if title is None:
+        title = "无标题"
+
+    # 清理标题
+    title = re.sub(r'\s*-\s*故事365.*$', '', title)
+    title = re.sub(r'\s*【.*?】.*$', '', title)
+
+    # 提取故事内容
+    fallback = (lambda: best_div_text(backend, doc)) if div_fallback else None
+    content = select_story_content(scan.paragraphs, timings, fallback)
+
+    # 提取作者和分类信息
+    author = match_author(scan.author_texts)
+    category = scan.category
+    if timings is not None:
+        # 清理正文的耗时单独统计
+        _lap(timings, 'extract', started + timings.get('clean', 0.0))
+
+    return StoryData(
+        title=title,
+        content=content,
+        author=author,
+        category=category,
+        url=story_url
+    )
+
+def select_story_content(paragraphs: List[str], timings: Optional[Dict[str, float]] = None,
+                         fallback: Optional[Callable[[], str]] = None) -> str:
+    """从p标签的文本中选出故事内容并清理；没有故事段落时使用fallback的结果"""
+    # 查找故事内容
+    story_paragraphs = []
+    long_paragraph = None
+    max_length = 0
+
+    # 过滤太短的段落，再批量过滤网站信息
+    paragraphs = [text for text in paragraphs if len(text) >= 10]
+    paragraphs = PARAGRAPH_FILTER.reject(paragraphs)
+
+    for text in paragraphs:
+        # 检查中文标点符号
+        if STORY_PUNCT_RE.search(text):
+            story_paragraphs.append(text)
+
+            if len(text) > max_length:
+                max_length = len(text)
+                long_paragraph = text
+
+    # 选择最佳内容
+    content = ""
+    if long_paragraph and len(long_paragraph) > 500:
+        content = long_paragraph
+    elif story_paragraphs:
+        filtered_paragraphs = []
+
+        for para in story_paragraphs:
+            if long_paragraph and para in long_paragraph:
+                continue
+            if para == long_paragraph:
+                continue
+            filtered_paragraphs.append(para)
+
+        if filtered_paragraphs:
+            if content:
+                content += '\n\n' + '\n\n'.join(filtered_paragraphs)
+            else:
+                content = '\n\n'.join(filtered_paragraphs)
+    elif fallback is not None:
+        content = fallback()
+
+    # 清理内容
+    if content:
+        started = time.perf_counter()
+        content = clean_content(content)
+        _lap(timings, 'clean', started)
+
+    return content
+
+def best_div_text(backend: ExtractBackend, doc) -> str:
+    """包含故事内容的div：跳过太短和包含网站导航信息的div，
+    按中文标点符号的数量（扣除链接文字所占比例）选出得分最高的div"""
+    best_div = best_node(backend.score_nodes(doc, ('div',), NAV_FILTER.keywords), min_length=200, skip_keyword=True)
+    if best_div is None:
+        return ""
+    return backend.text(doc, best_div.node, separator='\n')
+
+def clean_content(content):
+    """清理故事内容"""
+    lines = [line.strip() for line in content.split('\n')]
+    lines = [line for line in lines if line and len(line) >= 5 and not line.isdigit()]
+    cleaned_lines = []
+    seen_lines = set()
+
+    # 批量过滤包含网站信息的行
+    for line in LINE_FILTER.reject(lines):
+        if line.startswith('http') or '点击' in line:
+            continue
+
+        if line in seen_lines:
+            continue
+        seen_lines.add(line)
+
+        cleaned_lines.append(line)
+
+    content = '\n\n'.join(cleaned_lines)
+    content = re.sub(r'\n{3,}', '\n\n', content)
+    content = re.sub(r'([。！？])\n([^\"\'])', r'\1\n\n\2', content)
+
+    return content.strip()
+
+def match_author(author_texts: Iterable[str]) -> str:
+    """从按优先级排列的候选文本中取第一个作者名"""
+    for author_text in author_texts:
+        author_match = re.search(r'作者[：:]\s*([^\s]+)', author_text)
+        if author_match:
+            return author_match.group(1)
+
+    return ""
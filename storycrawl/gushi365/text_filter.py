@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+网站信息过滤 - 关键词预编译为单个正则
+关键词集合只编译一次，批量接口把多段文本拼接后一次扫描，
+避免对每一行都重建关键词列表并逐个做子串查找
+"""
+
+import re
+from bisect import bisect_right
+from typing import Iterable, List, Sequence
+
+# 包含这些关键词的段落视为网站信息（导航、评论、版权等）
+SITE_KEYWORDS = [
+    '故事365', '收藏', '分享', '评论', '阅读', '次数',
+    '版权', '标签', '作者', '日期', '分类', '发表评论',
+    '用户名', '密码', '验证码', '注册', '登录',
+    '相关故事', '推荐', '热门', '最新', '随机',
+    '博客浏览', '在线投稿', '微信关注', '建站服务',
+    '赞', '订阅', '继续阅读', '全文', '搜索', '导航',
+    '首页', '幼儿', '童话', '发现', '少儿', '感人',
+    'TAG', '影音', '图片', '儿童', '睡前', '益智',
+    '排行榜', '上一篇', '下一篇'
+]
+
+# 清理正文时逐行过滤的关键词
+LINE_KEYWORDS = SITE_KEYWORDS + ['鸟类中的骗子', '｜', '——']
+
+# 包含这些关键词的div视为导航区域
+NAV_KEYWORDS = [
+    '导航', '首页', '幼儿', '童话', '发现', '少儿', '感人',
+    'TAG', '影音', '图片', '儿童', '睡前', '益智', '排行榜'
+]
+
+# 故事正文的特征：包含中文标点符号
+STORY_PUNCT_RE = re.compile('[。，！？：；"]')
+
+# 批量扫描时的文本分隔符，不会出现在关键词中
+_SEPARATOR = '\x00'
+
+
+class KeywordFilter:
+    def __init__(self, keywords: Iterable[str]):
+        self.keywords = tuple(dict.fromkeys(keywords))
+        if any(_SEPARATOR in keyword for keyword in self.keywords):
+            raise ValueError("关键词不能包含分隔符")
+
+        # 长关键词在前，正则引擎会先按首字符集合跳过不可能匹配的位置
+        alternatives = sorted(self.keywords, key=len, reverse=True)
+        self.pattern = re.compile('|'.join(map(re.escape, alternatives)))
+
+    def search(self, text: str) -> bool:
+        """文本是否包含任一关键词"""
+        return self.pattern.search(text) is not None
+
+    def mask(self, texts: Sequence[str]) -> List[bool]:
+        """批量判断每段文本是否包含关键词"""
+        hits = [False] * len(texts)
+        if not texts:
+            return hits
+
+        # 记录每段文本在拼接结果中的起始位置
+        starts = []
+        offset = 0
+        for text in texts:
+            starts.append(offset)
+            offset += len(text) + 1
+
+        joined = _SEPARATOR.join(texts)
+        search = self.pattern.search
+        pos = 0
+        while True:
+            match = search(joined, pos)
+            if match is None:
+                break
+            index = bisect_right(starts, match.start()) - 1
+            hits[index] = True
+            # 已命中的文本无需继续扫描，直接跳到下一段
+            if index + 1 >= len(starts):
+                break
+            pos = starts[index + 1]
+
+        return hits
+
+    def reject(self, texts: Sequence[str]) -> List[str]:
+        """批量过滤，返回不包含关键词的文本"""
+        return [text for text, hit in zip(texts, self.mask(texts)) if not hit]
+
+
+PARAGRAPH_FILTER = KeywordFilter(SITE_KEYWORDS)
+LINE_FILTER = KeywordFilter(LINE_KEYWORDS)
+NAV_FILTER = KeywordFilter(NAV_KEYWORDS)
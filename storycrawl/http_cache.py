@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+持久化HTTP缓存 - 基于SQLite
+保存页面内容以及ETag/Last-Modified，用于再次爬取时发送条件请求（304），
+并按字节预算做LRU淘汰
+"""
+
+import os
+import sqlite3
+import time
+import zlib
+import hashlib
+import logging
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class CacheEntry:
+    url: str
+    body: str
+    etag: str = ""
+    last_modified: str = ""
+    validated_at: float = 0.0
+
+    def conditional_headers(self) -> Dict[str, str]:
+        """生成条件请求头"""
+        headers = {}
+        if self.etag:
+            headers['If-None-Match'] = self.etag
+        if self.last_modified:
+            headers['If-Modified-Since'] = self.last_modified
+        return headers
+
+
+class HttpCache:
+    def __init__(self, path: str = "http_cache.sqlite3", max_bytes: int = 512 * 1024 * 1024):
+        self.path = path
+        self.max_bytes = max_bytes
+
+        cache_dir = os.path.dirname(path)
+        if cache_dir and not os.path.exists(cache_dir):
+            os.makedirs(cache_dir)
+
+        self.conn = sqlite3.connect(path)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS pages (
+                key TEXT PRIMARY KEY,
+                url TEXT NOT NULL,
+                etag TEXT,
+                last_modified TEXT,
+                body BLOB NOT NULL,
+                size INTEGER NOT NULL,
+                validated_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )
+        """)
+        self.conn.execute('CREATE INDEX IF NOT EXISTS idx_pages_accessed ON pages (accessed_at)')
+        self.conn.commit()
+
+        row = self.conn.execute('SELECT COALESCE(SUM(size), 0) FROM pages').fetchone()
+        self.total_bytes = row[0]
+
+    def _key(self, url: str) -> str:
+        """生成缓存键"""
+        return hashlib.md5(url.encode()).hexdigest()
+
+    def get(self, url: str) -> Optional[CacheEntry]:
+        """读取缓存条目，同时刷新LRU访问时间"""
+        key = self._key(url)
+        row = self.conn.execute(
+            'SELECT etag, last_modified, body, validated_at FROM pages WHERE key = ?', (key,)
+        ).fetchone()
+        if not row:
+            return None
+
+        self.conn.execute('UPDATE pages SET accessed_at = ? WHERE key = ?', (time.time(), key))
+        self.conn.commit()
+
+        etag, last_modified, body, validated_at = row
+        return CacheEntry(
+            url=url,
+            body=zlib.decompress(body).decode('utf-8'),
+            etag=etag or "",
+            last_modified=last_modified or "",
+            validated_at=validated_at
+        )
+
+    def put(self, url: str, body: str, etag: Optional[str] = None, last_modified: Optional[str] = None):
+        """写入或更新缓存条目"""
+        key = self._key(url)
+        data = zlib.compress(body.encode('utf-8'))
+        now = time.time()
+
+        old = self.conn.execute('SELECT size FROM pages WHERE key = ?', (key,)).fetchone()
+        if old:
+            self.total_bytes -= old[0]
+
+        self.conn.execute(
+            'INSERT OR REPLACE INTO pages '
+            '(key, url, etag, last_modified, body, size, validated_at, accessed_at) '
+            'VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+            (key, url, etag, last_modified, data, len(data), now, now)
+        )
+        self.total_bytes += len(data)
+        self._evict()
+        self.conn.commit()
+
+    def mark_validated(self, url: str):
+        """收到304后更新验证时间"""
+        now = time.time()
+        self.conn.execute(
+            'UPDATE pages SET validated_at = ?, accessed_at = ? WHERE key = ?',
+            (now, now, self._key(url))
+        )
+        self.conn.commit()
+
+    def _evict(self):
+        """超过字节预算时，按最近最少使用淘汰"""
+        if self.total_bytes <= self.max_bytes:
+            return
+
+        evicted = 0
+        rows = self.conn.execute('SELECT key, size FROM pages ORDER BY accessed_at ASC')
+        victims = []
+        for key, size in rows:
+            if self.total_bytes <= self.max_bytes:
+                break
+            victims.append((key,))
+            self.total_bytes -= size
+            evicted += 1
+
+        self.conn.executemany('DELETE FROM pages WHERE key = ?', victims)
+        logger.debug(f"缓存淘汰 {evicted} 个页面，当前大小: {self.total_bytes} 字节")
+
+    def close(self):
+        """关闭数据库连接"""
+        if self.conn:
+            self.conn.commit()
+            self.conn.close()
+            self.conn = None
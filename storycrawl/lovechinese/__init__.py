@@ -0,0 +1,2 @@
+# -*- coding: utf-8 -*-
+"""lovechinese（www.lovechinese.org）的页面提取和输出格式"""
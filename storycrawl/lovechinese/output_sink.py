@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+lovechinese的故事输出 - text格式使用原有的文件命名和头部，jsonl / sqlite 与故事365相同
+- text: 每个故事一个txt文件，另有汇总JSON（原有格式）
+- jsonl: 按分片写入JSONL，可选gzip压缩
+- sqlite: 写入SQLite，每批一个事务
+"""
+
+import os
+import re
+from typing import Dict, Iterator, Optional
+
+from .. import output_sink
+from ..output_sink import OutputSink
+from ..story_manifest import STORY_FILE_RE
+
+# 故事文件中头部信息与正文的分隔线
+HEADER_SEPARATOR = "=" * 50 + "\n\n"
+
+
+class TextSink(output_sink.TextSink):
+    """每个故事一个txt文件，与原有保存格式相同；文件名使用列表页上的标题（list_title）"""
+
+    def filename(self, record: dict) -> str:
+        safe_title = re.sub(r'[^\w\s-]', '', record.get('list_title', record['title']))
+        safe_title = re.sub(r'[-\s]+', '-', safe_title)
+        return f"{record['id']}_{safe_title}.txt"
+
+    def render(self, record: dict) -> str:
+        return (f"标题: {record['title']}\n"
+                f"链接: {record['url']}\n"
+                f"ID: {record['id']}\n"
+                + HEADER_SEPARATOR
+                + record['content'])
+
+    @classmethod
+    def read(cls, stories_dir: str = "stories", **options) -> Iterator[dict]:
+        fields = {'标题': 'title', '链接': 'url', 'ID': 'id'}
+        for name in sorted(os.listdir(stories_dir)):
+            match = STORY_FILE_RE.match(name)
+            if not match:
+                continue
+            with open(os.path.join(stories_dir, name), encoding='utf-8') as f:
+                header, _, content = f.read().partition(HEADER_SEPARATOR)
+            record = {'id': match.group(1), 'title': '', 'url': '', 'content': content}
+            for line in header.splitlines():
+                key, _, value = line.partition(": ")
+                if key in fields:
+                    record[fields[key]] = value
+            yield record
+
+
+SINKS: Dict[str, type] = {**output_sink.SINKS, TextSink.name: TextSink}
+
+
+def create_sink(name: str = "text", stories_dir: str = "stories", options: Optional[dict] = None) -> OutputSink:
+    """按名称创建输出后端，options为对应后端的构造参数"""
+    return output_sink.create_sink(name, stories_dir, options, SINKS)
+
+
+def read_records(name: str = "text", stories_dir: str = "stories", options: Optional[dict] = None) -> Iterator[dict]:
+    """按输出格式读取目录中已保存的故事"""
+    return output_sink.read_records(name, stories_dir, options, SINKS)
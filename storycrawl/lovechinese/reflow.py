@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+段落重排 - 把短句合并成完整段落
+逐行处理，一次遍历中同时处理对话和破折号，段落完成即产出，
+不保留整篇文本的中间列表，可直接处理长篇合集或归档中的大量故事。
+"""
+
+import re
+from typing import Iterable, Iterator
+
+# 句子结尾：句末标点，或以引号结尾（对话结束）
+SENTENCE_ENDINGS = ('。', '！', '？', '"')
+
+# 作者信息行
+AUTHOR_PREFIX = '作者：'
+
+# 长行中的句末标点，出现两次及以上时该行单独成段
+_SENTENCE_PUNCT_RE = re.compile('[。！？]')
+
+# 超过该长度的行才检查是否包含多个句子
+LONG_LINE = 50
+
+
+def is_sentence_end(line: str) -> bool:
+    """判断是否是句子结尾"""
+    return line.endswith(SENTENCE_ENDINGS)
+
+
+def _has_sentences(line: str) -> bool:
+    """行中至少有两个句末标点"""
+    match = _SENTENCE_PUNCT_RE.search(line)
+    return match is not None and _SENTENCE_PUNCT_RE.search(line, match.end()) is not None
+
+
+def reflow(lines: Iterable[str]) -> Iterator[str]:
+    """把行合并成段落，依次产出段落
+
+    原文的空行产出''作为段落分隔，分隔不会连续出现，也不会出现在开头
+    """
+    paragraph = []
+    in_dialogue = False
+    after_text = False  # 上一个产出的是段落而不是分隔
+
+    for line in lines:
+        line = line.strip()
+        if not line:
+            # 空行，结束当前段落，保持一个空行作为段落分隔
+            if paragraph:
+                yield ''.join(paragraph)
+                paragraph = []
+                after_text = True
+            if after_text:
+                yield ''
+                after_text = False
+            continue
+
+        # 作者信息单独一行
+        if line.startswith(AUTHOR_PREFIX) or line.startswith('〔') and '〕' in line:
+            if paragraph:
+                yield ''.join(paragraph)
+                paragraph = []
+            yield line
+            after_text = True
+            continue
+
+        # 以破折号结尾的行与下一行相连；以破折号开头的行接在上一行之后，句子完整时结束段落
+        if line.endswith('—') and not line.endswith('——'):
+            paragraph.append(line)
+            continue
+        if line.startswith('—') and paragraph:
+            paragraph.append(line)
+            if is_sentence_end(line):
+                yield ''.join(paragraph)
+                paragraph = []
+                after_text = True
+            continue
+
+        if line.startswith('"'):
+            in_dialogue = True
+        paragraph.append(line)
+
+        if in_dialogue:
+            # 在对话中，只有对话结束才分段
+            end = line.endswith('"') and not line.endswith('："')
+            if end:
+                in_dialogue = False
+        else:
+            # 非对话状态，按句号等标点分段
+            end = is_sentence_end(line)
+
+        # 很长且包含多个句子的行也分段
+        if end or (len(line) > LONG_LINE and _has_sentences(line)):
+            yield ''.join(paragraph)
+            paragraph = []
+            after_text = True
+
+    if paragraph:
+        yield ''.join(paragraph)
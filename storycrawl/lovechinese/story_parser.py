@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+lovechinese页面解析 - 纯函数实现
+与 spider01 StorySpider 原有的 extract_story_list / extract_story 相同，
+不依赖爬虫实例，可在进程池/线程池中执行
+"""
+
+from contextlib import nullcontext
+from typing import Callable, ContextManager, List, Optional
+from urllib.parse import urljoin
+
+from .extract_backend import get_backend
+from .reflow import reflow
+
+# 阶段上下文：stage('parse') 等，用于按阶段性能剖析
+StageContext = Callable[[str], ContextManager]
+
+
+def _no_stage(stage: str) -> ContextManager:
+    return nullcontext()
+
+
+def parse_list_html(html: str, base_url: str, parser: str = "html.parser") -> List[dict]:
+    """从列表页面HTML中提取故事链接"""
+    backend = get_backend(parser)
+    doc = backend.parse(html)
+
+    stories = []
+
+    # 查找所有故事链接
+    for href, story_title in backend.story_links(doc):
+        story_url = urljoin(base_url, href)
+
+        if story_title and story_url:
+            stories.append({
+                'title': story_title,
+                'url': story_url,
+                'id': story_url.split('/')[-1]
+            })
+
+    return stories
+
+
+def parse_story_html(html: str, story_url: str, parser: str = "html.parser",
+                     stage: Optional[StageContext] = None) -> dict:
+    """从故事页面HTML中提取标题和正文；stage为各阶段的上下文（性能剖析）"""
+    stage = stage or _no_stage
+    backend = get_backend(parser)
+    with stage('parse'):
+        doc = backend.parse(html)
+
+    with stage('extract'):
+        # 提取故事标题
+        title = backend.title(doc)
+        if title is None:
+            title = "无标题"
+
+        # 提取故事内容 - 依次尝试常见的内容容器，
+        # 如果没有找到特定的内容容器，使用包含大量文本的div中得分最高的
+        content = ""
+        content_text = backend.content_text(doc)
+
+    if content_text is not None:
+        content = content_text
+
+        # 处理段落格式 - 将短句合并成完整段落
+        with stage('format'):
+            # 段落之间最多一个空行，只需去掉末尾的分隔
+            content = format_story_content(content).strip()
+
+    return {
+        'title': title,
+        'content': content,
+        'url': story_url
+    }
+
+
+def format_story_content(content: str) -> str:
+    """格式化故事内容，将短句合并成完整段落"""
+    return '\n'.join(reflow(content.split('\n')))
@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+爬取指标 - 各阶段耗时直方图和计数器
+- 阶段耗时: dns / connect / fetch / decode / parse / extract / clean / save
+- 计数: 传输字节数、缓存命中、按原因统计的重试、HTTP状态码等
+
+可导出为JSON和Prometheus文本格式，运行结束时导出，也可以按间隔定期导出，
+用于判断爬取慢在网络、解析还是磁盘。
+"""
+
+import json
+import os
+import threading
+import time
+import logging
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# 直方图桶上限（秒），覆盖从微秒级的解析到数十秒的超时
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+                   1.0, 2.5, 5.0, 10.0, 30.0)
+
+# 指标名前缀，Prometheus导出时使用
+PREFIX = "spider_"
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+def _labels(labels: Dict[str, object]) -> Labels:
+    return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+def _format_labels(labels: Labels, extra: Labels = ()) -> str:
+    pairs = labels + extra
+    if not pairs:
+        return ""
+    escaped = (key + '="' + value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') + '"'
+               for key, value in pairs)
+    return "{" + ",".join(escaped) + "}"
+
+
+def default_run_id() -> str:
+    """运行ID：启动时间和进程号"""
+    return f"{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}"
+
+
+class Histogram:
+    """累计桶直方图，与Prometheus的histogram相同"""
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # 最后一个是 +Inf
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        if value > self.max:
+            self.max = value
+
+    def quantile(self, q: float) -> float:
+        """按桶估算分位数（桶内线性插值）"""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        lower = 0.0
+        for i, count in enumerate(self.counts):
+            upper = self.buckets[i] if i < len(self.buckets) else self.max
+            if seen + count >= rank and count:
+                return lower + (upper - lower) * (rank - seen) / count
+            seen += count
+            lower = upper
+        return self.max
+
+    def to_dict(self) -> dict:
+        return {
+            'count': self.count,
+            'sum': self.sum,
+            'mean': self.sum / self.count if self.count else 0.0,
+            'max': self.max,
+            'p50': self.quantile(0.5),
+            'p95': self.quantile(0.95),
+            'p99': self.quantile(0.99),
+            'buckets': {str(le): n for le, n in zip(self.buckets + ('+Inf',), self._cumulative())},
+        }
+
+    def _cumulative(self) -> Iterator[int]:
+        total = 0
+        for count in self.counts:
+            total += count
+            yield total
+
+
+class Metrics:
+    """计数器和直方图的集合，线程安全"""
+
+    def __init__(self, run_id: Optional[str] = None, buckets=DEFAULT_BUCKETS):
+        self.run_id = run_id or default_run_id()
+        self.buckets = buckets
+        self.started = time.time()
+        self.counters: Dict[Tuple[str, Labels], float] = {}
+        self.histograms: Dict[Tuple[str, Labels], Histogram] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, name: str, value: float = 1, **labels):
+        """计数器加value"""
+        key = (name, _labels(labels))
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def observe(self, name: str, value: float, **labels):
+        """记录一次观测值"""
+        key = (name, _labels(labels))
+        with self._lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = Histogram(self.buckets)
+            histogram.observe(value)
+
+    def stage(self, stage: str, seconds: float):
+        """记录一个阶段的耗时"""
+        self.observe('stage_seconds', seconds, stage=stage)
+
+    @contextmanager
+    def time(self, stage: str):
+        """统计代码块耗时，计入对应阶段"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stage(stage, time.perf_counter() - started)
+
+    def counter(self, name: str, **labels) -> float:
+        return self.counters.get((name, _labels(labels)), 0)
+
+    def histogram(self, name: str, **labels) -> Optional[Histogram]:
+        return self.histograms.get((name, _labels(labels)))
+
+    def to_dict(self) -> dict:
+        with self._lock:
+            counters = [{'name': name, 'labels': dict(labels), 'value': value}
+                        for (name, labels), value in sorted(self.counters.items())]
+            histograms = [{'name': name, 'labels': dict(labels), **histogram.to_dict()}
+                          for (name, labels), histogram in sorted(self.histograms.items())]
+        return {
+            'run_id': self.run_id,
+            'started_at': self.started,
+            'exported_at': time.time(),
+            'uptime_seconds': time.time() - self.started,
+            'counters': counters,
+            'histograms': histograms,
+        }
+
+    def to_json(self) -> str:
+        return json.dumps(self.to_dict(), ensure_ascii=False, indent=2)
+
+    def to_prometheus(self) -> str:
+        """Prometheus文本格式，所有序列带run_id标签"""
+        run = (('run_id', self.run_id),)
+        lines = []
+        with self._lock:
+            declared = set()
+            for (name, labels), value in sorted(self.counters.items()):
+                metric = f"{PREFIX}{name}_total"
+                if metric not in declared:
+                    declared.add(metric)
+                    lines.append(f"# TYPE {metric} counter")
+                lines.append(f"{metric}{_format_labels(labels, run)} {value:g}")
+            for (name, labels), histogram in sorted(self.histograms.items()):
+                metric = f"{PREFIX}{name}"
+                if metric not in declared:
+                    declared.add(metric)
+                    lines.append(f"# TYPE {metric} histogram")
+                for le, count in zip(histogram.buckets + ('+Inf',), histogram._cumulative()):
+                    lines.append(f"{metric}_bucket{_format_labels(labels, run + (('le', str(le)),))} {count}")
+                lines.append(f"{metric}_sum{_format_labels(labels, run)} {histogram.sum:.6f}")
+                lines.append(f"{metric}_count{_format_labels(labels, run)} {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+    def export(self, directory: str):
+        """写入 metrics-{run_id}.json 和 metrics-{run_id}.prom，先写临时文件再替换"""
+        if not os.path.exists(directory):
+            os.makedirs(directory)
+        for suffix, text in (('json', self.to_json()), ('prom', self.to_prometheus())):
+            path = os.path.join(directory, f"metrics-{self.run_id}.{suffix}")
+            with open(path + ".tmp", 'w', encoding='utf-8') as f:
+                f.write(text)
+            os.replace(path + ".tmp", path)
+
+    def summary(self) -> str:
+        """各阶段耗时和主要计数的简要文本"""
+        lines = []
+        with self._lock:
+            stages = sorted((dict(labels)['stage'], histogram)
+                            for (name, labels), histogram in self.histograms.items() if name == 'stage_seconds')
+            counters = sorted(self.counters.items())
+        for stage, histogram in stages:
+            lines.append(f"{stage:<10} 次数 {histogram.count:>7}  合计 {histogram.sum:>9.2f}s  "
+                         f"p50 {histogram.quantile(0.5) * 1000:>8.1f}ms  p95 {histogram.quantile(0.95) * 1000:>8.1f}ms")
+        for (name, labels), value in counters:
+            label_text = ",".join(f"{key}={label}" for key, label in labels)
+            lines.append(f"{name}{'{' + label_text + '}' if label_text else ''} = {value:g}")
+        return "\n".join(lines)
+
+
+class MetricsExporter:
+    """在后台线程中按间隔导出指标，stop时再导出一次"""
+
+    def __init__(self, metrics: Metrics, directory: str, interval: float = 30.0):
+        self.metrics = metrics
+        self.directory = directory
+        self.interval = interval
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        if self._thread is None and self.interval > 0:
+            self._thread = threading.Thread(target=self._run, name='metrics-exporter', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while not self._stopped.wait(self.interval):
+            self._export()
+
+    def _export(self):
+        try:
+            self.metrics.export(self.directory)
+        except OSError as e:
+            logger.warning(f"导出指标失败: {e}")
+
+    def stop(self):
+        """停止定期导出，并导出最终结果"""
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self._export()
+        logger.info(f"指标已导出: {os.path.join(self.directory, f'metrics-{self.metrics.run_id}')}.json/.prom")
@@ -0,0 +1,304 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+故事输出 - 可替换的批量写入后端
+- text: 每个故事一个txt文件（故事365的原有格式，lovechinese的格式见 lovechinese.output_sink）
+- jsonl: 按分片写入JSONL，可选gzip压缩
+- sqlite: 写入SQLite，每批一个事务
+
+写入先进入缓冲区，由调用方在 full 为真时调用 flush 成批落盘。
+flush 是同步方法且线程安全，异步代码可以放到线程中执行。
+"""
+
+import gzip
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+import logging
+from typing import Dict, Iterator, List, Optional, Tuple
+from .story_manifest import STORY_FILE_RE, HEADER_SEPARATOR
+
+logger = logging.getLogger(__name__)
+
+# 落盘的故事及其所在文件
+Committed = List[Tuple[dict, str]]
+
+
+class OutputSink:
+    """输出后端接口，记录为包含 id/title/author/category/url/content 的字典"""
+    name = ""
+
+    def __init__(self, stories_dir: str = "stories", batch_size: int = 50, flush_interval: float = 5.0):
+        """
+        batch_size: 缓冲的故事数达到该数量时应当落盘
+        flush_interval: 距上次落盘超过该秒数时应当落盘
+        """
+        self.stories_dir = stories_dir
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.buffer: List[dict] = []
+        self.lock = threading.Lock()  # 串行化落盘
+        self._buffer_lock = threading.Lock()  # 保护缓冲区交换，落盘期间仍可写入
+        self._last_flush = time.monotonic()
+
+        if not os.path.exists(stories_dir):
+            os.makedirs(stories_dir)
+
+    def exists(self, record: dict) -> bool:
+        """故事是否已在输出中（只有能低成本判断的后端实现）"""
+        return False
+
+    def write(self, record: dict):
+        """把故事放入缓冲区"""
+        with self._buffer_lock:
+            self.buffer.append(record)
+
+    @property
+    def full(self) -> bool:
+        """缓冲区是否应当落盘"""
+        if not self.buffer:
+            return False
+        return (len(self.buffer) >= self.batch_size
+                or time.monotonic() - self._last_flush >= self.flush_interval)
+
+    def flush(self) -> Committed:
+        """把缓冲区成批写入，返回已落盘的故事"""
+        with self.lock:
+            with self._buffer_lock:
+                batch, self.buffer = self.buffer, []
+                self._last_flush = time.monotonic()
+            if not batch:
+                return []
+            return self._write_batch(batch)
+
+    def _write_batch(self, batch: List[dict]) -> Committed:
+        raise NotImplementedError
+
+    def close(self) -> Committed:
+        """写入剩余的缓冲并释放资源"""
+        return self.flush()
+
+    @classmethod
+    def read(cls, stories_dir: str = "stories", **options) -> Iterator[dict]:
+        """读取目录中已保存的故事，options与构造参数相同"""
+        raise NotImplementedError
+
+
+class TextSink(OutputSink):
+    """每个故事一个txt文件，与原有保存格式相同"""
+    name = "text"
+
+    def filename(self, record: dict) -> str:
+        # 清理文件名
+        safe_title = re.sub(r'[<>:"/\\|?*]', '', record['title'])
+        safe_title = safe_title.replace(' ', '_')
+        return f"{record['id']}_{safe_title}.txt"
+
+    def exists(self, record: dict) -> bool:
+        return os.path.exists(os.path.join(self.stories_dir, self.filename(record)))
+
+    def render(self, record: dict) -> str:
+        lines = [f"标题: {record['title']}\n"]
+        if record.get('author'):
+            lines.append(f"作者: {record['author']}\n")
+        if record.get('category'):
+            lines.append(f"分类: {record['category']}\n")
+        lines.append(f"来源: {record['url']}\n")
+        lines.append(HEADER_SEPARATOR)
+        lines.append(record['content'])
+        return ''.join(lines)
+
+    @classmethod
+    def read(cls, stories_dir: str = "stories", **options) -> Iterator[dict]:
+        fields = {'标题': 'title', '作者': 'author', '分类': 'category', '来源': 'url'}
+        for name in sorted(os.listdir(stories_dir)):
+            match = STORY_FILE_RE.match(name)
+            if not match:
+                continue
+            with open(os.path.join(stories_dir, name), encoding='utf-8') as f:
+                header, _, content = f.read().partition(HEADER_SEPARATOR)
+            record = {'id': match.group(1), 'title': '', 'author': '', 'category': '', 'url': '',
+                      'content': content}
+            for line in header.splitlines():
+                key, _, value = line.partition(": ")
+                if key in fields:
+                    record[fields[key]] = value
+            yield record
+
+    def _write_batch(self, batch: List[dict]) -> Committed:
+        committed = []
+        for record in batch:
+            filename = self.filename(record)
+            try:
+                # 整个文件一次写入
+                with open(os.path.join(self.stories_dir, filename), 'w', encoding='utf-8') as f:
+                    f.write(self.render(record))
+            except OSError as e:
+                logger.error(f"保存失败 {filename}: {e}")
+                continue
+            committed.append((record, filename))
+        return committed
+
+
+class JsonlSink(OutputSink):
+    """按分片写入JSONL，每行一个故事"""
+    name = "jsonl"
+
+    def __init__(self, stories_dir: str = "stories", batch_size: int = 50, flush_interval: float = 5.0,
+                 shard_size: int = 1000, compress: bool = False):
+        """
+        shard_size: 每个分片的故事数
+        compress: 是否gzip压缩分片
+        """
+        super().__init__(stories_dir, batch_size, flush_interval)
+        self.shard_size = shard_size
+        self.compress = compress
+        self.suffix = ".jsonl.gz" if compress else ".jsonl"
+        self._file = None
+        self._shard_name = ""
+        self._shard_count = 0  # 当前分片中的故事数
+
+        # 每次运行从新分片开始，不改动已有分片
+        shard_re = re.compile(r'^stories-(\d+)\.jsonl(\.gz)?$')
+        existing = [int(match.group(1)) for match in map(shard_re.match, os.listdir(stories_dir)) if match]
+        self._shard_index = max(existing, default=-1) + 1
+
+    def _open_shard(self):
+        self._close_shard()
+        self._shard_name = f"stories-{self._shard_index:05d}{self.suffix}"
+        self._shard_index += 1
+        self._shard_count = 0
+        path = os.path.join(self.stories_dir, self._shard_name)
+        if self.compress:
+            self._file = gzip.open(path, 'wt', encoding='utf-8')
+        else:
+            self._file = open(path, 'w', encoding='utf-8')
+
+    def _close_shard(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def _write_batch(self, batch: List[dict]) -> Committed:
+        committed = []
+        pending = []
+        for record in batch:
+            if self._file is None or self._shard_count >= self.shard_size:
+                if pending:
+                    self._file.write(''.join(pending))
+                    pending = []
+                self._open_shard()
+            pending.append(json.dumps(record, ensure_ascii=False) + "\n")
+            self._shard_count += 1
+            committed.append((record, self._shard_name))
+        self._file.write(''.join(pending))
+        self._file.flush()
+        return committed
+
+    def close(self) -> Committed:
+        committed = self.flush()
+        with self.lock:
+            self._close_shard()
+        return committed
+
+    @classmethod
+    def read(cls, stories_dir: str = "stories", **options) -> Iterator[dict]:
+        shard_re = re.compile(r'^stories-(\d+)\.jsonl(\.gz)?$')
+        shards = sorted((int(match.group(1)), match.group(0))
+                        for match in map(shard_re.match, os.listdir(stories_dir)) if match)
+        for _, name in shards:
+            path = os.path.join(stories_dir, name)
+            opener = gzip.open if name.endswith(".gz") else open
+            with opener(path, 'rt', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        yield json.loads(line)
+                    except ValueError:
+                        # 中断时可能留下不完整的最后一行
+                        continue
+
+
+class SqliteSink(OutputSink):
+    """写入SQLite数据库，每批一个事务"""
+    name = "sqlite"
+
+    def __init__(self, stories_dir: str = "stories", batch_size: int = 50, flush_interval: float = 5.0,
+                 filename: str = "stories.sqlite3"):
+        super().__init__(stories_dir, batch_size, flush_interval)
+        self.filename = filename
+        # flush可能在其他线程中执行，由self.lock保证串行
+        self.conn = sqlite3.connect(os.path.join(stories_dir, filename), check_same_thread=False)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS stories (
+                id TEXT PRIMARY KEY,
+                title TEXT NOT NULL,
+                author TEXT,
+                category TEXT,
+                url TEXT NOT NULL,
+                content TEXT NOT NULL,
+                saved_at REAL NOT NULL
+            )
+        """)
+        self.conn.commit()
+
+    def _write_batch(self, batch: List[dict]) -> Committed:
+        now = time.time()
+        with self.conn:
+            self.conn.executemany(
+                'INSERT OR REPLACE INTO stories (id, title, author, category, url, content, saved_at) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?)',
+                [(r['id'], r['title'], r.get('author', ''), r.get('category', ''), r['url'], r['content'], now)
+                 for r in batch]
+            )
+        return [(record, self.filename) for record in batch]
+
+    def close(self) -> Committed:
+        committed = self.flush()
+        with self.lock:
+            self.conn.close()
+        return committed
+
+    @classmethod
+    def read(cls, stories_dir: str = "stories", **options) -> Iterator[dict]:
+        path = os.path.join(stories_dir, options.get('filename', "stories.sqlite3"))
+        if not os.path.exists(path):
+            return
+        conn = sqlite3.connect(path)
+        conn.row_factory = sqlite3.Row
+        try:
+            for row in conn.execute('SELECT id, title, author, category, url, content FROM stories ORDER BY rowid'):
+                yield dict(row)
+        finally:
+            conn.close()
+
+
+SINKS: Dict[str, type] = {
+    TextSink.name: TextSink,
+    JsonlSink.name: JsonlSink,
+    SqliteSink.name: SqliteSink,
+}
+
+
+def create_sink(name: str = "text", stories_dir: str = "stories", options: Optional[dict] = None,
+                sinks: Dict[str, type] = SINKS) -> OutputSink:
+    """按名称创建输出后端，options为对应后端的构造参数；sinks为站点的输出后端（默认故事365）"""
+    try:
+        sink_class = sinks[name]
+    except KeyError:
+        raise ValueError(f"不支持的输出格式: {name}，可选: {', '.join(sinks)}") from None
+    return sink_class(stories_dir, **(options or {}))
+
+
+def read_records(name: str = "text", stories_dir: str = "stories", options: Optional[dict] = None,
+                 sinks: Dict[str, type] = SINKS) -> Iterator[dict]:
+    """按输出格式读取目录中已保存的故事"""
+    try:
+        sink_class = sinks[name]
+    except KeyError:
+        raise ValueError(f"不支持的输出格式: {name}，可选: {', '.join(sinks)}") from None
+    return sink_class.read(stories_dir, **(options or {}))
@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+原始页面归档 - 类似WARC的只追加存档
+每条记录包含URL、状态码、响应头和zlib压缩的响应体，
+旁边的索引文件记录URL到文件偏移的映射，可随机读取，也可顺序流式读取。
+改进提取规则后直接从本地字节重新提取，无需重新爬取。
+
+文件布局（目录下）:
+    pages-00000.arc   记录: "ARC-RECORD {json头}\\n" + 压缩体 + "\\n"
+    index.cdx         索引: URL \\t 文件名 \\t 偏移 \\t 记录长度 \\t 状态码 \\t 时间
+"""
+
+import json
+import os
+import re
+import sys
+import time
+import zlib
+import logging
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+RECORD_MAGIC = b"ARC-RECORD "
+INDEX_NAME = "index.cdx"
+ARCHIVE_FILE_RE = re.compile(r'^pages-(\d+)\.arc$')
+
+
+@dataclass
+class ArchiveRecord:
+    url: str
+    status: int
+    body: bytes
+    headers: Dict[str, str] = field(default_factory=dict)
+    fetched_at: float = 0.0
+
+    def text(self, encoding: str = 'utf-8') -> str:
+        """按指定编码解码响应体"""
+        return self.body.decode(encoding, errors='ignore')
+
+
+def _encode_record(record: ArchiveRecord) -> bytes:
+    body = zlib.compress(record.body)
+    header = {
+        'url': record.url,
+        'status': record.status,
+        'headers': record.headers,
+        'fetched_at': record.fetched_at,
+        'length': len(body),
+    }
+    return RECORD_MAGIC + json.dumps(header, ensure_ascii=False).encode('utf-8') + b"\n" + body + b"\n"
+
+
+def _read_record(f) -> Optional[ArchiveRecord]:
+    """从当前位置读取一条记录，文件结束或记录不完整时返回None"""
+    line = f.readline()
+    if not line.startswith(RECORD_MAGIC) or not line.endswith(b"\n"):
+        return None
+    header = json.loads(line[len(RECORD_MAGIC):])
+    body = f.read(header['length'])
+    if len(body) < header['length'] or f.read(1) != b"\n":
+        # 中断时写了一半的记录
+        return None
+    return ArchiveRecord(
+        url=header['url'],
+        status=header['status'],
+        body=zlib.decompress(body),
+        headers=header.get('headers', {}),
+        fetched_at=header.get('fetched_at', 0.0),
+    )
+
+
+def archive_files(directory: str) -> list:
+    """目录中的归档文件，按编号排序"""
+    if not os.path.isdir(directory):
+        return []
+    names = [name for name in os.listdir(directory) if ARCHIVE_FILE_RE.match(name)]
+    return sorted(names, key=lambda name: int(ARCHIVE_FILE_RE.match(name).group(1)))
+
+
+def iter_records(directory: str) -> Iterator[ArchiveRecord]:
+    """按写入顺序流式读取全部记录，不依赖索引"""
+    for name in archive_files(directory):
+        with open(os.path.join(directory, name), 'rb') as f:
+            while True:
+                record = _read_record(f)
+                if record is None:
+                    break
+                yield record
+
+
+class PageArchive:
+    def __init__(self, directory: str = "page_archive", max_file_bytes: int = 1024 * 1024 * 1024):
+        """max_file_bytes: 单个归档文件的大小上限，超出后写入新文件"""
+        self.directory = directory
+        self.max_file_bytes = max_file_bytes
+        self.index: Dict[str, Tuple[str, int, int]] = {}  # URL -> (文件名, 偏移, 长度)，同一URL以最后一次为准
+
+        if not os.path.exists(directory):
+            os.makedirs(directory)
+
+        self._load_index()
+
+        # 每次运行从新文件开始：上次中断留下的半条记录只会出现在旧文件末尾
+        files = archive_files(directory)
+        self._file_index = int(ARCHIVE_FILE_RE.match(files[-1]).group(1)) + 1 if files else 0
+        self._file = None
+        self._file_name = ""
+        self._index_file = open(os.path.join(directory, INDEX_NAME), 'a', encoding='utf-8')
+        if self._index_file.tell() and not self._index_ends_with_newline():
+            # 不完整的最后一行单独成行，新的索引行不会接在它后面
+            self._index_file.write("\n")
+
+    def _index_ends_with_newline(self) -> bool:
+        with open(os.path.join(self.directory, INDEX_NAME), 'rb') as f:
+            f.seek(-1, os.SEEK_END)
+            return f.read(1) == b"\n"
+
+    def _load_index(self):
+        path = os.path.join(self.directory, INDEX_NAME)
+        if not os.path.exists(path):
+            return
+        with open(path, encoding='utf-8') as f:
+            for line in f:
+                parts = line.rstrip("\n").split("\t")
+                if not line.endswith("\n") or len(parts) < 4:
+                    # 中断时可能留下不完整的最后一行
+                    continue
+                self.index[parts[0]] = (parts[1], int(parts[2]), int(parts[3]))
+
+    def rebuild_index(self):
+        """扫描归档文件重建索引（索引文件丢失或落后时使用）"""
+        self._index_file.close()
+        self.index.clear()
+        with open(os.path.join(self.directory, INDEX_NAME), 'w', encoding='utf-8') as index_file:
+            for name in archive_files(self.directory):
+                with open(os.path.join(self.directory, name), 'rb') as f:
+                    while True:
+                        offset = f.tell()
+                        record = _read_record(f)
+                        if record is None:
+                            break
+                        length = f.tell() - offset
+                        self.index[record.url] = (name, offset, length)
+                        index_file.write(f"{record.url}\t{name}\t{offset}\t{length}\t{record.status}\t{record.fetched_at:.3f}\n")
+        self._index_file = open(os.path.join(self.directory, INDEX_NAME), 'a', encoding='utf-8')
+        logger.info(f"归档索引已重建: {len(self.index)} 个URL")
+
+    def __contains__(self, url: str) -> bool:
+        return url in self.index
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def _current_file(self, size: int):
+        if self._file is not None and self._file.tell() + size > self.max_file_bytes and self._file.tell():
+            self._file.close()
+            self._file = None
+            self._file_index += 1
+        if self._file is None:
+            self._file_name = f"pages-{self._file_index:05d}.arc"
+            self._file = open(os.path.join(self.directory, self._file_name), 'ab')
+        return self._file
+
+    def write(self, url: str, status: int, body: bytes, headers: Optional[Dict[str, str]] = None):
+        """追加一条响应记录"""
+        record = ArchiveRecord(url=url, status=status, body=body, headers=dict(headers or {}),
+                               fetched_at=time.time())
+        data = _encode_record(record)
+        f = self._current_file(len(data))
+        offset = f.tell()
+        f.write(data)
+        # 记录先落盘，缓冲中的索引行不会指向尚未写入的记录
+        f.flush()
+        self.index[url] = (self._file_name, offset, len(data))
+        self._index_file.write(f"{url}\t{self._file_name}\t{offset}\t{len(data)}\t{status}\t{record.fetched_at:.3f}\n")
+
+    def get(self, url: str) -> Optional[ArchiveRecord]:
+        """按索引读取URL最近一次的记录"""
+        location = self.index.get(url)
+        if location is None:
+            return None
+        name, offset, _ = location
+        with open(os.path.join(self.directory, name), 'rb') as f:
+            f.seek(offset)
+            return _read_record(f)
+
+    def latest(self) -> Iterator[ArchiveRecord]:
+        """每个URL最近一次的记录，按文件和偏移顺序读取"""
+        locations = sorted(self.index.values())
+        current_name, f = None, None
+        try:
+            for name, offset, _ in locations:
+                if name != current_name:
+                    if f is not None:
+                        f.close()
+                    current_name, f = name, open(os.path.join(self.directory, name), 'rb')
+                f.seek(offset)
+                record = _read_record(f)
+                if record is not None:
+                    yield record
+        finally:
+            if f is not None:
+                f.close()
+
+    def flush(self):
+        if self._file is not None:
+            self._file.flush()
+        self._index_file.flush()
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        self._index_file.close()
+
+
+if __name__ == "__main__":
+    # 列出归档中的记录: python -m storycrawl.page_archive [归档目录]
+    directory = sys.argv[1] if len(sys.argv) > 1 else "page_archive"
+    count = 0
+    total_bytes = 0
+    for record in iter_records(directory):
+        count += 1
+        total_bytes += len(record.body)
+        print(f"{record.status}\t{len(record.body)}\t{record.url}")
+    print(f"共 {count} 条记录，{total_bytes / 1024 / 1024:.1f} MB")
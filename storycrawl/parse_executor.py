@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+解析执行器 - 把CPU密集的HTML解析移出事件循环
+支持三种模式：
+- process: 进程池，多核并行解析
+- thread: 线程池，避免阻塞事件循环
+- inline: 在事件循环中直接解析（原有行为）
+"""
+
+import asyncio
+import logging
+import os
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+PARSE_MODES = ('process', 'thread', 'inline')
+
+
+class ParseExecutor:
+    def __init__(self, mode: str = 'inline', max_workers: Optional[int] = None):
+        if mode not in PARSE_MODES:
+            raise ValueError(f"不支持的解析模式: {mode}，可选: {', '.join(PARSE_MODES)}")
+
+        self.mode = mode
+        self.max_workers = max_workers
+        self.executor: Optional[Executor] = None
+
+    @property
+    def concurrency(self) -> int:
+        """可同时执行的解析任务数"""
+        if self.mode == 'inline':
+            return 1
+        return self.max_workers or os.cpu_count() or 1
+
+    def start(self):
+        """创建工作池"""
+        if self.executor is not None:
+            return
+
+        if self.mode == 'process':
+            self.executor = ProcessPoolExecutor(max_workers=self.max_workers)
+        elif self.mode == 'thread':
+            self.executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='parse')
+
+        if self.executor is not None:
+            logger.info(f"解析执行器已启动: {self.mode} (workers={self.max_workers or '默认'})")
+
+    async def run(self, func: Callable[..., Any], *args) -> Any:
+        """执行解析函数，func及参数需可被pickle（进程池模式）"""
+        if self.mode == 'inline':
+            return func(*args)
+
+        if self.executor is None:
+            self.start()
+
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, func, *args)
+
+    def shutdown(self):
+        """关闭工作池"""
+        if self.executor is not None:
+            self.executor.shutdown(wait=True)
+            self.executor = None
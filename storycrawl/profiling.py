@@ -0,0 +1,306 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+性能剖析 - 按爬取阶段统计CPU和内存，默认关闭
+- cpu: 每个阶段一个cProfile，输出 .prof（可用 snakeviz 等查看）和按累计耗时排序的文本；
+  进程内同一时刻只有一个阶段做CPU剖析（Python 3.12起只允许一个剖析工具）
+- stack: 后台线程定时采样各线程调用栈，输出折叠栈（collapsed stacks），可直接生成火焰图
+- memory: tracemalloc记录每个阶段的内存峰值和保留量，并按间隔保存阶段前后的快照差异
+
+所有输出文件名带运行ID，与运行指标的文件对应。
+"""
+
+import cProfile
+import io
+import os
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+import logging
+from collections import Counter
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, List, Optional, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+PROFILE_MODES = ('cpu', 'stack', 'memory')
+
+
+def default_run_id() -> str:
+    """运行ID：启动时间和进程号"""
+    return f"{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}"
+
+
+def parse_modes(profile: Union[bool, str, Iterable[str], None]) -> Tuple[str, ...]:
+    """profile参数：True表示全部，也可以是 'cpu,stack' 这样的字符串或列表"""
+    if not profile:
+        return ()
+    if profile is True:
+        return PROFILE_MODES
+    if isinstance(profile, str):
+        profile = [mode.strip() for mode in profile.split(',') if mode.strip()]
+    modes = tuple(profile)
+    for mode in modes:
+        if mode not in PROFILE_MODES:
+            raise ValueError(f"不支持的剖析模式: {mode}，可选: {', '.join(PROFILE_MODES)}")
+    return modes
+
+
+class StackSampler:
+    """定时采样调用栈，按 线程;阶段;调用栈 计数"""
+
+    def __init__(self, interval: float = 0.005, stage_of: Callable[[int], Optional[str]] = None):
+        self.interval = interval
+        self.stage_of = stage_of or (lambda ident: None)
+        self.samples: Counter = Counter()
+        self._frame_names: Dict[object, str] = {}
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='stack-sampler', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _frame_name(self, code) -> str:
+        name = self._frame_names.get(code)
+        if name is None:
+            name = f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+            self._frame_names[code] = name
+        return name
+
+    def _run(self):
+        own = threading.get_ident()
+        while not self._stopped.wait(self.interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(self._frame_name(frame.f_code))
+                    frame = frame.f_back
+                stack.append(self.stage_of(ident) or '-')
+                stack.append(names.get(ident, str(ident)))
+                self.samples[';'.join(reversed(stack))] += 1
+
+    def write(self, path: str):
+        """折叠栈格式：每行 "帧;帧;帧 次数"，可用 flamegraph.pl 或 speedscope 打开"""
+        with open(path, 'w', encoding='utf-8') as f:
+            for stack, count in sorted(self.samples.items()):
+                f.write(f"{stack} {count}\n")
+
+
+class StageMemory:
+    """一个阶段的内存统计（字节）"""
+
+    def __init__(self):
+        self.count = 0
+        self.peak = 0  # 阶段内相对开始时的最大增长
+        self.retained = 0  # 各次阶段结束后仍保留的内存之和
+
+    def to_text(self, stage: str) -> str:
+        mean = self.retained / self.count if self.count else 0
+        return (f"{stage:<12} 次数 {self.count:>7}  峰值增长 {self.peak / 1024:>10.1f}KB  "
+                f"平均保留 {mean / 1024:>8.1f}KB")
+
+
+class Profiler:
+    """按阶段剖析CPU和内存
+
+    用法:
+        profiler = Profiler('profiles', run_id, modes=('cpu', 'memory'))
+        profiler.start()
+        with profiler.stage('parse'):
+            ...
+        profiler.stop()  # 写入全部结果
+
+    同一线程内嵌套的阶段只由最外层统计。CPU剖析全进程同一时刻只有一个：
+    其他线程的阶段正在剖析时，新进入的阶段不做CPU剖析，只计入跳过次数
+    （写在剖析文本的开头），调试器等其他剖析工具占用时也同样跳过。Python 3.12起
+    cProfile记录全进程的调用，剖析期间其他线程的调用也会计入该阶段；
+    tracemalloc的峰值是全进程的，多个线程同时处于某个阶段时峰值只能作为上限参考。
+    """
+
+    def __init__(self, directory: str, run_id: Optional[str] = None, modes: Iterable[str] = PROFILE_MODES,
+                 sample_interval: float = 0.005, snapshot_every: int = 100, memory_frames: int = 8, top: int = 40):
+        self.directory = directory
+        self.run_id = run_id or default_run_id()
+        self.modes = parse_modes(modes)
+        self.snapshot_every = snapshot_every
+        self.memory_frames = memory_frames
+        self.top = top
+        self.profiles: Dict[str, cProfile.Profile] = {}  # 阶段 -> cProfile
+        self.cpu_skipped: Counter = Counter()  # 阶段 -> 因CPU剖析被占用而跳过的次数
+        self.memory: Dict[str, StageMemory] = {}
+        self.snapshot_files: List[str] = []
+        self._active: Dict[int, str] = {}  # 线程 -> 正在剖析的阶段
+        self._lock = threading.Lock()
+        self._cpu_busy = False  # 是否有阶段正在CPU剖析
+        self._cpu_conflict_logged = False
+        self._started_tracemalloc = False
+        self.sampler = StackSampler(sample_interval, self._active.get) if 'stack' in self.modes else None
+
+    def start(self):
+        if 'memory' in self.modes and not tracemalloc.is_tracing():
+            tracemalloc.start(self.memory_frames)
+            self._started_tracemalloc = True
+        if self.sampler:
+            self.sampler.start()
+        logger.info(f"性能剖析已启用: {', '.join(self.modes)} ({self.run_id})")
+
+    @contextmanager
+    def stage(self, name: str):
+        """剖析代码块，计入对应阶段"""
+        ident = threading.get_ident()
+        if ident in self._active:
+            yield
+            return
+
+        self._active[ident] = name
+        profile = memory = None
+        try:
+            memory = self._memory_start(name) if 'memory' in self.modes else None
+            profile = self._cpu_start(name) if 'cpu' in self.modes else None
+            yield
+        finally:
+            if profile is not None:
+                self._cpu_stop(profile)
+            if memory is not None:
+                self._memory_end(name, *memory)
+            del self._active[ident]
+
+    def run(self, stage: str, func: Callable, *args):
+        """在阶段内调用函数，用于提交到线程池"""
+        with self.stage(stage):
+            return func(*args)
+
+    def _cpu_start(self, stage: str) -> Optional[cProfile.Profile]:
+        """占用CPU剖析并开始剖析阶段；已被其他阶段或其他剖析工具占用时返回None"""
+        with self._lock:
+            if self._cpu_busy:
+                self.cpu_skipped[stage] += 1
+                return None
+            self._cpu_busy = True
+            profile = self.profiles.get(stage) or cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError as e:
+            # Python 3.12起进程内只能有一个剖析工具，例如调试器或coverage正在运行
+            with self._lock:
+                self._cpu_busy = False
+                self.cpu_skipped[stage] += 1
+            if not self._cpu_conflict_logged:
+                self._cpu_conflict_logged = True
+                logger.warning(f"其他剖析工具正在运行，跳过CPU剖析: {e}")
+            return None
+        with self._lock:
+            self.profiles[stage] = profile
+        return profile
+
+    def _cpu_stop(self, profile: cProfile.Profile):
+        profile.disable()
+        with self._lock:
+            self._cpu_busy = False
+
+    def _memory_start(self, stage: str):
+        with self._lock:
+            stats = self.memory.setdefault(stage, StageMemory())
+            stats.count += 1
+            take_snapshot = self.snapshot_every > 0 and (stats.count - 1) % self.snapshot_every == 0
+        before = tracemalloc.take_snapshot() if take_snapshot else None
+        tracemalloc.reset_peak()
+        return tracemalloc.get_traced_memory()[0], before
+
+    def _memory_end(self, stage: str, current_before: int, snapshot_before):
+        current, peak = tracemalloc.get_traced_memory()
+        with self._lock:
+            stats = self.memory[stage]
+            stats.peak = max(stats.peak, peak - current_before)
+            stats.retained += current - current_before
+            number = stats.count
+        if snapshot_before is not None:
+            self._write_snapshot_diff(stage, number, snapshot_before, tracemalloc.take_snapshot(),
+                                      peak - current_before)
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.directory, name)
+
+    def _write_snapshot_diff(self, stage: str, number: int, before, after, peak: int):
+        """阶段结束时相对开始时新增的内存，按分配位置排序"""
+        if not os.path.exists(self.directory):
+            os.makedirs(self.directory)
+        ignore = [tracemalloc.Filter(False, tracemalloc.__file__), tracemalloc.Filter(False, __file__)]
+        diff = after.filter_traces(ignore).compare_to(before.filter_traces(ignore), 'traceback')
+        path = self._path(f"memory-{self.run_id}-{stage}-{number}.txt")
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(f"阶段 {stage} 第{number}次: 峰值增长 {peak / 1024:.1f}KB\n\n")
+            for stat in diff[:self.top]:
+                if stat.size_diff <= 0:
+                    continue
+                f.write(f"+{stat.size_diff / 1024:.1f}KB  {stat.count_diff:+d} 个对象\n")
+                for line in stat.traceback.format(most_recent_first=True):
+                    f.write(f"    {line}\n")
+                f.write("\n")
+        self.snapshot_files.append(path)
+
+    def stop(self) -> List[str]:
+        """停止剖析并写入结果，返回写入的文件"""
+        if self.sampler:
+            self.sampler.stop()
+        if not os.path.exists(self.directory):
+            os.makedirs(self.directory)
+
+        written = []
+        for stage, profile in sorted(self.profiles.items()):
+            stats = pstats.Stats(profile)
+            path = self._path(f"profile-{self.run_id}-{stage}")
+            stats.dump_stats(path + ".prof")
+            text = io.StringIO()
+            if self.cpu_skipped[stage]:
+                text.write(f"CPU剖析被占用，跳过 {self.cpu_skipped[stage]} 次\n")
+            stats.stream = text
+            stats.sort_stats('cumulative').print_stats(self.top)
+            with open(path + ".txt", 'w', encoding='utf-8') as f:
+                f.write(text.getvalue())
+            written += [path + ".prof", path + ".txt"]
+
+        if self.sampler:
+            path = self._path(f"stacks-{self.run_id}.folded")
+            self.sampler.write(path)
+            written.append(path)
+
+        if self.memory:
+            path = self._path(f"memory-{self.run_id}.txt")
+            with open(path, 'w', encoding='utf-8') as f:
+                for stage, stats in sorted(self.memory.items()):
+                    f.write(stats.to_text(stage) + "\n")
+                if self.snapshot_files:
+                    f.write("\n快照差异:\n")
+                    f.write("".join(f"  {os.path.basename(name)}\n" for name in self.snapshot_files))
+            written.append(path)
+            written += self.snapshot_files
+
+        if self._started_tracemalloc:
+            tracemalloc.stop()
+            self._started_tracemalloc = False
+        logger.info(f"性能剖析结果已写入 {self.directory}: {len(written)} 个文件")
+        return written
+
+
+def create_profiler(profile, directory: str, run_id: Optional[str] = None, **options) -> Optional[Profiler]:
+    """profile为空时返回None（不剖析）"""
+    modes = parse_modes(profile)
+    if not modes:
+        return None
+    profiler = Profiler(directory, run_id, modes, **options)
+    profiler.start()
+    return profiler
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+按主机的令牌桶限速器
+请求速率（每秒请求数 + 突发量）与并发连接数分开控制：
+等待令牌的协程不占用并发名额
+"""
+
+import asyncio
+import time
+from typing import Dict, Optional
+from urllib.parse import urlparse
+
+
+class TokenBucket:
+    def __init__(self, rate: float, burst: int = 1):
+        if rate <= 0:
+            raise ValueError("rate必须大于0")
+        self.rate = rate
+        self.burst = max(1, burst)
+        self.tokens = float(self.burst)
+        self.updated = time.monotonic()
+
+    def set_rate(self, rate: float):
+        """调整速率，已积累的令牌保留"""
+        self._refill()
+        self.rate = rate
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self):
+        """获取一个令牌，令牌不足时等待
+
+        先预订令牌再等待（令牌数可以为负），等待者按到达顺序依次放行
+        """
+        self._refill()
+        self.tokens -= 1
+        if self.tokens >= 0:
+            return
+
+        try:
+            await asyncio.sleep(-self.tokens / self.rate)
+        except asyncio.CancelledError:
+            # 取消时归还预订的令牌
+            self.tokens += 1
+            raise
+
+
+class HostRateLimiter:
+    def __init__(self, rate: Optional[float], burst: int = 1):
+        """rate为每个主机每秒的请求数，None表示不限速"""
+        self.rate = rate
+        self.burst = burst
+        self.buckets: Dict[str, TokenBucket] = {}
+
+    def set_rate(self, rate: float, url: Optional[str] = None):
+        """调整所有主机的速率；指定url时只调整该URL所属主机"""
+        if url is not None:
+            bucket = self.bucket(url)
+            if bucket is not None:
+                bucket.set_rate(rate)
+            return
+        self.rate = rate
+        for bucket in self.buckets.values():
+            bucket.set_rate(rate)
+
+    def bucket(self, url: str) -> Optional[TokenBucket]:
+        """获取URL所属主机的令牌桶"""
+        if not self.rate:
+            return None
+        host = urlparse(url).netloc
+        bucket = self.buckets.get(host)
+        if bucket is None:
+            bucket = self.buckets[host] = TokenBucket(self.rate, self.burst)
+        return bucket
+
+    async def acquire(self, url: str):
+        """按URL所属主机限速"""
+        bucket = self.bucket(url)
+        if bucket is not None:
+            await bucket.acquire()
@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+离线重新提取 - 从原始页面归档中重新解析故事，不发起网络请求
+用进程池在全部CPU核心上运行与爬取时相同的站点适配器提取（site_adapter.parse_story），
+结果按该站点的输出格式写入新的输出目录，并与之前的输出逐字段对比。
+
+用法:
+    python -m storycrawl.reextract page_archive stories_new --compare stories --parser lxml
+    python -m storycrawl.reextract page_archive stories_new --site lovechinese
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from .gushi365.story_parser import StoryInfo
+from .output_sink import SINKS
+from .page_archive import PageArchive
+from .site_adapter import ADAPTERS, SiteAdapter, get_adapter
+
+# 参与对比的字段
+FIELDS = {
+    'gushi365': ('title', 'author', 'category', 'content'),
+    'lovechinese': ('title', 'content'),
+}
+
+
+def _extract_batch(adapter: SiteAdapter, pages: List[Tuple[StoryInfo, bytes]]) -> List[Tuple[str, Optional[dict], str]]:
+    """在工作进程中解析一批故事页面，返回 (URL, 记录, 错误)；没有正文时记录为None"""
+    results = []
+    for story, body in pages:
+        try:
+            record = adapter.parse_story(body, story)
+            results.append((story.url, record, "" if record else "没有找到正文"))
+        except Exception as e:
+            results.append((story.url, None, str(e)))
+    return results
+
+
+def list_titles(archive: PageArchive, adapter: SiteAdapter) -> Dict[str, str]:
+    """从归档的列表页中取列表上的故事标题（故事ID -> 标题），lovechinese的文件名使用该标题"""
+    titles = {}
+    for record in archive.latest():
+        if record.status == 200 and not adapter.is_story_url(record.url):
+            for story in adapter.parse_list(record.body, record.url, 0).stories:
+                titles.setdefault(story.id, story.title)
+    return titles
+
+
+def story_pages(archive: PageArchive, adapter: SiteAdapter, titles: Dict[str, str],
+                batch_size: int) -> Iterator[List[Tuple[StoryInfo, bytes]]]:
+    """归档中状态为200的故事页面，每个URL取最近一次，按批返回"""
+    batch = []
+    for record in archive.latest():
+        if record.status != 200 or not adapter.is_story_url(record.url):
+            continue
+        story_id = adapter.story_id(record.url)
+        batch.append((StoryInfo(id=story_id, title=titles.get(story_id, ''), url=record.url), record.body))
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def extract_all(archive: PageArchive, adapter: SiteAdapter, titles: Dict[str, str], workers: Optional[int],
+                batch_size: int) -> Iterator[Tuple[str, Optional[dict], str]]:
+    """并行解析全部故事页面，按归档顺序返回结果
+
+    同时提交的批次数有上限，页面内容不会一次性全部读入内存
+    """
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        window = (workers or os.cpu_count() or 1) * 4
+        pending = deque()
+        for batch in story_pages(archive, adapter, titles, batch_size):
+            pending.append(executor.submit(_extract_batch, adapter, batch))
+            if len(pending) >= window:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
+
+
+class FieldDiff:
+    """与之前输出的逐字段对比"""
+
+    def __init__(self, previous: Dict[str, dict], fields, detail_file=None):
+        self.previous = previous
+        self.fields = fields
+        self.detail_file = detail_file
+        self.seen = set()
+        self.added: List[str] = []
+        self.changed: Dict[str, List[str]] = {field: [] for field in fields}
+        self.unchanged = 0
+
+    def compare(self, story_id: str, record: dict):
+        self.seen.add(story_id)
+        old = self.previous.get(story_id)
+        if old is None:
+            self.added.append(story_id)
+            return
+
+        changes = {}
+        for field in self.fields:
+            if (old.get(field) or '') != (record.get(field) or ''):
+                self.changed[field].append(story_id)
+                changes[field] = {'old': old.get(field, ''), 'new': record.get(field, '')}
+        if not changes:
+            self.unchanged += 1
+        elif self.detail_file:
+            self.detail_file.write(json.dumps({'id': story_id, 'changes': changes}, ensure_ascii=False) + "\n")
+
+    @property
+    def removed(self) -> List[str]:
+        return [story_id for story_id in self.previous if story_id not in self.seen]
+
+    def report(self, examples: int = 5):
+        print(f"对比之前的输出: 相同 {self.unchanged}，新增 {len(self.added)}，缺失 {len(self.removed)}")
+        for field in self.fields:
+            ids = self.changed[field]
+            sample = f"  例如: {', '.join(ids[:examples])}" if ids else ""
+            print(f"  {field}: {len(ids)} 个故事有变化{sample}")
+        if self.removed:
+            print(f"  之前有而本次没有: {', '.join(self.removed[:examples])}")
+
+
+def main(default_site: str = "gushi365"):
+    arg_parser = argparse.ArgumentParser(description="从原始页面归档离线重新提取故事")
+    arg_parser.add_argument("archive", help="页面归档目录")
+    arg_parser.add_argument("output", help="新的输出目录")
+    arg_parser.add_argument("--site", default=default_site, choices=list(ADAPTERS), help="归档页面所属的站点")
+    arg_parser.add_argument("--compare", help="之前的输出目录，逐字段对比")
+    arg_parser.add_argument("--compare-format", help="之前输出的格式，默认与 --format 相同")
+    arg_parser.add_argument("--diff-out", help="把有变化的故事逐条写入该JSONL文件")
+    arg_parser.add_argument("--parser", default="html.parser", help="提取后端: html.parser / lxml")
+    arg_parser.add_argument("--format", default="text", choices=list(SINKS), help="输出格式")
+    arg_parser.add_argument("--workers", type=int, help="解析进程数，默认CPU核心数")
+    arg_parser.add_argument("--batch-size", type=int, default=32, help="每个任务解析的页面数")
+    args = arg_parser.parse_args()
+
+    if args.compare and os.path.abspath(args.compare) == os.path.abspath(args.output):
+        sys.exit("输出目录不能与对比目录相同：已在清单中的故事会被跳过")
+
+    adapter = get_adapter(args.site, parser=args.parser)
+
+    previous = {}
+    if args.compare:
+        for record in adapter.read_records(args.compare_format or args.format, args.compare):
+            previous[record['id']] = record
+        print(f"已加载之前的输出: {args.compare} ({len(previous)} 个故事)")
+
+    detail_file = open(args.diff_out, 'w', encoding='utf-8') if args.diff_out else None
+    diff = FieldDiff(previous, FIELDS[adapter.name], detail_file=detail_file)
+
+    archive = PageArchive(args.archive)
+    titles = list_titles(archive, adapter)
+    manifest = adapter.create_manifest(args.output)
+    sink = adapter.create_sink(args.format, args.output)
+    summarize = adapter.summary_name and args.format == "text"
+    summary = []
+    pages = 0
+    failed = 0
+    started = time.monotonic()
+
+    def register(committed):
+        for record, filename in committed:
+            manifest.add(record['id'], filename, record['content'], record['url'])
+            if summarize:
+                summary.append(adapter.summary_entry(record))
+
+    try:
+        for url, record, error in extract_all(archive, adapter, titles, args.workers, args.batch_size):
+            pages += 1
+            if record is None:
+                failed += 1
+                print(f"解析失败: {url} - {error}")
+                continue
+            if args.compare:
+                diff.compare(record['id'], record)
+            # 与爬取时相同：已保存或正文相同的故事跳过
+            if record['id'] in manifest or sink.exists(record) or manifest.find_content(record['content']):
+                continue
+            sink.write(record)
+            if sink.full:
+                register(sink.flush())
+    finally:
+        register(sink.close())
+        manifest.close()
+        archive.close()
+        if detail_file:
+            detail_file.close()
+    elapsed = time.monotonic() - started
+
+    if summarize:
+        with open(os.path.join(args.output, adapter.summary_name), 'w', encoding='utf-8') as f:
+            json.dump(summary, f, ensure_ascii=False, indent=2)
+
+    print(f"\n重新提取完成: {pages} 个页面，失败 {failed}，"
+          f"耗时 {elapsed:.1f}秒，{pages / elapsed if elapsed else 0:.1f} 页/秒")
+    if args.compare:
+        diff.report()
+
+
+if __name__ == "__main__":
+    main()
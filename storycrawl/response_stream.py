@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+流式读取响应
+- 检查Content-Type和大小：不是HTML或超过上限的响应在读取正文前（或读取过程中）放弃
+- 分块读取，每个进行中的请求最多占用 max_bytes 内存
+- IncrementalHtmlParser: 数据到达时即交给lxml增量解析，可在内容区域结束时停止读取
+"""
+
+import time
+from typing import AsyncIterator, Callable, List, Optional
+
+from lxml import etree
+
+# 接受的Content-Type，没有Content-Type的响应也接受
+HTML_CONTENT_TYPES = ('text/html', 'application/xhtml+xml')
+
+DEFAULT_MAX_PAGE_BYTES = 5 * 1024 * 1024
+CHUNK_SIZE = 64 * 1024
+
+
+class ResponseRejected(Exception):
+    """响应不是HTML或超过大小上限，重试也不会成功"""
+
+    def __init__(self, cause: str, message: str):
+        super().__init__(message)
+        self.cause = cause  # content_type / too_large
+
+
+def check_response(response, max_bytes: Optional[int] = None):
+    """按响应头检查Content-Type和Content-Length"""
+    content_type = response.headers.get('Content-Type', '')
+    mime = content_type.split(';', 1)[0].strip().lower()
+    if mime and mime not in HTML_CONTENT_TYPES:
+        raise ResponseRejected('content_type', f"不是HTML页面: {content_type}")
+    length = response.content_length
+    if max_bytes and length is not None and length > max_bytes:
+        raise ResponseRejected('too_large', f"页面过大: {length} 字节，上限 {max_bytes}")
+
+
+async def iter_body(response, max_bytes: Optional[int] = None,
+                    chunk_size: int = CHUNK_SIZE) -> AsyncIterator[bytes]:
+    """分块产出响应正文，累计超过max_bytes时放弃（服务器没有给出或给错Content-Length时）"""
+    received = 0
+    async for chunk in response.content.iter_chunked(chunk_size):
+        received += len(chunk)
+        if max_bytes and received > max_bytes:
+            raise ResponseRejected('too_large', f"页面过大: 已接收 {received} 字节，上限 {max_bytes}")
+        yield chunk
+
+
+class IncrementalHtmlParser:
+    """lxml增量解析
+
+    feed的数据与一次性解析整个页面得到相同的树。指定stop_at时，每块数据解析后检查结束的元素，
+    stop_at返回True后不再需要后续数据；close时删除该元素之后的全部内容（包括被截断的残余），
+    得到的树与只包含到该元素为止的页面相同。
+
+    keep_chunks为True时保留已解析的数据（提前结束时只到stop_at的元素为止），供合并到同一请求的
+    解析器得到相同的树；页面正文另有保留（缓存、归档）时设为False，不再保留第二份。
+    """
+
+    def __init__(self, stop_at: Optional[Callable[[etree._Element], bool]] = None, keep_chunks: bool = True):
+        self.stop_at = stop_at
+        self.keep_chunks = keep_chunks
+        self.reset()
+
+    def reset(self):
+        """丢弃已解析的内容，重试时重新开始"""
+        events = ('end',) if self.stop_at else ()
+        self.parser = etree.HTMLPullParser(events=events, encoding='utf-8')
+        self.fed = 0  # 已解析的字节数
+        self.chunks: List[bytes] = []  # keep_chunks时已解析的数据
+        self.seconds = 0.0  # 解析耗时
+        self.stopped_at = None
+
+    def feed(self, chunk: bytes) -> bool:
+        """解析一块数据，返回True表示已经看到stop_at的元素；之后的数据不再解析和保留"""
+        if self.stopped_at is not None:
+            return True
+        started = time.perf_counter()
+        try:
+            self.fed += len(chunk)
+            if self.keep_chunks:
+                self.chunks.append(chunk)
+            self.parser.feed(chunk)
+            if self.stop_at is not None:
+                for _, element in self.parser.read_events():
+                    if self.stop_at(element):
+                        self.stopped_at = element
+                        return True
+            return False
+        finally:
+            self.seconds += time.perf_counter() - started
+
+    def close(self) -> etree._Element:
+        """结束解析，返回根元素"""
+        started = time.perf_counter()
+        try:
+            root = self.parser.close()
+        except etree.XMLSyntaxError:
+            root = None
+        if root is None:
+            # 空文档
+            root = etree.fromstring(b'<html></html>', etree.HTMLParser(encoding='utf-8'))
+        if self.stopped_at is not None:
+            _remove_following(self.stopped_at)
+        self.seconds += time.perf_counter() - started
+        return root
+
+
+def _remove_following(element):
+    """删除文档中位于element之后的全部节点和文本"""
+    node = element
+    while True:
+        node.tail = None
+        parent = node.getparent()
+        if parent is None:
+            return
+        for sibling in list(node.itersiblings()):
+            parent.remove(sibling)
+        node = parent
@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+重试策略和按主机的熔断器，异步和同步爬虫共用
+- RetryPolicy: 区分可重试和不可重试的失败，去相关抖动（decorrelated jitter）的指数退避，
+  服务器返回Retry-After时至少等待该时长
+- CircuitBreaker: 一个主机在时间窗口内被拒绝（403/429）的请求比例过高时暂停该主机的全部请求，
+  冷却结束后只放行一个试探请求，成功则恢复，仍被拒绝则加倍冷却时间
+"""
+
+import asyncio
+import logging
+import random
+import threading
+import time
+from collections import deque
+from datetime import timezone
+from email.utils import parsedate_to_datetime
+from typing import Callable, Deque, Dict, Iterable, Optional
+from urllib.parse import urlparse
+
+logger = logging.getLogger(__name__)
+
+# 可重试的状态码：被限制访问、请求超时或服务器暂时错误；其他4xx（如404）重试也不会成功
+RETRYABLE_STATUSES = frozenset({403, 408, 425, 429, 500, 502, 503, 504})
+
+# 计入熔断的状态码：站点在拒绝或限制访问
+BLOCK_STATUSES = frozenset({403, 429})
+
+
+def parse_retry_after(value: Optional[str], now: Optional[float] = None) -> Optional[float]:
+    """解析Retry-After头（秒数或HTTP日期），返回需要等待的秒数"""
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        seconds = float(value)
+    except ValueError:
+        try:
+            date = parsedate_to_datetime(value)
+        except (TypeError, ValueError, IndexError):
+            return None
+        if date is None:
+            return None
+        if date.tzinfo is None:
+            date = date.replace(tzinfo=timezone.utc)
+        seconds = date.timestamp() - (time.time() if now is None else now)
+    return max(0.0, seconds)
+
+
+class RetryPolicy:
+    def __init__(self, max_attempts: int = 3, base_delay: float = 1.0, max_delay: float = 30.0,
+                 max_retry_after: float = 120.0, retry_statuses: Iterable[int] = RETRYABLE_STATUSES,
+                 rng: Optional[random.Random] = None):
+        """
+        max_attempts: 每个请求最多的尝试次数
+        base_delay / max_delay: 退避时间的下限和上限（秒）
+        max_retry_after: Retry-After的上限，避免服务器要求的等待过长
+        """
+        if max_attempts < 1:
+            raise ValueError("max_attempts必须大于0")
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max(base_delay, max_delay)
+        self.max_retry_after = max_retry_after
+        self.retry_statuses = frozenset(retry_statuses)
+        self.rng = rng or random.Random()
+
+    def is_retryable(self, status: int) -> bool:
+        return status in self.retry_statuses
+
+    def next_delay(self, previous: float = 0.0, retry_after: Optional[float] = None) -> float:
+        """下一次重试前的等待时间
+
+        去相关抖动：在 [base_delay, 上次等待时间 * 3] 中随机取值，不超过max_delay，
+        同时失败的请求不会在同一时刻重试；有Retry-After时取两者中较长的
+        """
+        upper = max(previous, self.base_delay) * 3
+        delay = min(self.max_delay, self.rng.uniform(self.base_delay, upper))
+        if retry_after is not None:
+            delay = max(delay, min(retry_after, self.max_retry_after))
+        return delay
+
+
+class CircuitBreaker:
+    """单个主机的熔断器，线程安全
+
+    关闭: 正常放行；window秒内至少有min_requests个请求、其中403/429的比例达到failure_ratio时打开，
+          零星的拒绝不会暂停主机；重试后成功的请求调用forgive，之前的拒绝不再计入
+    打开: 全部请求等待到冷却结束
+    半开: 冷却结束后只放行一个试探请求，成功则关闭并恢复初始冷却时间，
+          仍被拒绝则以加倍（不超过max_cooldown）的冷却时间重新打开
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, failure_ratio: float = 0.5, min_requests: int = 10, window: float = 30.0,
+                 cooldown: float = 2.0, max_cooldown: float = 120.0, probe_interval: float = 0.5,
+                 probe_timeout: float = 30.0, name: str = "",
+                 on_change: Optional[Callable[[str, str], None]] = None,
+                 clock: Callable[[], float] = time.monotonic):
+        """
+        failure_ratio / min_requests: 窗口内被拒绝的比例和请求数都达到时打开
+        cooldown: 首次打开的冷却时间，之后每次试探失败加倍
+        probe_interval: 半开状态下其他请求检查试探结果的间隔
+        probe_timeout: 试探请求超过该时间没有结果时放行新的试探
+        on_change: 状态变化时的回调，参数为主机名和新状态
+        """
+        self.failure_ratio = failure_ratio
+        self.min_requests = max(1, min_requests)
+        self.window = window
+        self.initial_cooldown = cooldown
+        self.cooldown = cooldown
+        self.max_cooldown = max(cooldown, max_cooldown)
+        self.probe_interval = probe_interval
+        self.probe_timeout = probe_timeout
+        self.name = name
+        self.on_change = on_change
+        self.clock = clock
+
+        self.state = self.CLOSED
+        self.opened_until = 0.0
+        # 窗口内的请求结果 [时间, 是否被拒绝]，blocked为其中被拒绝的个数
+        self.outcomes: Deque[list] = deque()
+        self.blocked = 0
+        self._probe_started: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def _set_state(self, state: str):
+        if state != self.state:
+            self.state = state
+            if self.on_change:
+                self.on_change(self.name, state)
+
+    def _open(self, now: float, seconds: float):
+        self.opened_until = max(self.opened_until, now + seconds)
+        self.outcomes.clear()
+        self.blocked = 0
+        self._probe_started = None
+        self._set_state(self.OPEN)
+        logger.warning(f"主机 {self.name} 暂停 {self.opened_until - now:.1f} 秒")
+
+    def _add(self, now: float, blocked: bool) -> list:
+        outcome = [now, blocked]
+        self.outcomes.append(outcome)
+        self.blocked += blocked
+        while self.outcomes and self.outcomes[0][0] < now - self.window:
+            self.blocked -= self.outcomes.popleft()[1]
+        return outcome
+
+    def before_request(self) -> float:
+        """请求前调用，返回需要等待的秒数；返回0时可以发送请求"""
+        with self._lock:
+            now = self.clock()
+            if self.state == self.OPEN:
+                if now < self.opened_until:
+                    return self.opened_until - now
+                self._set_state(self.HALF_OPEN)
+            if self.state == self.HALF_OPEN:
+                if self._probe_started is not None and now - self._probe_started < self.probe_timeout:
+                    return self.probe_interval
+                self._probe_started = now
+            return 0.0
+
+    def record(self, status: Optional[int] = None, retry_after: Optional[float] = None) -> Optional[list]:
+        """记录一次请求的结果，status为None表示超时或连接错误；被拒绝时返回该结果，可传给forgive"""
+        if status is None or status == 408 or (status >= 500 and retry_after is None):
+            self.record_failure()
+        elif status in BLOCK_STATUSES or (status >= 400 and retry_after is not None):
+            return self.record_blocked(retry_after)
+        else:
+            self.record_success()
+        return None
+
+    def record_success(self):
+        """主机正常响应（包括404等不可重试的状态码）"""
+        with self._lock:
+            if self.state == self.HALF_OPEN:
+                logger.info(f"主机 {self.name} 已恢复")
+                self.cooldown = self.initial_cooldown
+                self._probe_started = None
+                self._set_state(self.CLOSED)
+            elif self.state == self.CLOSED:
+                self._add(self.clock(), False)
+
+    def record_blocked(self, retry_after: Optional[float] = None) -> Optional[list]:
+        """主机返回403/429，返回计入窗口的结果"""
+        with self._lock:
+            now = self.clock()
+            if self.state == self.HALF_OPEN:
+                # 试探仍被拒绝，加倍冷却时间
+                self.cooldown = min(self.cooldown * 2, self.max_cooldown)
+                self._open(now, max(self.cooldown, min(retry_after or 0.0, self.max_cooldown)))
+                return None
+            if self.state == self.OPEN:
+                return None
+            if retry_after:
+                # 服务器明确要求等待，暂停整个主机
+                self._open(now, min(retry_after, self.max_cooldown))
+                return None
+            outcome = self._add(now, True)
+            if (len(self.outcomes) >= self.min_requests
+                    and self.blocked >= self.failure_ratio * len(self.outcomes)):
+                self._open(now, self.cooldown)
+                return None
+            return outcome
+
+    def forgive(self, outcomes: Iterable[Optional[list]]):
+        """同一请求重试后成功：之前的拒绝不计入熔断"""
+        with self._lock:
+            for outcome in outcomes:
+                if outcome is not None and outcome[1]:
+                    outcome[1] = False
+                    # 已移出窗口或熔断时已清空的结果不再计数
+                    if any(item is outcome for item in self.outcomes):
+                        self.blocked -= 1
+
+    def record_failure(self):
+        """超时、连接错误等与封锁无关的失败：半开状态下放行新的试探"""
+        with self._lock:
+            if self.state == self.HALF_OPEN:
+                self._probe_started = None
+
+
+class HostCircuitBreakers:
+    """每个主机一个熔断器"""
+
+    def __init__(self, **options):
+        self.options = options
+        self.breakers: Dict[str, CircuitBreaker] = {}
+        self._lock = threading.Lock()
+
+    def get(self, url: str) -> CircuitBreaker:
+        """获取URL所属主机的熔断器"""
+        host = urlparse(url).netloc
+        with self._lock:
+            breaker = self.breakers.get(host)
+            if breaker is None:
+                breaker = self.breakers[host] = CircuitBreaker(name=host, **self.options)
+            return breaker
+
+    async def wait(self, url: str) -> CircuitBreaker:
+        """主机暂停时等待，返回其熔断器"""
+        breaker = self.get(url)
+        while True:
+            delay = breaker.before_request()
+            if delay <= 0:
+                return breaker
+            await asyncio.sleep(delay)
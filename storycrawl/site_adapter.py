@@ -0,0 +1,258 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+站点适配器 - 把网站相关的部分从爬取流程中分离出来
+每个适配器只负责：列表页URL、列表页解析（故事链接和分页）、详情页提取和输出格式；
+获取、限速、缓存、调度和写入由 crawl_engine.CrawlEngine 统一处理。
+
+- gushi365: 使用 gushi365.story_parser 和共用的 output_sink
+- lovechinese: 使用 lovechinese.story_parser（含 format_story_content）和 lovechinese.output_sink，
+  输出与 spider01 的 StorySpider 相同
+"""
+
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+from urllib.parse import urlparse
+
+from . import output_sink
+from .gushi365 import extract_backend as gushi365_backend
+from .gushi365 import story_parser
+from .gushi365.story_parser import StoryInfo, StoryData, ListPage
+from .lovechinese import extract_backend as lovechinese_backend
+from .lovechinese import output_sink as lovechinese_sink
+from .lovechinese import story_parser as lovechinese_parser
+from .output_sink import OutputSink
+from .story_manifest import StoryManifest, HEADER_SEPARATOR
+
+# 汇总JSON中每个故事的字段
+SUMMARY_FIELDS = ('title', 'url', 'id', 'content')
+
+
+def _stage_timer(timings: Dict[str, float]) -> Callable:
+    """把各阶段耗时累加到timings的阶段上下文"""
+    @contextmanager
+    def stage(name: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            timings[name] = timings.get(name, 0.0) + time.perf_counter() - started
+    return stage
+
+
+class SiteAdapter:
+    """站点适配器基类"""
+    name = ""
+    base_url = ""
+    # 解析方法能否在进程池中执行（适配器和解析函数需可被pickle）
+    process_safe = True
+    # 故事详情页URL
+    story_link_re = None
+    # text格式时另外写入的汇总JSON文件名，None表示不写
+    summary_name: Optional[str] = None
+    # 可选的输出格式，决定输出文件的命名和格式
+    sinks: Dict[str, type] = output_sink.SINKS
+    # text格式故事文件中头部信息与正文的分隔线，补登清单时用于取出正文
+    header_separator = HEADER_SEPARATOR
+    # 访问warmup_urls后停留的秒数
+    warmup_delay = 0.0
+    # 能否从lxml增量解析得到的树中提取详情页（流式解析）
+    streamable = False
+    # 读到正文结尾即停止解析时，页面上位于正文之后而可能取不到的字段
+    after_content_fields: Tuple[str, ...] = ()
+
+    def __init__(self, base_url: Optional[str] = None, parser: str = 'html.parser'):
+        if base_url:
+            self.base_url = base_url.rstrip('/')
+        self.parser = parser
+
+    @property
+    def host(self) -> str:
+        return urlparse(self.base_url).netloc
+
+    def warmup_urls(self) -> List[str]:
+        """开始爬取前先访问的页面（建立会话）"""
+        return []
+
+    def headers(self, url: str) -> Dict[str, str]:
+        """请求该URL时附加的请求头"""
+        return {}
+
+    def page_url(self, start_url: str, page: int) -> Optional[str]:
+        """第page页列表页的URL，没有该页时返回None"""
+        raise NotImplementedError
+
+    def decode(self, body: bytes) -> str:
+        return body.decode('utf-8', errors='ignore')
+
+    def is_story_url(self, url: str) -> bool:
+        return bool(self.story_link_re.search(url))
+
+    def story_id(self, url: str) -> str:
+        """详情页URL中的故事ID"""
+        return url.split('/')[-1]
+
+    def parse_list(self, html: bytes, page_url: str, page_num: int) -> ListPage:
+        """解析列表页：故事链接，以及分页栏中的最大页码（未知时为0）"""
+        raise NotImplementedError
+
+    def parse_story(self, html: bytes, story: StoryInfo) -> Optional[dict]:
+        """提取详情页，返回写入输出后端的记录（至少包含 id/title/content/url），没有正文时返回None"""
+        raise NotImplementedError
+
+    def parse_story_timed(self, html: bytes, story: StoryInfo) -> Tuple[Optional[dict], Dict[str, float]]:
+        """提取详情页，同时返回各阶段耗时（秒）"""
+        started = time.perf_counter()
+        record = self.parse_story(html, story)
+        return record, {'parse': time.perf_counter() - started}
+
+    def content_end(self, element) -> bool:
+        """流式解析时详情页正文是否已经结束，之后的内容可以不再读取"""
+        return False
+
+    def parse_story_tree(self, root, story: StoryInfo) -> Tuple[Optional[dict], Dict[str, float]]:
+        """从lxml增量解析得到的树中提取详情页（streamable为True时），同时返回各阶段耗时"""
+        raise NotImplementedError
+
+    def summary_entry(self, record: dict, full: bool = True) -> dict:
+        """汇总JSON中的一项；full为False时（非text格式）只包含列表页信息"""
+        if full:
+            return {field: record[field] for field in SUMMARY_FIELDS}
+        return {'title': record.get('list_title', record['title']), 'url': record['url'], 'id': record['id']}
+
+    def create_manifest(self, stories_dir: str) -> StoryManifest:
+        """保存目录的已保存故事清单"""
+        return StoryManifest(stories_dir, self.header_separator)
+
+    def create_sink(self, name: str, stories_dir: str, options: Optional[dict] = None) -> OutputSink:
+        """该站点的输出后端"""
+        return output_sink.create_sink(name, stories_dir, options, self.sinks)
+
+    def read_records(self, name: str, stories_dir: str, options: Optional[dict] = None) -> Iterator[dict]:
+        """按该站点的输出格式读取目录中已保存的故事"""
+        return output_sink.read_records(name, stories_dir, options, self.sinks)
+
+
+class Gushi365Adapter(SiteAdapter):
+    name = "gushi365"
+    base_url = "https://www.gushi365.com"
+    story_link_re = gushi365_backend.STORY_LINK_RE
+    # 预热时在主页停留2秒
+    warmup_delay = 2.0
+    streamable = True
+    after_content_fields = ('author', 'category')
+
+    def __init__(self, base_url: Optional[str] = None, parser: str = 'html.parser', div_fallback: bool = False):
+        """div_fallback为True时没有故事段落的页面改用得分最高的div（Gushi365Spider原有的提取）"""
+        super().__init__(base_url, parser)
+        self.div_fallback = div_fallback
+
+    def warmup_urls(self) -> List[str]:
+        return [self.base_url]
+
+    def headers(self, url: str) -> Dict[str, str]:
+        # 详情页请求时添加分类页面作为Referer
+        if '/info/' in url:
+            for category in ('tonghuagushi', 'yuyangushi'):
+                if category in url:
+                    return {'Referer': f"{self.base_url}/{category}/"}
+        return {}
+
+    def page_url(self, start_url: str, page: int) -> Optional[str]:
+        # 分页格式为 /category/index_N.html
+        if page == 1:
+            return start_url
+        return f"{start_url.rstrip('/')}/index_{page}.html"
+
+    def story_id(self, url: str) -> str:
+        return url.split('/')[-1].replace('.html', '')
+
+    def parse_list(self, html: bytes, page_url: str, page_num: int) -> ListPage:
+        return story_parser.parse_list_html(html, self.base_url, self.parser, page_num)
+
+    def parse_story(self, html: bytes, story: StoryInfo) -> Optional[dict]:
+        return self.record(story_parser.parse_story_html(html, story.url, self.parser, self.div_fallback), story.id)
+
+    def parse_story_timed(self, html: bytes, story: StoryInfo) -> Tuple[Optional[dict], Dict[str, float]]:
+        story_data, timings = story_parser.parse_story_html_timed(html, story.url, self.parser, self.div_fallback)
+        return self.record(story_data, story.id), timings
+
+    def content_end(self, element) -> bool:
+        return story_parser.is_content_end(element)
+
+    def parse_story_tree(self, root, story: StoryInfo) -> Tuple[Optional[dict], Dict[str, float]]:
+        story_data, timings = story_parser.parse_story_tree(root, story.url, self.div_fallback)
+        return self.record(story_data, story.id), timings
+
+    @staticmethod
+    def record(story_data: StoryData, story_id: str) -> Optional[dict]:
+        """写入输出后端的记录，与 Gushi365Spider.save_story 相同；没有正文时返回None"""
+        if not story_data.content:
+            return None
+        return {
+            'id': story_id,
+            'title': story_data.title,
+            'content': story_data.content,
+            'author': story_data.author,
+            'category': story_data.category,
+            'url': story_data.url,
+        }
+
+
+class LovechineseAdapter(SiteAdapter):
+    name = "lovechinese"
+    base_url = "https://www.lovechinese.org"
+    story_link_re = lovechinese_backend.STORY_LINK_RE
+    summary_name = "stories_summary.json"
+    sinks = lovechinese_sink.SINKS
+    header_separator = lovechinese_sink.HEADER_SEPARATOR
+
+    def page_url(self, start_url: str, page: int) -> Optional[str]:
+        # 系列页面只有一页
+        return start_url if page == 1 else None
+
+    def decode(self, body: bytes) -> str:
+        # 与requests按utf-8解码的结果相同
+        return body.decode('utf-8', errors='replace')
+
+    def parse_list(self, html: bytes, page_url: str, page_num: int) -> ListPage:
+        stories = lovechinese_parser.parse_list_html(self.decode(html), self.base_url, self.parser)
+        stories = [StoryInfo(id=story['id'], title=story['title'], url=story['url']) for story in stories]
+        return ListPage(page_num=page_num, stories=stories, last_page=1)
+
+    def parse_story(self, html: bytes, story: StoryInfo) -> Optional[dict]:
+        return self._parse_story(html, story)
+
+    def parse_story_timed(self, html: bytes, story: StoryInfo) -> Tuple[Optional[dict], Dict[str, float]]:
+        # parse/extract/format 各阶段的耗时
+        timings: Dict[str, float] = {}
+        return self._parse_story(html, story, _stage_timer(timings)), timings
+
+    def _parse_story(self, html: bytes, story: StoryInfo, stage: Optional[Callable] = None) -> Optional[dict]:
+        content = lovechinese_parser.parse_story_html(self.decode(html), story.url, self.parser, stage)
+        if not content['content']:
+            return None
+        # 与 StorySpider.crawl_stories 相同：列表页信息在前，页面提取结果覆盖，文件名使用列表页上的标题
+        return {'title': story.title, 'url': story.url, 'id': story.id, **content, 'list_title': story.title}
+
+
+ADAPTERS = {
+    Gushi365Adapter.name: Gushi365Adapter,
+    LovechineseAdapter.name: LovechineseAdapter,
+}
+
+
+def get_adapter(name: str, **options) -> SiteAdapter:
+    if name not in ADAPTERS:
+        raise ValueError(f"不支持的站点: {name}，可选: {', '.join(ADAPTERS)}")
+    return ADAPTERS[name](**options)
+
+
+def adapter_for_url(url: str, **options) -> SiteAdapter:
+    """按主机名选择适配器"""
+    host = urlparse(url).netloc
+    for adapter_class in ADAPTERS.values():
+        if urlparse(adapter_class.base_url).netloc == host:
+            return adapter_class(**options)
+    raise ValueError(f"没有适配该网站的适配器: {host}，可选: {', '.join(ADAPTERS)}")
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+已保存故事清单 - 每个保存目录一份 manifest.jsonl
+记录已保存故事的ID、文件名和正文哈希，启动时加载一次，
+爬取前即可过滤掉已保存的故事，无需先下载和解析页面
+"""
+
+import hashlib
+import json
+import os
+import re
+import time
+import logging
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_NAME = "manifest.jsonl"
+
+# 故事文件名格式: {id}_{标题}.txt
+STORY_FILE_RE = re.compile(r'^(\d+)_.*\.txt$')
+
+# 故事文件中头部信息与正文的分隔线
+HEADER_SEPARATOR = "-" * 50 + "\n\n"
+
+
+def content_hash(content: str) -> str:
+    """正文哈希"""
+    return hashlib.sha1(content.encode('utf-8')).hexdigest()
+
+
+class StoryManifest:
+    def __init__(self, stories_dir: str = "stories", header_separator: str = HEADER_SEPARATOR):
+        """header_separator为故事文件中头部信息与正文的分隔线，补登清单中没有的故事文件时使用"""
+        self.stories_dir = stories_dir
+        self.header_separator = header_separator
+        self.path = os.path.join(stories_dir, MANIFEST_NAME)
+        self.entries: Dict[str, dict] = {}  # 故事ID -> 清单记录
+        self.hashes: Dict[str, str] = {}  # 正文哈希 -> 故事ID
+        self._file = None
+
+        self._load()
+
+    def _load(self):
+        if os.path.exists(self.path):
+            with open(self.path, encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        self._index(json.loads(line))
+                    except (ValueError, KeyError):
+                        # 中断时可能留下不完整的最后一行
+                        continue
+
+        # 补登清单中没有的故事文件：首次使用清单，或上次写入清单前中断
+        missing = []
+        if os.path.isdir(self.stories_dir):
+            with os.scandir(self.stories_dir) as entries:
+                for entry in entries:
+                    match = STORY_FILE_RE.match(entry.name)
+                    if match and match.group(1) not in self.entries:
+                        missing.append((match.group(1), entry.name))
+
+        for story_id, filename in missing:
+            with open(os.path.join(self.stories_dir, filename), encoding='utf-8') as f:
+                text = f.read()
+            content = text.partition(self.header_separator)[2]
+            self.add(story_id, filename, content)
+
+        if self.entries:
+            logger.info(f"已加载故事清单: {self.stories_dir} ({len(self.entries)} 个故事，补登 {len(missing)} 个)")
+
+    def _index(self, entry: dict):
+        self.entries[entry['id']] = entry
+        self.hashes.setdefault(entry['sha1'], entry['id'])
+
+    def __contains__(self, story_id: str) -> bool:
+        return story_id in self.entries
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def find_content(self, content: str) -> Optional[str]:
+        """正文相同的已保存故事ID"""
+        return self.hashes.get(content_hash(content))
+
+    def add(self, story_id: str, filename: str, content: str, url: str = ""):
+        """登记已保存的故事，立即追加到清单文件"""
+        entry = {
+            'id': story_id,
+            'file': filename,
+            'sha1': content_hash(content),
+            'url': url,
+            'saved_at': time.time(),
+        }
+        self._append(entry)
+
+    def add_alias(self, story_id: str, original_id: str, url: str = ""):
+        """登记正文与已保存故事相同的故事：指向原故事的文件，不再单独保存"""
+        original = self.entries[original_id]
+        self._append({
+            'id': story_id,
+            'file': original['file'],
+            'sha1': original['sha1'],
+            'url': url,
+            'saved_at': time.time(),
+            'alias_of': original_id,
+        })
+
+    def alias_of(self, story_id: str) -> Optional[str]:
+        """别名故事对应的原故事ID，不是别名时返回None"""
+        entry = self.entries.get(story_id)
+        return entry.get('alias_of') if entry else None
+
+    def _append(self, entry: dict):
+        if self._file is None:
+            if not os.path.exists(self.stories_dir):
+                os.makedirs(self.stories_dir)
+            # 行缓冲：每条记录一次写入，中断时最多丢失正在写的一行
+            self._file = open(self.path, 'a', encoding='utf-8', buffering=1)
+            if self._file.tell() and not self._ends_with_newline():
+                self._file.write("\n")
+        self._file.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        self._index(entry)
+
+    def _ends_with_newline(self) -> bool:
+        with open(self.path, 'rb') as f:
+            f.seek(-1, os.SEEK_END)
+            return f.read(1) == b"\n"
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
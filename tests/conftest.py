@@ -0,0 +1,5 @@
+import os
+import sys
+
+# 测试从仓库根目录导入storycrawl包，与爬虫脚本相同
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
@@ -0,0 +1,89 @@
+# -*- coding: utf-8 -*-
+"""
+两个提取后端（html.parser / lxml）对同一页面的提取结果相同
+页面取自 tests/fixtures，按两个站点的页面结构保存：列表页、详情页和没有段落或内容容器的详情页
+"""
+
+import os
+
+import pytest
+
+from storycrawl.gushi365.story_parser import StoryInfo
+from storycrawl.site_adapter import Gushi365Adapter, LovechineseAdapter
+
+FIXTURES = os.path.join(os.path.dirname(__file__), 'fixtures')
+BACKENDS = ('html.parser', 'lxml')
+
+
+def fixture(name: str) -> bytes:
+    with open(os.path.join(FIXTURES, name), 'rb') as f:
+        return f.read()
+
+
+def story_info(adapter, url: str) -> StoryInfo:
+    return StoryInfo(id=adapter.story_id(url), title='', url=url)
+
+
+def parse_both(make_adapter, parse):
+    results = [parse(make_adapter(parser)) for parser in BACKENDS]
+    assert results[0] == results[1]
+    return results[0]
+
+
+def test_gushi365_list():
+    url = 'https://www.gushi365.com/yuyangushi/index_2.html'
+    page = parse_both(Gushi365Adapter, lambda adapter: adapter.parse_list(fixture('gushi365_list.html'), url, 2))
+    # 列表页的全部故事链接，去重由引擎完成
+    assert [story.id for story in page.stories][:4] == ['8812', '8813', '8815', '8817']
+    assert {'8820', '101'} <= {story.id for story in page.stories}
+    assert page.stories[2].title == '龟兔赛跑（经典）'
+    assert page.last_page == 57
+
+
+@pytest.mark.parametrize('div_fallback', [False, True])
+def test_gushi365_story(div_fallback):
+    url = 'https://www.gushi365.com/info/8812.html'
+
+    def parse(adapter):
+        return adapter.parse_story(fixture('gushi365_story.html'), story_info(adapter, url))
+
+    record = parse_both(lambda parser: Gushi365Adapter(parser=parser, div_fallback=div_fallback), parse)
+    assert record['title'] == '狐狸和葡萄'
+    assert record['author'] == '伊索'
+    assert record['category']
+    # 不到500字时最长的段落不计入正文（原有的选择规则）
+    assert record['content'].startswith('它想：“这么好的葡萄')
+    assert '吃不到葡萄说葡萄酸' in record['content']
+    assert '脚本' not in record['content'] and 'show_ad' not in record['content']
+
+
+@pytest.mark.parametrize('div_fallback', [False, True])
+def test_gushi365_story_without_paragraphs(div_fallback):
+    url = 'https://www.gushi365.com/info/9001.html'
+
+    def parse(adapter):
+        return adapter.parse_story(fixture('gushi365_story_divs.html'), story_info(adapter, url))
+
+    record = parse_both(lambda parser: Gushi365Adapter(parser=parser, div_fallback=div_fallback), parse)
+    assert record is None or record['title'] == '小猫钓鱼'
+    if div_fallback:
+        assert record['author'] == '佚名'
+        assert record['content'].startswith('猫妈妈带着小猫到河边钓鱼')
+        assert '相关导航' not in record['content']
+
+
+def test_lovechinese_list():
+    url = 'https://www.lovechinese.org/reading/site/series/6'
+    page = parse_both(LovechineseAdapter, lambda adapter: adapter.parse_list(fixture('lovechinese_list.html'), url, 1))
+    assert [story.id for story in page.stories][1:5] == ['1201', '1202', '1203', '1204']
+    assert page.stories[1].title == '第一夜 小熊请客'
+
+
+@pytest.mark.parametrize('name', ['lovechinese_story.html', 'lovechinese_story_fallback.html'])
+def test_lovechinese_story(name):
+    url = 'https://www.lovechinese.org/reading/site/story/1202'
+    record = parse_both(LovechineseAdapter,
+                        lambda adapter: adapter.parse_story(fixture(name), story_info(adapter, url)))
+    assert record['title'].startswith('第')
+    assert len(record['content']) > 50
+    assert 'ga(' not in record['content'] and '欢迎阅读' not in record['content']
@@ -0,0 +1,100 @@
+# -*- coding: utf-8 -*-
+"""
+熔断器：按窗口内被拒绝的比例打开，零星的403不会暂停主机，重试后成功的请求不计入
+"""
+
+import random
+
+from storycrawl.retry_policy import CircuitBreaker
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def breaker(**options):
+    clock = FakeClock()
+    return CircuitBreaker(clock=clock, **options), clock
+
+
+def test_isolated_errors_do_not_open():
+    # 与基准测试 --error-rate 0.05 相同的错误率
+    cb, clock = breaker()
+    rng = random.Random(1)
+    for _ in range(2000):
+        clock.now += 0.01
+        assert cb.before_request() == 0.0
+        cb.record(403 if rng.random() < 0.05 else 200)
+    assert cb.state == CircuitBreaker.CLOSED
+
+
+def test_burst_of_errors_below_min_requests_does_not_open():
+    cb, clock = breaker(min_requests=10)
+    for _ in range(9):
+        cb.record(403)
+    assert cb.state == CircuitBreaker.CLOSED
+
+
+def test_opens_on_ratio_with_backoff():
+    cb, clock = breaker(failure_ratio=0.5, min_requests=10, cooldown=2.0, max_cooldown=5.0)
+    for _ in range(5):
+        cb.record(200)
+    for _ in range(5):
+        cb.record(403)
+    assert cb.state == CircuitBreaker.OPEN
+    assert cb.before_request() == 2.0
+
+    # 试探仍被拒绝：冷却时间加倍，不超过max_cooldown
+    clock.now += 2.0
+    assert cb.before_request() == 0.0
+    assert cb.state == CircuitBreaker.HALF_OPEN
+    assert cb.before_request() == cb.probe_interval
+    cb.record(403)
+    assert cb.before_request() == 4.0
+    clock.now += 4.0
+    cb.before_request()
+    cb.record(403)
+    assert cb.before_request() == 5.0
+
+    # 试探成功后关闭并恢复初始冷却时间
+    clock.now += 5.0
+    cb.before_request()
+    cb.record(200)
+    assert cb.state == CircuitBreaker.CLOSED
+    assert cb.cooldown == 2.0
+
+
+def test_forgive_retried_success():
+    cb, clock = breaker(min_requests=4)
+    for _ in range(3):
+        cb.record(200)
+    # 每个请求先被拒绝，重试后成功
+    for _ in range(20):
+        outcome = cb.record(403)
+        cb.record(200)
+        cb.forgive([outcome, None])
+    assert cb.state == CircuitBreaker.CLOSED
+    assert cb.blocked == 0
+
+
+def test_old_outcomes_leave_window():
+    cb, clock = breaker(min_requests=4, window=10.0)
+    for _ in range(3):
+        cb.record(403)
+    clock.now += 11
+    outcome = cb.record(403)
+    assert cb.state == CircuitBreaker.CLOSED
+    assert cb.blocked == 1
+    cb.forgive([outcome])
+    assert cb.blocked == 0
+
+
+def test_retry_after_opens_immediately():
+    cb, clock = breaker()
+    cb.record(429, retry_after=7.0)
+    assert cb.state == CircuitBreaker.OPEN
+    assert cb.before_request() == 7.0
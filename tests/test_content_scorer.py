@@ -0,0 +1,85 @@
+# -*- coding: utf-8 -*-
+"""
+正文div的选择：得分为标点数 ×（1 - 链接文字比例）
+- 故事365同步爬虫：原来只按标点数排序，包含正文和链接列表的外层div得分更高；现在选出里面的正文div
+- lovechinese：原来取第一个超过100字的div（通常是最外层的包装），现在取得分最高的，都没有标点时仍取第一个
+"""
+
+import pytest
+
+from storycrawl.content_scorer import NodeScore, best_node
+from storycrawl.gushi365 import extract_backend as gushi365_backend
+from storycrawl.gushi365.story_parser import best_div_text
+from storycrawl.lovechinese import extract_backend as lovechinese_backend
+
+# 280字，30个标点
+STORY = "小兔子和小熊约好一起去看星星，它们走过小河，又爬上山坡。" * 10
+# 20个链接，360字，20个标点
+LINKS = "".join(f'<a href="/info/{n}.html">相关故事：大象和狐狸的第{n:02d}个约定，</a>' for n in range(20))
+
+PAGE = f"""
+<html><body>
+  <div id="wrapper">
+    <div id="links">{LINKS}</div>
+    <div id="story">{STORY}</div>
+  </div>
+</body></html>
+"""
+
+NO_PUNCT = "没有标点的长文本" * 20
+PAGE_NO_PUNCT = f"""
+<html><body>
+  <div id="wrapper"><div id="first">{NO_PUNCT}</div><div id="second">{NO_PUNCT}</div></div>
+</body></html>
+"""
+
+
+def node_score(length, punct, link_length=0, keyword=False, node=None):
+    score = NodeScore(node)
+    score.length, score.punct, score.link_length, score.keyword = length, punct, link_length, keyword
+    return score
+
+
+def test_score_discounts_link_text():
+    assert node_score(100, 10).score == 10
+    assert node_score(100, 10, link_length=75).score == pytest.approx(2.5)
+    assert node_score(0, 0).score == 0
+
+
+def test_best_node_prefers_text_over_link_list():
+    link_list = node_score(400, 20, link_length=360, node='links')
+    story = node_score(280, 12, node='story')
+    assert best_node([link_list, story]).node == 'story'
+
+
+def test_best_node_filters_and_ties():
+    first = node_score(300, 10, node='first')
+    second = node_score(300, 10, node='second')
+    assert best_node([first, second]).node == 'first'
+    assert best_node([node_score(150, 50, node='short'), first], min_length=200).node == 'first'
+    assert best_node([node_score(300, 50, keyword=True, node='nav'), first], skip_keyword=True).node == 'first'
+    assert best_node([node_score(300, 0)]) is None
+
+
+@pytest.mark.parametrize('backend_name', sorted(gushi365_backend.BACKENDS))
+def test_gushi365_div_fallback_picks_story_inside_wrapper(backend_name):
+    backend = gushi365_backend.BACKENDS[backend_name]
+    doc = backend.parse(PAGE)
+    scores = {score.node.get('id'): score for score in backend.score_nodes(doc)}
+    wrapper, story = scores['wrapper'], scores['story']
+    # 只按标点数时外层div胜出
+    assert wrapper.punct > story.punct
+    assert wrapper.score < story.score
+    assert best_div_text(backend, doc) == STORY
+
+
+@pytest.mark.parametrize('backend_name', sorted(lovechinese_backend.BACKENDS))
+def test_lovechinese_fallback_picks_best_div_not_first(backend_name):
+    backend = lovechinese_backend.BACKENDS[backend_name]
+    assert backend.content_text(backend.parse(PAGE)) == STORY
+
+
+@pytest.mark.parametrize('backend_name', sorted(lovechinese_backend.BACKENDS))
+def test_lovechinese_fallback_without_punct_takes_first_div(backend_name):
+    backend = lovechinese_backend.BACKENDS[backend_name]
+    assert backend.content_text(backend.parse(PAGE_NO_PUNCT)) == f"{NO_PUNCT}\n{NO_PUNCT}"
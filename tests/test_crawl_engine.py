@@ -0,0 +1,142 @@
+# -*- coding: utf-8 -*-
+"""
+爬取引擎与本地站点：缓存的ETag/304复用、相同URL的并发请求合并、中断后继续时跳过已保存的故事
+"""
+
+import asyncio
+import os
+import sys
+
+from aiohttp import web
+
+from storycrawl.crawl_engine import CrawlEngine, CrawlJob
+from storycrawl.crawl_state import CrawlState, FAILED, JOB_DISCOVERED, JOB_FINISHED, SAVED
+from storycrawl.output_sink import JsonlSink
+from storycrawl.site_adapter import Gushi365Adapter
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'spider02'))
+from mock_site import MockSite, MockSiteConfig, serve  # noqa: E402
+
+ETAG = '"v1"'
+PAGE = '<html><body><h1>标题</h1><p>小兔子和小熊约好一起去看星星。</p></body></html>'
+
+
+class Pages:
+    """返回同一页面的站点，带ETag，记录收到的请求"""
+
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.requests = []  # (路径, If-None-Match)
+
+    async def handle(self, request: web.Request) -> web.Response:
+        self.requests.append((request.path, request.headers.get('If-None-Match')))
+        await asyncio.sleep(self.delay)
+        if request.headers.get('If-None-Match') == ETAG:
+            return web.Response(status=304, headers={'ETag': ETAG})
+        return web.Response(text=PAGE, content_type='text/html', charset='utf-8', headers={'ETag': ETAG})
+
+    async def serve(self) -> web.AppRunner:
+        app = web.Application()
+        app.router.add_get('/{path:.*}', self.handle)
+        runner = web.AppRunner(app, access_log=None)
+        await runner.setup()
+        await web.TCPSite(runner, '127.0.0.1', 0).start()
+        return runner
+
+
+def base_url(runner: web.AppRunner) -> str:
+    host, port = runner.addresses[0][:2]
+    return f'http://{host}:{port}'
+
+
+def test_etag_revalidation(tmp_path):
+    pages = Pages()
+    cache_path = str(tmp_path / 'http_cache.sqlite3')
+
+    async def main():
+        runner = await pages.serve()
+        try:
+            adapter = Gushi365Adapter(base_url=base_url(runner))
+            url = adapter.base_url + '/info/1.html'
+            engine = CrawlEngine(request_delay=0, cache_path=cache_path)
+            async with engine:
+                assert await engine.fetch(url, adapter) == PAGE
+            assert engine.metrics.counter('cache_requests', result='miss', host=adapter.host) == 1
+
+            # 再次运行发送条件请求，304时沿用缓存内容；同一次运行中不再重复验证
+            engine = CrawlEngine(request_delay=0, cache_path=cache_path)
+            async with engine:
+                assert await engine.fetch(url, adapter) == PAGE
+                assert await engine.fetch(url, adapter) == PAGE
+            assert engine.metrics.counter('cache_requests', result='revalidated', host=adapter.host) == 1
+            assert engine.metrics.counter('cache_requests', result='hit', host=adapter.host) == 1
+        finally:
+            await runner.cleanup()
+
+    asyncio.run(main())
+    assert pages.requests == [('/info/1.html', None), ('/info/1.html', ETAG)]
+
+
+def test_coalesces_concurrent_requests():
+    pages = Pages(delay=0.1)
+
+    async def main():
+        runner = await pages.serve()
+        try:
+            adapter = Gushi365Adapter(base_url=base_url(runner))
+            url = adapter.base_url + '/info/2.html'
+            async with CrawlEngine(request_delay=0) as engine:
+                results = await asyncio.gather(*(engine.fetch(url, adapter) for _ in range(5)))
+                assert engine.coalesced_count == 4
+                assert not engine.inflight
+                # 请求完成后再次获取会发起新的请求
+                await engine.fetch(url, adapter)
+            return results
+        finally:
+            await runner.cleanup()
+
+    assert asyncio.run(main()) == [PAGE] * 5
+    assert [path for path, _ in pages.requests] == ['/info/2.html'] * 2
+
+
+def test_resume_skips_saved_stories(tmp_path):
+    site = MockSite(MockSiteConfig(pages=2, per_page=4, paragraphs=3))
+    state_path = str(tmp_path / 'crawl_state.sqlite3')
+
+    async def crawl(adapter, start_url, output_dir, resume):
+        job = CrawlJob(adapter, start_url, output_dir=output_dir, warmup=False)
+        async with CrawlEngine(request_delay=0, output_format='jsonl', state_path=state_path,
+                               resume=resume) as engine:
+            return await engine.run_job(job)
+
+    async def main():
+        # 两次运行使用同一个站点地址：任务以start_url为标识
+        runner = await serve(site, port=0)
+        try:
+            adapter = Gushi365Adapter(base_url=base_url(runner))
+            start_url = adapter.base_url + '/yuyangushi/'
+            result = await crawl(adapter, start_url, str(tmp_path / 'first'), resume=False)
+            assert result.saved == result.discovered == 8
+
+            # 模拟在列表页发现完成后中断：两个故事尚未保存
+            state = CrawlState(state_path)
+            story_ids = sorted(state.states(start_url))
+            for story_id in story_ids[:2]:
+                state.mark(start_url, story_id, FAILED, '中断')
+            state.set_job_status(start_url, JOB_DISCOVERED)
+            state.close()
+
+            # 输出到新目录，跳过完全取决于爬取状态
+            second = str(tmp_path / 'second')
+            result = await crawl(adapter, start_url, second, resume=True)
+            assert result.discovered == result.saved == 2
+            assert sorted(record['id'] for record in JsonlSink.read(second)) == story_ids[:2]
+
+            state = CrawlState(state_path)
+            assert set(state.states(start_url).values()) == {SAVED}
+            assert state.job_status(start_url) == JOB_FINISHED
+            state.close()
+        finally:
+            await runner.cleanup()
+
+    asyncio.run(main())
@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+"""
+爬取状态：批量提交、待处理故事按发现顺序排列、继续时跳过已保存和重复的故事
+"""
+
+import pytest
+
+from storycrawl.crawl_state import (
+    CrawlState, DISCOVERED, DUPLICATE, FAILED, FETCHED, JOB_DISCOVERED, JOB_FINISHED, SAVED,
+)
+
+JOB = 'http://example.com/yuyangushi/'
+
+
+def discover(state, ids):
+    for story_id in ids:
+        state.discover(JOB, story_id, f'http://example.com/info/{story_id}.html', f'故事{story_id}')
+
+
+def test_pending_and_states(tmp_path):
+    state = CrawlState(str(tmp_path / 'state' / 'crawl_state.sqlite3'))
+    assert state.start_job(JOB) is False
+    discover(state, ['3', '1', '2', '4'])
+    state.mark(JOB, '1', SAVED, data={'id': '1', 'title': '故事1'})
+    state.mark(JOB, '2', DUPLICATE)
+    state.mark(JOB, '4', FETCHED)
+    state.mark(JOB, '4', FAILED, '解析失败')
+
+    assert state.states(JOB) == {'1': SAVED, '2': DUPLICATE, '3': DISCOVERED, '4': FAILED}
+    # 失败的故事也会重试，按发现顺序
+    assert [story_id for story_id, _, _ in state.pending(JOB)] == ['3', '4']
+    assert state.saved_data(JOB) == [{'id': '1', 'title': '故事1'}]
+    assert state.counts(JOB) == {SAVED: 1, DUPLICATE: 1, DISCOVERED: 1, FAILED: 1}
+    state.close()
+
+
+def test_unknown_state(tmp_path):
+    state = CrawlState(str(tmp_path / 'crawl_state.sqlite3'))
+    with pytest.raises(ValueError):
+        state.mark(JOB, '1', 'done')
+    state.close()
+
+
+def test_batched_updates_survive_reopen(tmp_path):
+    path = str(tmp_path / 'crawl_state.sqlite3')
+    state = CrawlState(path, batch_size=1000, flush_interval=3600)
+    state.start_job(JOB)
+    discover(state, ['1', '2'])
+    state.mark(JOB, '1', SAVED)
+    # 关闭时提交缓冲的更新
+    state.close()
+
+    state = CrawlState(path)
+    assert state.states(JOB) == {'1': SAVED, '2': DISCOVERED}
+    state.close()
+
+
+def test_resume_skips_saved(tmp_path):
+    path = str(tmp_path / 'crawl_state.sqlite3')
+    state = CrawlState(path)
+    state.start_job(JOB)
+    discover(state, ['1', '2', '3', '4'])
+    state.set_job_status(JOB, JOB_DISCOVERED)
+    state.mark(JOB, '1', SAVED)
+    state.mark(JOB, '3', DUPLICATE)
+    state.close()
+
+    # 中断后继续：保留已有状态，只剩未保存的故事
+    state = CrawlState(path)
+    assert state.start_job(JOB, resume=True) is True
+    assert state.job_status(JOB) == JOB_DISCOVERED
+    assert [story_id for story_id, _, _ in state.pending(JOB)] == ['2', '4']
+    state.close()
+
+
+def test_finished_or_not_resumed_starts_over(tmp_path):
+    state = CrawlState(str(tmp_path / 'crawl_state.sqlite3'))
+    state.start_job(JOB)
+    discover(state, ['1', '2'])
+    state.mark(JOB, '1', SAVED)
+    state.set_job_status(JOB, JOB_FINISHED)
+
+    # 上次已完成的任务重新开始
+    assert state.start_job(JOB, resume=True) is False
+    assert state.states(JOB) == {}
+
+    discover(state, ['1'])
+    state.set_job_status(JOB, JOB_DISCOVERED)
+    # 不继续时清空已有状态
+    assert state.start_job(JOB, resume=False) is False
+    assert state.pending(JOB) == []
+    state.close()
@@ -0,0 +1,108 @@
+# -*- coding: utf-8 -*-
+"""
+故事365详情页一次遍历（scan_story）与原有分别查找的结果一致
+原有的查找顺序：移除噪声前取标题，移除噪声后取段落、作者候选和分类
+"""
+
+import pytest
+
+from storycrawl.gushi365.extract_backend import BACKENDS
+
+STORY_URL = "https://www.gushi365.com/info/12345.html"
+
+PAGES = {
+    'normal': """
+        <html><head><title>小熊的约定 - 故事365</title><script>var a = "作者：脚本";</script></head>
+        <body>
+          <h1>小熊的约定</h1>
+          <div class="info"><span>作者：王老师</span> <a href="/shuiqiangushi/">睡前故事</a></div>
+          <div class="content"><p>从前有一只小熊。</p><p>它和小兔子约好一起去看星星。</p></div>
+          <footer><p>版权所有</p><a href="/yuyangushi/">寓言故事</a></footer>
+        </body></html>
+    """,
+    'h1_in_header': """
+        <html><body>
+          <header><h1>网站标题</h1><span>作者：页眉</span></header>
+          <h1>正文标题</h1>
+          <p>故事的第一段。</p>
+          <span>分类：童话</span>
+        </body></html>
+    """,
+    'author_in_comment': """
+        <html><body>
+          <h1>注释里的作者</h1>
+          <div class="meta"><!-- 作者：注释 --><em>作者：李四</em></div>
+          <!-- 分类：注释分类 -->
+          <p>一段正文。</p>
+        </body></html>
+    """,
+    'no_h1_story_link': """
+        <html><body>
+          <nav><a href="/info/12345.html">导航里的链接</a></nav>
+          <div class="list"><a href="/info/99999.html">其他故事</a><a href="/info/12345.html">当前故事</a></div>
+          <p>没有h1的页面。</p>
+          <div class="author-box"><b>作者：赵六</b></div>
+        </body></html>
+    """,
+    'span_with_noise_children': """
+        <html><body>
+          <h1>带噪声子元素的span</h1>
+          <div><span>作者<script>var x = 1;</script></span>：张三</div>
+          <div><span>分类<style>.a {}</style></span></div>
+          <p>正文<script>document.write("噪声")</script>段落。</p>
+        </body></html>
+    """,
+    'malformed_nesting': """
+        <html><body>
+          <h1>不规范的<b>嵌套</h1></b>
+          <p>第一段<div>块元素打断段落</p></div>
+          <p>第二段<span>作者：钱七<p>嵌套的段落</span>
+          <a href="/yuyangushi/">寓言<i>故事</a></i>
+          <table><tr><td><p>表格里的段落</td></tr></table>
+        </body></html>
+    """,
+    'empty': "",
+}
+
+
+def separate_calls(backend, html):
+    doc = backend.parse(html)
+    title = backend.title(doc, STORY_URL)
+    backend.remove_noise(doc)
+    return title, backend.paragraphs(doc), list(backend.author_texts(doc)), backend.category(doc)
+
+
+def single_scan(backend, html):
+    scan = backend.scan_story(backend.parse(html), STORY_URL)
+    return scan.title, scan.paragraphs, list(scan.author_texts), scan.category
+
+
+@pytest.mark.parametrize('backend_name', sorted(BACKENDS))
+@pytest.mark.parametrize('page', sorted(PAGES))
+def test_scan_story_matches_separate_calls(backend_name, page):
+    backend = BACKENDS[backend_name]
+    assert single_scan(backend, PAGES[page]) == separate_calls(backend, PAGES[page])
+
+
+@pytest.mark.parametrize('backend_name', sorted(BACKENDS))
+def test_scan_story_fields(backend_name):
+    title, paragraphs, author_texts, category = single_scan(BACKENDS[backend_name], PAGES['normal'])
+    assert title == "小熊的约定"
+    assert paragraphs == ["从前有一只小熊。", "它和小兔子约好一起去看星星。"]
+    assert author_texts[0] == "作者：王老师"
+    assert category == "睡前故事"
+
+
+@pytest.mark.parametrize('backend_name', sorted(BACKENDS))
+def test_scan_story_title_from_story_link(backend_name):
+    title, _, _, _ = single_scan(BACKENDS[backend_name], PAGES['no_h1_story_link'])
+    assert title == "导航里的链接"
+
+
+@pytest.mark.parametrize('backend_name', sorted(BACKENDS))
+def test_scan_story_leaves_noise_removed(backend_name):
+    backend = BACKENDS[backend_name]
+    doc = backend.parse(PAGES['span_with_noise_children'])
+    scan = backend.scan_story(doc, STORY_URL)
+    assert backend.paragraphs(doc) == scan.paragraphs
+    assert list(backend.author_texts(doc)) == ["作者：张三"]
@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+"""
+HTTP缓存：条目读写、条件请求头、重新打开后保留、按字节预算LRU淘汰
+"""
+
+import os
+
+from storycrawl.http_cache import CacheEntry, HttpCache
+
+
+def test_put_get_roundtrip(tmp_path):
+    cache = HttpCache(str(tmp_path / 'cache' / 'http_cache.sqlite3'))
+    cache.put('http://example.com/a', '<p>小兔子</p>', etag='"v1"', last_modified='Mon, 01 Jan 2024 00:00:00 GMT')
+    entry = cache.get('http://example.com/a')
+    assert entry.body == '<p>小兔子</p>'
+    assert entry.conditional_headers() == {
+        'If-None-Match': '"v1"',
+        'If-Modified-Since': 'Mon, 01 Jan 2024 00:00:00 GMT',
+    }
+    assert cache.get('http://example.com/b') is None
+    cache.close()
+
+    # 重新打开后条目仍在
+    cache = HttpCache(str(tmp_path / 'cache' / 'http_cache.sqlite3'))
+    assert cache.get('http://example.com/a').etag == '"v1"'
+    assert cache.total_bytes > 0
+    cache.close()
+
+
+def test_conditional_headers_only_for_known_validators():
+    assert CacheEntry(url='u', body='').conditional_headers() == {}
+    assert CacheEntry(url='u', body='', etag='"x"').conditional_headers() == {'If-None-Match': '"x"'}
+
+
+def test_mark_validated(tmp_path):
+    cache = HttpCache(str(tmp_path / 'http_cache.sqlite3'))
+    cache.put('http://example.com/a', 'body')
+    before = cache.get('http://example.com/a').validated_at
+    cache.mark_validated('http://example.com/a')
+    assert cache.get('http://example.com/a').validated_at >= before
+    cache.close()
+
+
+def test_lru_eviction(tmp_path):
+    # 随机内容压缩后大小基本不变，三个页面超出预算
+    bodies = {name: os.urandom(600).hex() for name in 'abc'}
+    cache = HttpCache(str(tmp_path / 'http_cache.sqlite3'), max_bytes=2000)
+    cache.put('http://example.com/a', bodies['a'])
+    cache.put('http://example.com/b', bodies['b'])
+    # 访问a后b成为最近最少使用的页面
+    assert cache.get('http://example.com/a') is not None
+    cache.put('http://example.com/c', bodies['c'])
+    assert cache.get('http://example.com/b') is None
+    assert cache.get('http://example.com/a').body == bodies['a']
+    assert cache.get('http://example.com/c').body == bodies['c']
+    assert cache.total_bytes <= 2000
+    cache.close()
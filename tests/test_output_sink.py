@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+"""
+输出后端：写入后按相同格式读回，JSONL按分片写入并跳过不完整的最后一行
+"""
+
+import gzip
+import os
+
+import pytest
+
+from storycrawl.output_sink import JsonlSink, SqliteSink, TextSink, create_sink, read_records
+
+
+def records(n, start=1):
+    return [{'id': str(i), 'title': f'故事 {i}', 'author': '佚名', 'category': '寓言故事',
+             'url': f'http://example.com/info/{i}.html', 'content': f'第{i}个故事。\n\n结尾。'}
+            for i in range(start, start + n)]
+
+
+def write_all(sink, batch):
+    for record in batch:
+        sink.write(record)
+    return sink.close()
+
+
+@pytest.mark.parametrize('compress', [False, True])
+def test_jsonl_shards_roundtrip(tmp_path, compress):
+    stories_dir = str(tmp_path / 'stories')
+    sink = JsonlSink(stories_dir, shard_size=3, compress=compress)
+    batch = records(7)
+    committed = write_all(sink, batch)
+    suffix = '.jsonl.gz' if compress else '.jsonl'
+    assert [filename for _, filename in committed] == (
+        [f'stories-00000{suffix}'] * 3 + [f'stories-00001{suffix}'] * 3 + [f'stories-00002{suffix}'])
+    assert sorted(os.listdir(stories_dir)) == [f'stories-0000{n}{suffix}' for n in range(3)]
+    assert list(JsonlSink.read(stories_dir)) == batch
+
+    # 再次运行从新分片开始，不改动已有分片
+    more = records(2, start=8)
+    committed = write_all(JsonlSink(stories_dir, shard_size=3, compress=compress), more)
+    assert {filename for _, filename in committed} == {f'stories-00003{suffix}'}
+    assert list(read_records('jsonl', stories_dir)) == batch + more
+
+
+@pytest.mark.parametrize('compress', [False, True])
+def test_jsonl_skips_partial_last_line(tmp_path, compress):
+    stories_dir = str(tmp_path / 'stories')
+    batch = records(3)
+    write_all(JsonlSink(stories_dir, compress=compress), batch)
+    name = 'stories-00000.jsonl.gz' if compress else 'stories-00000.jsonl'
+    opener = gzip.open if compress else open
+    with opener(os.path.join(stories_dir, name), 'at', encoding='utf-8') as f:
+        f.write('{"id": "4", "title": "故')
+    assert list(JsonlSink.read(stories_dir)) == batch
+
+
+def test_sqlite_roundtrip(tmp_path):
+    stories_dir = str(tmp_path / 'stories')
+    sink = create_sink('sqlite', stories_dir, {'filename': 'out.sqlite3', 'batch_size': 2})
+    batch = records(5)
+    for record in batch[:4]:
+        sink.write(record)
+    assert sink.full
+    assert [record for record, _ in sink.flush()] == batch[:4]
+    sink.write(batch[4])
+    assert sink.close() == [(batch[4], 'out.sqlite3')]
+    assert list(SqliteSink.read(stories_dir, filename='out.sqlite3')) == batch
+    # 同一ID再次写入时覆盖
+    changed = dict(batch[0], content='新的正文。')
+    write_all(SqliteSink(stories_dir, filename='out.sqlite3'), [changed])
+    assert {r['id']: r for r in read_records('sqlite', stories_dir, {'filename': 'out.sqlite3'})}['1'] == changed
+
+
+def test_text_roundtrip(tmp_path):
+    stories_dir = str(tmp_path / 'stories')
+    sink = TextSink(stories_dir)
+    batch = records(3)
+    committed = write_all(sink, batch)
+    assert [filename for _, filename in committed] == ['1_故事_1.txt', '2_故事_2.txt', '3_故事_3.txt']
+    assert sink.exists(batch[0])
+    assert list(TextSink.read(stories_dir)) == batch
+
+
+def test_buffer_until_flush(tmp_path):
+    sink = JsonlSink(str(tmp_path / 'stories'), batch_size=2, flush_interval=3600)
+    batch = records(3)
+    sink.write(batch[0])
+    assert not sink.full
+    sink.write(batch[1])
+    assert sink.full
+    assert [record for record, _ in sink.flush()] == batch[:2]
+    # 落盘前的故事不在读取结果中
+    sink.write(batch[2])
+    assert list(JsonlSink.read(sink.stories_dir)) == batch[:2]
+    assert [record for record, _ in sink.close()] == batch[2:]
+    assert list(JsonlSink.read(sink.stories_dir)) == batch
+
+
+def test_unknown_format(tmp_path):
+    with pytest.raises(ValueError, match='不支持的输出格式'):
+        create_sink('xml', str(tmp_path))
@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+"""
+页面归档：按索引随机读取、顺序流式读取，中断时写了一半的记录和索引行不影响已有记录
+"""
+
+import os
+
+from storycrawl.page_archive import INDEX_NAME, PageArchive, archive_files, iter_records
+
+
+def write_pages(archive, pages):
+    for url, body in pages:
+        archive.write(url, 200, body, {'Content-Type': 'text/html; charset=utf-8'})
+
+
+PAGES = [
+    ('http://example.com/info/1.html', '<p>小兔子</p>'.encode('utf-8')),
+    ('http://example.com/info/2.html', '<p>老山羊</p>'.encode('utf-8')),
+    ('http://example.com/info/1.html', '<p>小兔子（修订）</p>'.encode('utf-8')),
+]
+
+
+def test_write_and_read(tmp_path):
+    directory = str(tmp_path / 'archive')
+    archive = PageArchive(directory)
+    write_pages(archive, PAGES)
+    record = archive.get('http://example.com/info/2.html')
+    assert record.status == 200
+    assert record.text() == '<p>老山羊</p>'
+    assert record.headers['Content-Type'] == 'text/html; charset=utf-8'
+    # 同一URL以最后一次为准
+    assert archive.get('http://example.com/info/1.html').body == PAGES[2][1]
+    assert archive.get('http://example.com/missing') is None
+    assert len(archive) == 2
+    archive.close()
+
+    # 顺序读取得到全部记录，latest只有每个URL最近一次的记录
+    assert [(r.url, r.body) for r in iter_records(directory)] == PAGES
+    archive = PageArchive(directory)
+    assert sorted((r.url, r.body) for r in archive.latest()) == sorted(PAGES[1:])
+    archive.close()
+
+
+def test_new_file_per_run_and_size_limit(tmp_path):
+    directory = str(tmp_path / 'archive')
+    archive = PageArchive(directory, max_file_bytes=1)
+    write_pages(archive, PAGES[:2])
+    archive.close()
+    archive = PageArchive(directory)
+    write_pages(archive, PAGES[2:])
+    archive.close()
+    # 超过大小上限换新文件，每次运行也从新文件开始
+    assert archive_files(directory) == ['pages-00000.arc', 'pages-00001.arc', 'pages-00002.arc']
+    assert [r.url for r in iter_records(directory)] == [url for url, _ in PAGES]
+
+
+def test_reads_after_partial_record(tmp_path):
+    directory = str(tmp_path / 'archive')
+    archive = PageArchive(directory)
+    write_pages(archive, PAGES[:2])
+    archive.flush()
+    # 模拟中断：归档文件末尾只写了半条记录，索引行也只写了一半
+    full = PageArchive(str(tmp_path / 'other'))
+    write_pages(full, [('http://example.com/info/3.html', b'<p>' + b'x' * 500 + b'</p>')])
+    full.close()
+    with open(os.path.join(str(tmp_path / 'other'), 'pages-00000.arc'), 'rb') as f:
+        partial = f.read()[:-100]
+    archive._file.write(partial)
+    archive._index_file.write('http://example.com/info/3.html\tpages-00000.arc')
+    archive._file.close()
+    archive._file = None
+    archive.close()
+
+    assert [r.url for r in iter_records(directory)] == [url for url, _ in PAGES[:2]]
+    archive = PageArchive(directory)
+    assert 'http://example.com/info/3.html' not in archive
+    assert archive.get('http://example.com/info/2.html').text() == '<p>老山羊</p>'
+    assert len(list(archive.latest())) == 2
+
+    # 新的记录写入新文件，不受旧文件末尾的半条记录影响
+    write_pages(archive, PAGES[2:])
+    archive.close()
+    assert [r.url for r in iter_records(directory)] == [url for url, _ in PAGES[:2]] + [PAGES[2][0]]
+    archive = PageArchive(directory)
+    assert archive.get('http://example.com/info/1.html').body == PAGES[2][1]
+    archive.close()
+
+
+def test_rebuild_index(tmp_path):
+    directory = str(tmp_path / 'archive')
+    archive = PageArchive(directory)
+    write_pages(archive, PAGES)
+    archive.close()
+    os.remove(os.path.join(directory, INDEX_NAME))
+
+    archive = PageArchive(directory)
+    assert len(archive) == 0
+    archive.rebuild_index()
+    assert len(archive) == 2
+    assert archive.get('http://example.com/info/1.html').body == PAGES[2][1]
+    archive.close()
+    assert len(PageArchive(directory)) == 2
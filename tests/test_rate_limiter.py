@@ -0,0 +1,91 @@
+# -*- coding: utf-8 -*-
+"""
+令牌桶限速：突发量内立即放行，之后按速率排队；每个主机一个令牌桶
+"""
+
+import asyncio
+import time
+
+import pytest
+
+from storycrawl.rate_limiter import HostRateLimiter, TokenBucket
+
+
+def elapsed(coroutine) -> float:
+    started = time.monotonic()
+    asyncio.run(coroutine)
+    return time.monotonic() - started
+
+
+def test_burst_then_rate():
+    bucket = TokenBucket(rate=20, burst=3)
+
+    async def acquire(n):
+        for _ in range(n):
+            await bucket.acquire()
+
+    assert elapsed(acquire(3)) < 0.04
+    # 突发量用完后每个令牌间隔 1/20 秒
+    assert 0.14 <= elapsed(acquire(3)) < 0.4
+
+
+def test_waiters_are_spaced():
+    bucket = TokenBucket(rate=50, burst=1)
+    times = []
+
+    async def acquire():
+        await bucket.acquire()
+        times.append(time.monotonic())
+
+    async def main():
+        await asyncio.gather(*(acquire() for _ in range(5)))
+
+    asyncio.run(main())
+    gaps = [b - a for a, b in zip(times, times[1:])]
+    assert all(gap >= 0.015 for gap in gaps)
+
+
+def test_cancelled_waiter_returns_token():
+    bucket = TokenBucket(rate=1, burst=1)
+
+    async def main():
+        await bucket.acquire()
+        waiter = asyncio.ensure_future(bucket.acquire())
+        await asyncio.sleep(0.01)
+        waiter.cancel()
+        await asyncio.gather(waiter, return_exceptions=True)
+
+    asyncio.run(main())
+    assert bucket.tokens > -0.5
+
+
+def test_invalid_rate():
+    with pytest.raises(ValueError):
+        TokenBucket(rate=0)
+
+
+def test_host_buckets():
+    limiter = HostRateLimiter(rate=5, burst=2)
+    a = limiter.bucket('http://a.example.com/x')
+    assert limiter.bucket('http://a.example.com/y') is a
+    b = limiter.bucket('http://b.example.com/x')
+    assert b is not a
+
+    # 只调整一个主机
+    limiter.set_rate(1, url='http://a.example.com/')
+    assert (a.rate, b.rate) == (1, 5)
+    # 调整全部主机，之后创建的令牌桶也使用新速率
+    limiter.set_rate(8)
+    assert (a.rate, b.rate) == (8, 8)
+    assert limiter.bucket('http://c.example.com/').rate == 8
+
+
+def test_unlimited():
+    limiter = HostRateLimiter(rate=None)
+    assert limiter.bucket('http://a.example.com/') is None
+
+    async def acquire():
+        for _ in range(100):
+            await limiter.acquire('http://a.example.com/')
+
+    assert elapsed(acquire()) < 0.1
@@ -0,0 +1,131 @@
+# -*- coding: utf-8 -*-
+"""
+段落重排与原有实现（基线 spider01/story_spider.py 的 format_story_content，之后清理多余空行）结果相同
+"""
+
+import random
+import re
+
+import pytest
+
+from storycrawl.lovechinese.story_parser import format_story_content
+
+
+def baseline_is_sentence_end(line):
+    line_clean = line.rstrip('"')
+    sentence_endings = ['。', '！', '？', '."', '!"', '?"', '。"', '！"', '？"']
+    for ending in sentence_endings:
+        if line_clean.endswith(ending):
+            return True
+    if line.endswith('"'):
+        return True
+    return False
+
+
+def baseline_format(content):
+    """基线的 format_story_content，照原样保留"""
+    lines = content.split('\n')
+    formatted_lines = []
+    current_paragraph = []
+    in_dialogue = False
+
+    for line in lines:
+        line = line.strip()
+        if not line:
+            if current_paragraph:
+                formatted_lines.append(''.join(current_paragraph))
+                current_paragraph = []
+            if formatted_lines and formatted_lines[-1] != '':
+                formatted_lines.append('')
+            continue
+
+        if line.startswith('作者：') or line.startswith('〔') and '〕' in line:
+            if current_paragraph:
+                formatted_lines.append(''.join(current_paragraph))
+                current_paragraph = []
+            formatted_lines.append(line)
+            continue
+
+        if line.endswith('—') and not line.endswith('——'):
+            current_paragraph.append(line)
+            continue
+        elif line.startswith('—') and current_paragraph:
+            current_paragraph.append(line)
+            if baseline_is_sentence_end(line):
+                formatted_lines.append(''.join(current_paragraph))
+                current_paragraph = []
+            continue
+
+        if line.startswith('"'):
+            in_dialogue = True
+
+        current_paragraph.append(line)
+
+        should_end_paragraph = False
+        if in_dialogue:
+            if line.endswith('"') and not line.endswith('："'):
+                should_end_paragraph = True
+                in_dialogue = False
+        else:
+            if baseline_is_sentence_end(line):
+                should_end_paragraph = True
+
+        if len(line) > 50 and ('。' in line or '！' in line or '？' in line):
+            sentence_count = line.count('。') + line.count('！') + line.count('？')
+            if sentence_count >= 2:
+                should_end_paragraph = True
+
+        if should_end_paragraph:
+            formatted_lines.append(''.join(current_paragraph))
+            current_paragraph = []
+
+    if current_paragraph:
+        formatted_lines.append(''.join(current_paragraph))
+
+    cleaned_lines = []
+    prev_empty = False
+    for line in formatted_lines:
+        if line == '':
+            if not prev_empty:
+                cleaned_lines.append(line)
+            prev_empty = True
+        else:
+            cleaned_lines.append(line)
+            prev_empty = False
+
+    return '\n'.join(cleaned_lines)
+
+
+def baseline_content(content):
+    """基线中格式化之后的清理"""
+    content = baseline_format(content)
+    content = re.sub(r'\n\s*\n', '\n\n', content)
+    return content.strip()
+
+
+CASES = {
+    'whitespace_blank_lines': "小兔子出门了，\n  \n\t\n走到河边。\n 　 \n作者：佚名\n\n\n",
+    'quote_runs': '"你好，\n小熊。"\n""\n"""\n"我们走吧！"""\n他说："\n"好。"',
+    'no_sentence_end': "从前有一座山\n山里有一座庙\n庙里有个老和尚",
+    'dashes': "他想了想—\n—然后笑了。\n——\n—没有结尾",
+    'author_markers': "〔美〕作者\n作者：安徒生\n正文开始，\n结束。\n〔未完",
+    'long_lines': "很长的一行。" * 12 + "\n" + "对话里" + "也很长。" * 15 + "\n\"引号内。另一句！还有？",
+    'leading_blanks': "\n\n  \n第一段。\n\n\n\n第二段。\n",
+}
+
+
+@pytest.mark.parametrize('name', sorted(CASES))
+def test_matches_baseline(name):
+    content = CASES[name]
+    assert format_story_content(content).strip() == baseline_content(content)
+
+
+def test_matches_baseline_random():
+    pieces = ['', ' ', '\t', '　', '"', '""', '。', '！', '？', '—', '——', '：', '作者：某人',
+              '〔英〕', '〕', '小兔子', '说', '很长的句子。' * 9, '一句。两句！']
+    rng = random.Random(25)
+    for _ in range(3000):
+        lines = [''.join(rng.choice(pieces) for _ in range(rng.randint(0, 4)))
+                 for _ in range(rng.randint(0, 12))]
+        content = '\n'.join(lines)
+        assert format_story_content(content).strip() == baseline_content(content), content
@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+"""
+流式读取详情页时保留的数据：正文只保留一份，提前结束时只保留到正文容器为止
+"""
+
+import asyncio
+
+from lxml import etree
+
+from storycrawl.crawl_engine import CrawlEngine
+from storycrawl.gushi365.story_parser import is_content_end
+from storycrawl.response_stream import IncrementalHtmlParser
+
+CONTENT = "<p>" + "小兔子和小熊约好一起去看星星。" * 20 + "</p>"
+FOOTER = "".join(f'<li><a href="/info/{n}.html">相关故事{n}</a></li>' for n in range(2000))
+PAGE = (f'<html><head><title>t</title></head><body><h1>标题</h1>'
+        f'<div class="content">{CONTENT}</div><ul>{FOOTER}</ul></body></html>').encode('utf-8')
+CHUNK = 1024
+
+
+def chunks(data=PAGE, size=CHUNK):
+    return [data[i:i + size] for i in range(0, len(data), size)]
+
+
+class FakeContent:
+    def __init__(self, data):
+        self.data = data
+
+    async def iter_chunked(self, size):
+        for chunk in chunks(self.data, CHUNK):
+            yield chunk
+
+
+class FakeResponse:
+    headers = {'Content-Type': 'text/html; charset=utf-8'}
+    content_length = None
+
+    def __init__(self, data=PAGE):
+        self.content = FakeContent(data)
+
+
+def test_stream_tree_matches_whole_page():
+    stream = IncrementalHtmlParser()
+    for chunk in chunks():
+        stream.feed(chunk)
+    whole = etree.fromstring(PAGE, etree.HTMLParser(encoding='utf-8'))
+    assert etree.tostring(stream.close()) == etree.tostring(whole)
+    assert b''.join(stream.chunks) == PAGE
+
+
+def test_stop_keeps_only_prefix():
+    stream = IncrementalHtmlParser(is_content_end)
+    stopped = [stream.feed(chunk) for chunk in chunks()]
+    assert any(stopped)
+    # 停止后的数据不再解析和保留
+    assert stream.fed == sum(len(chunk) for chunk in stream.chunks) < len(PAGE) // 4
+    root = stream.close()
+    assert root.find('.//ul') is None
+    assert '看星星' in root.find('.//div').xpath('string()')
+
+
+def test_without_keep_chunks_retains_nothing():
+    stream = IncrementalHtmlParser(keep_chunks=False)
+    for chunk in chunks():
+        stream.feed(chunk)
+    assert stream.chunks == []
+    assert stream.close().find('.//h1').text == '标题'
+
+
+def read_body(engine, stream):
+    return asyncio.run(engine._read_body(FakeResponse(), 'example.com', stream))
+
+
+def test_read_body_stops_early_without_cache():
+    engine = CrawlEngine()
+    stream = IncrementalHtmlParser(is_content_end)
+    assert read_body(engine, stream) is None
+    assert 0 < sum(len(chunk) for chunk in stream.chunks) < len(PAGE) // 4
+    assert engine.metrics.counter('stream_stopped_early', host='example.com') == 1
+
+
+def test_read_body_keeps_one_copy_with_cache():
+    # 需要缓存时读取完整正文，解析器不再保留第二份，停止后也不再解析
+    engine = CrawlEngine()
+    engine.http_cache = object()
+    stream = IncrementalHtmlParser(is_content_end)
+    assert read_body(engine, stream) == PAGE
+    assert stream.chunks == []
+    assert stream.stopped_at is not None
+    assert stream.fed < len(PAGE) // 4
@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+"""
+已保存故事清单：登记与别名、从清单文件和已有故事文件重新加载、不完整的最后一行
+"""
+
+import json
+import os
+
+from storycrawl.story_manifest import HEADER_SEPARATOR, MANIFEST_NAME, StoryManifest
+
+
+def test_add_and_alias(tmp_path):
+    stories_dir = str(tmp_path / 'stories')
+    manifest = StoryManifest(stories_dir)
+    manifest.add('1', '1_狐狸和葡萄.txt', '吃不到葡萄说葡萄酸。', 'http://example.com/info/1.html')
+    assert '1' in manifest
+    assert manifest.find_content('吃不到葡萄说葡萄酸。') == '1'
+    assert manifest.find_content('另一个故事。') is None
+
+    # 正文相同的故事登记为别名，指向原故事的文件
+    manifest.add_alias('7', '1', 'http://example.com/info/7.html')
+    assert '7' in manifest
+    assert manifest.alias_of('7') == '1'
+    assert manifest.alias_of('1') is None
+    assert manifest.alias_of('9') is None
+    assert manifest.entries['7']['file'] == '1_狐狸和葡萄.txt'
+    # 正文哈希仍然对应原故事
+    assert manifest.find_content('吃不到葡萄说葡萄酸。') == '1'
+    manifest.close()
+
+    manifest = StoryManifest(stories_dir)
+    assert len(manifest) == 2
+    assert manifest.alias_of('7') == '1'
+    assert manifest.find_content('吃不到葡萄说葡萄酸。') == '1'
+    manifest.close()
+
+
+def test_partial_last_line(tmp_path):
+    stories_dir = str(tmp_path / 'stories')
+    manifest = StoryManifest(stories_dir)
+    manifest.add('1', '1_a.txt', '正文一。')
+    manifest.close()
+    path = os.path.join(stories_dir, MANIFEST_NAME)
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write('{"id": "2", "fi')
+
+    # 中断时写了一半的行被忽略，之后的记录从新行开始
+    manifest = StoryManifest(stories_dir)
+    assert len(manifest) == 1
+    manifest.add('3', '3_c.txt', '正文三。')
+    manifest.close()
+    with open(path, encoding='utf-8') as f:
+        assert json.loads(f.read().splitlines()[-1])['id'] == '3'
+    assert '3' in StoryManifest(stories_dir)
+
+
+def test_backfills_story_files(tmp_path):
+    stories_dir = tmp_path / 'stories'
+    stories_dir.mkdir()
+    (stories_dir / '12_小猫钓鱼.txt').write_text(
+        '标题: 小猫钓鱼\n来源: http://example.com/info/12.html\n' + HEADER_SEPARATOR + '猫妈妈带着小猫去钓鱼。',
+        encoding='utf-8')
+    (stories_dir / 'notes.txt').write_text('不是故事文件', encoding='utf-8')
+
+    # 清单中没有的故事文件按正文补登
+    manifest = StoryManifest(str(stories_dir))
+    assert list(manifest.entries) == ['12']
+    assert manifest.find_content('猫妈妈带着小猫去钓鱼。') == '12'
+    manifest.close()